@@ -23,8 +23,16 @@ TOOL_MAP = {
     "/api/compress": "compress-pdf",
     "/api/unlock": "unlock-pdf",
     "/api/handwriting": "handwriting-to-pdf",
+    "/api/pipeline": "pipeline",
 }
 
+# /api/* paths that are infrastructure, not tool usage (jobs and batches
+# log each file they process themselves)
+UNTRACKED_PREFIXES = (
+    "/api/analytics", "/api/blobs", "/api/uploads", "/api/system",
+    "/api/jobs", "/api/progress", "/api/batch", "/api/results",
+)
+
 
 class AnalyticsMiddleware(BaseHTTPMiddleware):
     """Record every API request for analytics."""
@@ -32,8 +40,8 @@ class AnalyticsMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next) -> Response:
         path = request.url.path
 
-        # Only track /api/* endpoints (skip health checks, static, etc.)
-        if not path.startswith("/api/") or path == "/api/analytics":
+        # Only track /api/* tool endpoints (skip health checks, static, etc.)
+        if not path.startswith("/api/") or path.startswith(UNTRACKED_PREFIXES):
             return await call_next(request)
 
         start = time.perf_counter()
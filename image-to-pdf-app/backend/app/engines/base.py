@@ -0,0 +1,69 @@
+"""
+PDF engine interface — what every library adapter provides.
+
+An engine wraps one PDF library behind the same few operations, on the
+library's own document objects ("natives"):
+
+    open(source, password)      parse a PdfInput (app.utils.pdf_input)
+    page_count(doc)
+    new()                       an empty document to copy pages into
+    copy_pages(dest, doc, pages)
+    save(doc, target, progress) write, unencrypted, to a path or file object
+                                (progress: percent callback, where the library has one)
+    render(doc, index, dpi)     one page as an RGB PIL image
+    text(doc, index)            one page's text
+    tables(doc, index)          one page's tables, as rows of cells
+
+Not every library can do everything (pikepdf cannot render, pdfplumber
+cannot write); ``operations`` lists the policy operations an engine is
+eligible for, and the rest raise NotImplementedError. Pages copied between
+documents must come from the same engine.
+"""
+
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, FrozenSet, List, Optional, Sequence, Union
+
+from app.utils.pdf_input import PdfInput
+
+if TYPE_CHECKING:
+    # The API process imports this module (via the policy) without Pillow
+    from PIL import Image
+
+# Operations the selection policy (app.engines.policy) picks an engine for
+OPERATIONS = ("merge", "split", "unlock", "render", "text", "tables")
+
+Table = List[List[Optional[str]]]
+
+
+class PasswordError(Exception):
+    """The PDF is encrypted and the password is missing or wrong."""
+
+
+class Engine:
+    name: str = ""
+    operations: FrozenSet[str] = frozenset()
+
+    def open(self, source: PdfInput, password: str = "") -> Any:
+        raise NotImplementedError
+
+    def page_count(self, doc: Any) -> int:
+        raise NotImplementedError
+
+    def new(self) -> Any:
+        raise NotImplementedError(f"{self.name} cannot create documents")
+
+    def copy_pages(self, dest: Any, doc: Any, pages: Sequence[int]) -> None:
+        raise NotImplementedError(f"{self.name} cannot copy pages")
+
+    def save(
+        self, doc: Any, target: Union[str, BinaryIO], progress: Optional[Callable[[int], None]] = None
+    ) -> None:
+        raise NotImplementedError(f"{self.name} cannot write PDFs")
+
+    def render(self, doc: Any, index: int, dpi: int) -> "Image.Image":
+        raise NotImplementedError(f"{self.name} cannot render pages")
+
+    def text(self, doc: Any, index: int) -> str:
+        raise NotImplementedError(f"{self.name} cannot extract text")
+
+    def tables(self, doc: Any, index: int) -> List[Table]:
+        raise NotImplementedError(f"{self.name} cannot extract tables")
@@ -0,0 +1,94 @@
+"""
+Engine-neutral PDF documents — what the services use.
+
+    with Document(pdf_path) as doc:
+        for i in range(doc.page_count("render")):
+            image = doc.render(i, dpi=200)
+
+    with Document(a) as first, Document(b) as second:
+        write_pages([(first, range(first.page_count("merge"))), (second, [0])], out_path, "merge")
+
+Each call names its operation, and the policy (``app.engines.policy``)
+picks the engine. A document is parsed at most once per engine: every
+operation that lands on the same engine — page count, then render; split
+into many parts — shares that one parse.
+"""
+
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+from app.engines.base import Engine, Table
+from app.engines.policy import engine_for
+from app.utils.pdf_input import PdfInput
+
+
+class Document:
+    """A session PDF, opened by each engine on first use."""
+
+    def __init__(self, path: str, password: str = ""):
+        self.path = path
+        self.password = password
+        self.source = PdfInput(path)
+        self._natives: Dict[str, Any] = {}
+
+    def native(self, engine: Engine) -> Any:
+        """*engine*'s own document object for this file (raises base.PasswordError)."""
+        doc = self._natives.get(engine.name)
+        if doc is None:
+            doc = self._natives[engine.name] = engine.open(self.source, self.password)
+        return doc
+
+    def page_count(self, op: str) -> int:
+        """Number of pages, counted by the engine that will run *op*."""
+        engine = engine_for(op)
+        return engine.page_count(self.native(engine))
+
+    def render(self, index: int, dpi: int) -> Image.Image:
+        engine = engine_for("render")
+        return engine.render(self.native(engine), index, dpi)
+
+    def text(self, index: int) -> str:
+        engine = engine_for("text")
+        return engine.text(self.native(engine), index)
+
+    def tables(self, index: int) -> List[Table]:
+        engine = engine_for("tables")
+        return engine.tables(self.native(engine), index)
+
+    def close(self) -> None:
+        self._natives.clear()
+        self.source.close()
+
+    def __enter__(self) -> "Document":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_pages(
+    parts: Iterable[Tuple[Document, Sequence[int]]],
+    target: Union[str, BinaryIO],
+    op: str,
+    progress: Optional[Callable[[int], None]] = None,
+) -> None:
+    """Write the given pages of each document, in order, as one new PDF (*op*: merge or split)."""
+    engine = engine_for(op)
+    dest = engine.new()
+    try:
+        for doc, pages in parts:
+            engine.copy_pages(dest, doc.native(engine), pages)
+        engine.save(dest, target, progress)
+    finally:
+        close = getattr(dest, "close", None)
+        if close is not None:
+            close()
+
+
+def save_unlocked(
+    doc: Document, target: Union[str, BinaryIO], progress: Optional[Callable[[int], None]] = None
+) -> None:
+    """Write *doc* (opened with its password) without encryption."""
+    engine = engine_for("unlock")
+    engine.save(doc.native(engine), target, progress)
@@ -0,0 +1,39 @@
+"""
+pdfplumber (pdfminer.six) adapter — text and tables, rendering through
+pypdfium2; read-only.
+"""
+
+from typing import List
+
+import pdfplumber
+from pdfminer.pdfdocument import PDFPasswordIncorrect
+from PIL import Image
+
+from app.engines.base import Engine, PasswordError, Table
+from app.utils.pdf_input import PdfInput
+
+
+class PdfplumberEngine(Engine):
+    name = "pdfplumber"
+    operations = frozenset({"render", "text", "tables"})
+
+    def open(self, source: PdfInput, password: str = "") -> pdfplumber.PDF:
+        try:
+            return source.pdfplumber(password=password)
+        except PDFPasswordIncorrect as exc:
+            raise PasswordError(str(exc)) from exc
+
+    def page_count(self, doc: pdfplumber.PDF) -> int:
+        return len(doc.pages)
+
+    def render(self, doc: pdfplumber.PDF, index: int, dpi: int) -> Image.Image:
+        return doc.pages[index].to_image(resolution=dpi).original.convert("RGB")
+
+    def text(self, doc: pdfplumber.PDF, index: int) -> str:
+        return doc.pages[index].extract_text() or ""
+
+    def tables(self, doc: pdfplumber.PDF, index: int) -> List[Table]:
+        return doc.pages[index].extract_tables()
+
+
+engine = PdfplumberEngine()
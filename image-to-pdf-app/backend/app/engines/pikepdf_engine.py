@@ -0,0 +1,39 @@
+"""
+pikepdf (qpdf) adapter — structural edits and writing; no rendering or text.
+"""
+
+from typing import Any, BinaryIO, Callable, Optional, Sequence, Union
+
+import pikepdf
+
+from app.engines.base import Engine, PasswordError
+from app.utils.pdf_input import PdfInput
+
+
+class PikepdfEngine(Engine):
+    name = "pikepdf"
+    operations = frozenset({"merge", "split", "unlock"})
+
+    def open(self, source: PdfInput, password: str = "") -> pikepdf.Pdf:
+        try:
+            return source.pikepdf(password=password)
+        except pikepdf.PasswordError as exc:
+            raise PasswordError(str(exc)) from exc
+
+    def page_count(self, doc: pikepdf.Pdf) -> int:
+        return len(doc.pages)
+
+    def new(self) -> pikepdf.Pdf:
+        return pikepdf.new()
+
+    def copy_pages(self, dest: pikepdf.Pdf, doc: pikepdf.Pdf, pages: Sequence[int]) -> None:
+        dest.pages.extend(doc.pages[i] for i in pages)
+
+    def save(
+        self, doc: Any, target: Union[str, BinaryIO], progress: Optional[Callable[[int], None]] = None
+    ) -> None:
+        # Without encryption= the document is written unencrypted
+        doc.save(target, progress=progress)
+
+
+engine = PikepdfEngine()
@@ -0,0 +1,123 @@
+"""
+Engine selection — which PDF library runs each operation.
+
+Every operation has a ranking of engines, fastest first. ``engine_for(op)``
+returns the first one that is installed and supports the operation, so a
+missing optional library only moves that operation down the list.
+
+WHERE THE RANKINGS COME FROM (later wins):
+
+  1. DEFAULT_POLICY below — measured with benchmarks/bench_engines.py
+  2. ENGINE_POLICY_FILE (default ``engine_policy.json``, if it exists) —
+     written by ``python -m benchmarks.bench_engines --write``, so a
+     deployment can re-measure on its own hardware and documents
+  3. ENGINE_POLICY (``"op=engine,op=engine"``) — pins one operation to an
+     engine, e.g. ``tables=pymupdf``
+
+Engines not named in a ranking still follow it, in DEFAULT_POLICY's order.
+Adapters are imported on first use (in the worker that needs them).
+"""
+
+import os
+import json
+import logging
+from importlib import import_module
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.engines.base import OPERATIONS, Engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ENGINE_MODULES: Dict[str, str] = {
+    "pikepdf": "app.engines.pikepdf_engine",
+    "pymupdf": "app.engines.pymupdf_engine",
+    "pypdf": "app.engines.pypdf_engine",
+    "pdfplumber": "app.engines.pdfplumber_engine",
+}
+
+# Fastest first — benchmarks/bench_engines.py, 40 mixed pages (text, ruled
+# table, photo), best of 5, in ms:
+#   merge   pymupdf 46, pikepdf 91, pypdf 325
+#   split   pymupdf 46, pikepdf 154, pypdf 243 (every page to its own file)
+#   unlock  pikepdf 46, pymupdf 82 (pypdf needs the cryptography package for AES)
+#   render  pymupdf 1190 (150 dpi)
+#   text    pymupdf 57, pypdf 484
+#   tables  pymupdf 1973
+# pdfplumber was not part of that run; it stays after PyMuPDF for render and
+# text, and first for tables: the engines split cells differently, and the
+# Excel export was built on pdfplumber's output.
+DEFAULT_POLICY: Dict[str, List[str]] = {
+    "merge": ["pymupdf", "pikepdf", "pypdf"],
+    "split": ["pymupdf", "pikepdf", "pypdf"],
+    "unlock": ["pikepdf", "pymupdf", "pypdf"],
+    "render": ["pymupdf", "pdfplumber"],
+    "text": ["pymupdf", "pdfplumber", "pypdf"],
+    "tables": ["pdfplumber", "pymupdf"],
+}
+
+ENGINE_POLICY_FILE = os.getenv("ENGINE_POLICY_FILE", "engine_policy.json")
+
+_engines: Dict[str, Optional[Engine]] = {}
+_chosen: Dict[str, Engine] = {}
+
+
+def _load_policy() -> Dict[str, List[str]]:
+    policy = {op: list(ranking) for op, ranking in DEFAULT_POLICY.items()}
+
+    try:
+        with open(ENGINE_POLICY_FILE) as f:
+            measured = json.load(f)
+    except FileNotFoundError:
+        measured = {}
+    except ValueError as exc:
+        logger.warning(f"Ignoring {ENGINE_POLICY_FILE}: {exc}")
+        measured = {}
+    for op, ranking in measured.items():
+        if op in policy and isinstance(ranking, list):
+            policy[op] = [e for e in ranking if e in ENGINE_MODULES] + [e for e in policy[op] if e not in ranking]
+
+    for pair in filter(None, os.getenv("ENGINE_POLICY", "").split(",")):
+        op, _, name = (part.strip() for part in pair.partition("="))
+        if op in policy and name in ENGINE_MODULES:
+            policy[op] = [name] + [e for e in policy[op] if e != name]
+        else:
+            logger.warning(f"Ignoring ENGINE_POLICY entry {pair!r}")
+    return policy
+
+
+POLICY = _load_policy()
+
+
+def get_engine(name: str) -> Optional[Engine]:
+    """The adapter for *name*, or None if its library is not installed."""
+    if name not in _engines:
+        try:
+            _engines[name] = import_module(ENGINE_MODULES[name]).engine
+        except ImportError as exc:
+            logger.warning(f"PDF engine {name} unavailable: {exc}")
+            _engines[name] = None
+    return _engines[name]
+
+
+def engine_for(op: str) -> Engine:
+    """The engine that runs *op* (one of base.OPERATIONS) in this process."""
+    engine = _chosen.get(op)
+    if engine is None:
+        for name in POLICY[op]:
+            candidate = get_engine(name)
+            if candidate is not None and op in candidate.operations:
+                engine = _chosen[op] = candidate
+                logger.info(f"PDF engine for {op}: {name}")
+                break
+        else:
+            raise RuntimeError(f"No installed PDF engine can {op} (tried {', '.join(POLICY[op])}).")
+    return engine
+
+
+def policy_report() -> Dict[str, List[str]]:
+    """Each operation's ranking, for diagnostics."""
+    return {op: POLICY[op] for op in OPERATIONS}
@@ -0,0 +1,65 @@
+"""
+PyMuPDF (MuPDF) adapter — everything: page copies, writing, rendering,
+text and tables.
+"""
+
+from typing import BinaryIO, Callable, List, Optional, Sequence, Union
+
+import fitz
+from PIL import Image
+
+from app.engines.base import Engine, PasswordError, Table
+from app.utils.pdf_input import PdfInput
+
+
+class PymupdfEngine(Engine):
+    name = "pymupdf"
+    operations = frozenset({"merge", "split", "unlock", "render", "text", "tables"})
+
+    def open(self, source: PdfInput, password: str = "") -> fitz.Document:
+        doc = source.fitz()
+        # Owner-password-only files open without needs_pass
+        if doc.needs_pass and not doc.authenticate(password):
+            raise PasswordError("Incorrect password.")
+        return doc
+
+    def page_count(self, doc: fitz.Document) -> int:
+        return doc.page_count
+
+    def new(self) -> fitz.Document:
+        return fitz.open()
+
+    def copy_pages(self, dest: fitz.Document, doc: fitz.Document, pages: Sequence[int]) -> None:
+        # insert_pdf copies a contiguous run at a time
+        run_start = previous = None
+        for i in pages:
+            if previous is not None and i == previous + 1:
+                previous = i
+                continue
+            if run_start is not None:
+                dest.insert_pdf(doc, from_page=run_start, to_page=previous)
+            run_start = previous = i
+        if run_start is not None:
+            dest.insert_pdf(doc, from_page=run_start, to_page=previous)
+
+    def save(
+        self, doc: fitz.Document, target: Union[str, BinaryIO], progress: Optional[Callable[[int], None]] = None
+    ) -> None:
+        # save() writes without encryption unless asked to keep it
+        if isinstance(target, str):
+            doc.save(target, garbage=1)
+        else:
+            target.write(doc.tobytes(garbage=1))
+
+    def render(self, doc: fitz.Document, index: int, dpi: int) -> Image.Image:
+        pix = doc[index].get_pixmap(dpi=dpi)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+    def text(self, doc: fitz.Document, index: int) -> str:
+        return doc[index].get_text()
+
+    def tables(self, doc: fitz.Document, index: int) -> List[Table]:
+        return [table.extract() for table in doc[index].find_tables().tables]
+
+
+engine = PymupdfEngine()
@@ -0,0 +1,49 @@
+"""
+pypdf adapter — pure Python: page copies, writing and text.
+"""
+
+from typing import Any, BinaryIO, Callable, Optional, Sequence, Union
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.errors import FileNotDecryptedError, WrongPasswordError
+
+from app.engines.base import Engine, PasswordError
+from app.utils.pdf_input import PdfInput
+
+
+class PypdfEngine(Engine):
+    name = "pypdf"
+    operations = frozenset({"merge", "split", "unlock", "text"})
+
+    def open(self, source: PdfInput, password: str = "") -> PdfReader:
+        # Decrypted here rather than by PdfReader(password=), which refuses unencrypted files
+        reader = source.pypdf()
+        try:
+            if reader.is_encrypted and not reader.decrypt(password):
+                raise PasswordError("Incorrect password.")
+        except (FileNotDecryptedError, WrongPasswordError) as exc:
+            raise PasswordError(str(exc)) from exc
+        return reader
+
+    def page_count(self, doc: Any) -> int:
+        return len(doc.pages)
+
+    def new(self) -> PdfWriter:
+        return PdfWriter()
+
+    def copy_pages(self, dest: PdfWriter, doc: PdfReader, pages: Sequence[int]) -> None:
+        for i in pages:
+            dest.add_page(doc.pages[i])
+
+    def save(
+        self, doc: Any, target: Union[str, BinaryIO], progress: Optional[Callable[[int], None]] = None
+    ) -> None:
+        if isinstance(doc, PdfReader):
+            doc = PdfWriter(clone_from=doc)   # a decrypted reader, written out plain
+        doc.write(target)
+
+    def text(self, doc: PdfReader, index: int) -> str:
+        return doc.pages[index].extract_text() or ""
+
+
+engine = PypdfEngine()
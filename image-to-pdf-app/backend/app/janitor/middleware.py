@@ -0,0 +1,46 @@
+"""
+Disk-pressure admission — rejects new work early when storage is short.
+
+A request that starts writing with the disk nearly full fails halfway
+through (and leaves a partial file behind). Instead, uploads and tool
+requests are refused up front with 503 + Retry-After when free space on
+TEMP_DIR's filesystem is below MIN_FREE_DISK_MB, or the last janitor sweep
+found TEMP_DIR over TEMP_QUOTA_MB. Reads, deletes and the analytics /
+system endpoints are always let through so clients can still download
+results and operators can see what is going on.
+"""
+
+import logging
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from app.janitor.sweeper import JANITOR_INTERVAL_S, under_pressure
+
+logger = logging.getLogger(__name__)
+
+ADMITTED_METHODS = ("POST", "PUT")
+EXEMPT_PREFIXES = ("/api/analytics", "/api/system")
+
+
+class DiskPressureMiddleware(BaseHTTPMiddleware):
+    """Return 503 for new work while disk space or the temp quota is exhausted."""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        path = request.url.path
+        if (
+            request.method not in ADMITTED_METHODS
+            or not path.startswith("/api/")
+            or path.startswith(EXEMPT_PREFIXES)
+        ):
+            return await call_next(request)
+
+        reason = under_pressure()
+        if reason is not None:
+            logger.warning(f"Rejected {request.method} {path}: {reason}")
+            return JSONResponse(
+                status_code=503,
+                content={"detail": f"{reason} Please try again shortly."},
+                headers={"Retry-After": str(int(JANITOR_INTERVAL_S))},
+            )
+        return await call_next(request)
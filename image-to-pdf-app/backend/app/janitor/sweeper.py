@@ -0,0 +1,254 @@
+"""
+Temp janitor — removes orphaned session directories and enforces quotas.
+
+Session directories are normally removed by the route's BackgroundTask once
+the response is sent. A worker that crashes or is OOM-killed mid-request
+never gets there, and its UUID directories stay in TEMP_DIR until the next
+clean shutdown — which may never come. The janitor sweeps every
+JANITOR_INTERVAL_S seconds (and once at startup):
+
+  1. Age: a session whose newest file is older than SESSION_MAX_AGE_S is
+     removed. No request runs that long, so it belongs to a dead worker.
+  2. Quota: if the session roots still hold more than TEMP_QUOTA_MB, the
+     least recently active sessions are removed until usage is under the
+     quota — but never one active in the last SESSION_MIN_AGE_S seconds.
+  3. Uploads: chunked uploads untouched for UPLOAD_MAX_AGE_S are removed.
+  4. Results: kept results past their RESULT_TTL_S are removed
+     (``app.utils.result_store``).
+
+Sessions created by this process and still in use are always skipped;
+sessions of other worker processes are protected by the minimum age.
+
+Only directories named like a session (32 hex chars) are touched, so a
+misconfigured TEMP_DIR cannot lose unrelated files.
+"""
+
+import os
+import re
+import time
+import shutil
+import asyncio
+import logging
+import threading
+from typing import List, NamedTuple, Optional
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.chunked_upload import UPLOAD_DIR, upload_store
+from app.utils.file_handler import TEMP_DIR, active_session_dirs, session_roots
+from app.utils.result_store import result_store
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JANITOR_INTERVAL_S = float(os.getenv("JANITOR_INTERVAL_S", "60"))
+SESSION_MAX_AGE_S = float(os.getenv("SESSION_MAX_AGE_S", "900"))
+SESSION_MIN_AGE_S = float(os.getenv("SESSION_MIN_AGE_S", "60"))
+UPLOAD_MAX_AGE_S = float(os.getenv("UPLOAD_MAX_AGE_S", "86400"))
+TEMP_QUOTA_BYTES = int(os.getenv("TEMP_QUOTA_MB", "1024")) * 1024 * 1024
+MIN_FREE_DISK_BYTES = int(os.getenv("MIN_FREE_DISK_MB", "500")) * 1024 * 1024
+
+_SESSION_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class SessionUsage(NamedTuple):
+    path: str
+    size: int
+    last_active: float   # newest mtime in the tree
+
+
+# Result of the last sweep — read by the admission middleware and /api/system
+_state_lock = threading.Lock()
+_state = {
+    "last_sweep": None,
+    "sweep_ms": None,
+    "sessions": 0,
+    "bytes": 0,
+    "evicted_age": 0,
+    "evicted_quota": 0,
+    "evicted_uploads": 0,
+    "expired_results": 0,
+}
+_sweep_lock = threading.Lock()
+_task: Optional[asyncio.Task] = None
+
+
+# ---------------------------------------------------------------------------
+# Measuring
+# ---------------------------------------------------------------------------
+
+def _measure(path: str) -> SessionUsage:
+    """Total size and newest mtime of everything under *path*."""
+    size, newest = 0, 0.0
+    for dirpath, _, filenames in os.walk(path):
+        try:
+            newest = max(newest, os.stat(dirpath).st_mtime)
+        except FileNotFoundError:
+            continue
+        for name in filenames:
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except FileNotFoundError:
+                continue
+            size += st.st_size
+            newest = max(newest, st.st_mtime)
+    return SessionUsage(path, size, newest)
+
+
+def scan_sessions() -> List[SessionUsage]:
+    """Every session directory in every session root."""
+    sessions = []
+    for root in session_roots():
+        try:
+            with os.scandir(root) as entries:
+                names = [e.path for e in entries if e.is_dir() and _SESSION_RE.match(e.name)]
+        except FileNotFoundError:
+            continue
+        sessions.extend(_measure(path) for path in names)
+    return sessions
+
+
+def disk_free() -> dict:
+    """Free / total bytes on the filesystem holding TEMP_DIR."""
+    try:
+        usage = shutil.disk_usage(TEMP_DIR)
+    except FileNotFoundError:
+        usage = shutil.disk_usage(".")
+    return {"free_bytes": usage.free, "total_bytes": usage.total, "min_free_bytes": MIN_FREE_DISK_BYTES}
+
+
+def under_pressure() -> Optional[str]:
+    """Reason new work should be refused right now, or None."""
+    if disk_free()["free_bytes"] < MIN_FREE_DISK_BYTES:
+        return "Server is low on disk space."
+    with _state_lock:
+        used = _state["bytes"]
+    if used >= TEMP_QUOTA_BYTES:
+        return "Server temp storage is full."
+    return None
+
+
+def usage() -> dict:
+    """Last sweep's numbers plus live disk figures."""
+    with _state_lock:
+        state = dict(_state)
+    return {
+        "temp_dir": {**state, "quota_bytes": TEMP_QUOTA_BYTES},
+        "disk": disk_free(),
+        "pressure": under_pressure(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Sweeping
+# ---------------------------------------------------------------------------
+
+def _remove(path: str) -> bool:
+    try:
+        shutil.rmtree(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as exc:
+        logger.warning(f"Janitor could not remove {path}: {exc}")
+        return False
+
+
+def _sweep_uploads(now: float) -> int:
+    removed = 0
+    try:
+        with os.scandir(UPLOAD_DIR) as entries:
+            upload_ids = [e.name for e in entries if e.is_dir() and _SESSION_RE.match(e.name)]
+    except FileNotFoundError:
+        return 0
+    for upload_id in upload_ids:
+        if now - _measure(os.path.join(UPLOAD_DIR, upload_id)).last_active > UPLOAD_MAX_AGE_S:
+            upload_store.delete(upload_id)
+            removed += 1
+    return removed
+
+
+def sweep() -> dict:
+    """Run one janitor pass; returns the updated usage."""
+    if not _sweep_lock.acquire(blocking=False):
+        return usage()   # a sweep is already running
+    try:
+        start = time.perf_counter()
+        now = time.time()
+        active = {os.path.basename(path) for path in active_session_dirs()}
+        evicted_age = evicted_quota = 0
+
+        kept = []
+        for session in scan_sessions():
+            if os.path.basename(session.path) in active:
+                kept.append(session)
+            elif now - session.last_active > SESSION_MAX_AGE_S:
+                if _remove(session.path):
+                    evicted_age += 1
+                    logger.info(f"🧹 Janitor removed stale session {os.path.basename(session.path)}")
+            else:
+                kept.append(session)
+
+        total = sum(s.size for s in kept)
+        if total > TEMP_QUOTA_BYTES:
+            for session in sorted(kept, key=lambda s: s.last_active):
+                if total <= TEMP_QUOTA_BYTES:
+                    break
+                if os.path.basename(session.path) in active or now - session.last_active < SESSION_MIN_AGE_S:
+                    continue
+                if _remove(session.path):
+                    total -= session.size
+                    kept.remove(session)
+                    evicted_quota += 1
+                    logger.info(f"🧹 Janitor evicted session {os.path.basename(session.path)} (over quota)")
+
+        evicted_uploads = _sweep_uploads(now)
+        expired_results = result_store.sweep(now)
+
+        with _state_lock:
+            _state["last_sweep"] = now
+            _state["sweep_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            _state["sessions"] = len(kept)
+            _state["bytes"] = total
+            _state["evicted_age"] += evicted_age
+            _state["evicted_quota"] += evicted_quota
+            _state["evicted_uploads"] += evicted_uploads
+            _state["expired_results"] += expired_results
+        if total > TEMP_QUOTA_BYTES:
+            logger.warning(f"Temp usage {total} bytes is over quota — sessions are too recent to evict.")
+    finally:
+        _sweep_lock.release()
+    return usage()
+
+
+# ---------------------------------------------------------------------------
+# Background loop
+# ---------------------------------------------------------------------------
+
+async def _run() -> None:
+    while True:
+        try:
+            await run_in_threadpool(sweep)
+        except Exception:
+            logger.exception("Janitor sweep failed")
+        await asyncio.sleep(JANITOR_INTERVAL_S)
+
+
+def start_janitor() -> None:
+    """Start the periodic sweep on the running event loop (first pass now)."""
+    global _task
+    if _task is None:
+        _task = asyncio.get_running_loop().create_task(_run())
+
+
+async def stop_janitor() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
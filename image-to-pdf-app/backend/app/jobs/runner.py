@@ -0,0 +1,231 @@
+"""
+Job runner — works through the job table in the background.
+
+JOB_CONCURRENCY runner tasks (default: total worker-pool size) each claim
+the oldest queued job and run it through ``execute_tool`` — the same
+admission and worker pools the synchronous routes use. Jobs wait in the
+admission queue instead of being rejected with 503; the table itself is
+the backlog.
+
+RESTARTS:
+A running job heartbeats every JOB_HEARTBEAT_S. Jobs whose heartbeat is
+older than JOB_STALE_S (the process died mid-job) are queued again, up to
+JOB_MAX_ATTEMPTS runs. Finished jobs and their files are deleted after
+JOB_TTL_S.
+
+CANCELLING:
+Only the process running a job touches its files. A job cancelled through
+another server process is stopped by its owner at the next heartbeat,
+which then removes the job directory; a queued one is removed at once.
+
+SECRETS:
+Passwords stay in this process's memory only. A password job that no
+running process holds the password for (the server restarted before it
+ran) fails after JOB_STALE_S with a request to resubmit.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.analytics.db import log_request
+from app.jobs import store
+from app.workers.executor import POOL_SIZES
+from app.workers.tools import SECRET_OPTIONS, execute_tool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", str(sum(POOL_SIZES.values()))))
+JOB_POLL_S = float(os.getenv("JOB_POLL_S", "1"))
+JOB_HEARTBEAT_S = float(os.getenv("JOB_HEARTBEAT_S", "10"))
+JOB_STALE_S = float(os.getenv("JOB_STALE_S", str(JOB_HEARTBEAT_S * 6)))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_TTL_S = float(os.getenv("JOB_TTL_S", "86400"))
+
+_secrets: Dict[str, Dict[str, str]] = {}   # job ID → secret options, never persisted
+_running: Dict[str, asyncio.Task] = {}     # job ID → task running it in this process
+_cancelled: Set[str] = set()               # running here, cancelled by the client
+_changed: Dict[str, asyncio.Event] = {}    # job ID → set when its status changes
+_wakeup: Optional[asyncio.Event] = None
+_tasks: List[asyncio.Task] = []
+
+
+def _notify(job_id: str) -> None:
+    event = _changed.pop(job_id, None)
+    if event is not None:
+        event.set()
+
+
+# ---------------------------------------------------------------------------
+# Submitting / waiting
+# ---------------------------------------------------------------------------
+
+async def submit(job_id: str, tool: str, inputs: List[str], options: Dict[str, Optional[str]]) -> store.Job:
+    """Queue *tool* on *inputs* (already saved in the job directory)."""
+    secrets = {k: v for k, v in options.items() if k in SECRET_OPTIONS and v is not None}
+    public = {k: v for k, v in options.items() if k not in SECRET_OPTIONS and v is not None}
+    if secrets:
+        _secrets[job_id] = secrets
+    job = await run_in_threadpool(store.insert_job, job_id, tool, inputs, public, bool(secrets))
+    if _wakeup is not None:
+        _wakeup.set()
+    return job
+
+
+async def wait_for_change(job_id: str, timeout: float) -> None:
+    """Return when *job_id* changes status in this process, or after *timeout*."""
+    event = _changed.setdefault(job_id, asyncio.Event())
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def cancel(job_id: str) -> bool:
+    """Cancel a queued or running job; False if it had already finished."""
+    previous = await run_in_threadpool(store.cancel_job, job_id)
+    if previous is None:
+        return False
+    _secrets.pop(job_id, None)
+    task = _running.get(job_id)
+    if task is not None:
+        # Interrupts the worker running it (executor.cancel_call)
+        _cancelled.add(job_id)
+        task.cancel()
+    elif previous == "queued":
+        store.remove_job_dir(job_id)
+    # Otherwise another process runs it: its next heartbeat sees the
+    # cancellation, stops the job and removes the directory
+    _notify(job_id)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+def _accept(job: store.Job) -> bool:
+    # Password jobs can only run in the process that holds the password
+    return not job.needs_secret or job.id in _secrets
+
+
+async def _run(job: store.Job) -> None:
+    options = {**job.options, **_secrets.pop(job.id, {})}
+    start = time.perf_counter()
+    status_code = 200
+    try:
+        result = await execute_tool(job.tool, job.inputs, job.dir, wait=True, progress=job.id, **options)
+        finished = await run_in_threadpool(
+            store.finish_job, job.id, "done", result.path, result.filename, result.media_type
+        )
+    except HTTPException as exc:
+        status_code = exc.status_code
+        finished = await run_in_threadpool(
+            store.finish_job, job.id, "failed", error=str(exc.detail), error_code=exc.status_code
+        )
+    except ValueError as exc:
+        status_code = 422
+        finished = await run_in_threadpool(
+            store.finish_job, job.id, "failed", error=str(exc), error_code=422
+        )
+    except Exception:
+        logger.exception(f"Job {job.id} ({job.tool}) failed")
+        status_code = 500
+        finished = await run_in_threadpool(
+            store.finish_job, job.id, "failed", error="Internal server error.", error_code=500
+        )
+
+    if not finished:
+        # Cancelled while it ran
+        store.remove_job_dir(job.id)
+        return
+    processing_ms = (time.perf_counter() - start) * 1000
+    await run_in_threadpool(log_request, job.tool, status_code, processing_ms, len(job.inputs))
+    logger.info(f"✅  Job {job.id} ({job.tool}) finished: {status_code} in {processing_ms:.0f} ms")
+
+
+async def _runner_loop() -> None:
+    while True:
+        try:
+            job = await run_in_threadpool(store.claim_job, _accept)
+        except Exception:
+            logger.exception("Could not claim a job")
+            job = None
+        if job is None:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), JOB_POLL_S)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        _notify(job.id)
+        _running[job.id] = asyncio.current_task()
+        try:
+            await _run(job)
+        except asyncio.CancelledError:
+            if job.id not in _cancelled:
+                raise   # shutting down — stop_runner puts the job back in the queue
+            _cancelled.discard(job.id)
+            store.remove_job_dir(job.id)
+        finally:
+            _running.pop(job.id, None)
+            _notify(job.id)
+
+
+async def _maintenance_loop() -> None:
+    while True:
+        try:
+            for job_id in await run_in_threadpool(store.touch_jobs, list(_running)):
+                # Cancelled through another process
+                task = _running.get(job_id)
+                if task is not None and job_id not in _cancelled:
+                    logger.info(f"Job {job_id} was cancelled elsewhere; stopping it")
+                    _cancelled.add(job_id)
+                    task.cancel()
+            now = time.time()
+            if await run_in_threadpool(store.requeue_stale_jobs, now - JOB_STALE_S, JOB_MAX_ATTEMPTS):
+                _wakeup.set()
+            orphaned = await run_in_threadpool(store.queued_secret_jobs, now - JOB_STALE_S)
+            for job_id in orphaned:
+                if job_id not in _secrets:
+                    await run_in_threadpool(
+                        store.finish_job, job_id, "failed",
+                        error="Passwords are not kept across restarts; please resubmit.", error_code=410,
+                    )
+            expired = await run_in_threadpool(store.expire_jobs, now - JOB_TTL_S)
+            if expired:
+                logger.info(f"🧹  Expired {expired} finished jobs")
+        except Exception:
+            logger.exception("Job maintenance failed")
+        await asyncio.sleep(JOB_HEARTBEAT_S)
+
+
+def start_runner() -> None:
+    """Start the runner tasks (called from the app lifespan)."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    _tasks.append(asyncio.create_task(_maintenance_loop()))
+    for _ in range(JOB_CONCURRENCY):
+        _tasks.append(asyncio.create_task(_runner_loop()))
+    logger.info(f"Job runner started ({JOB_CONCURRENCY} concurrent jobs)")
+
+
+async def stop_runner() -> None:
+    """Stop the runner; jobs it was running go back in the queue for the next start."""
+    interrupted = list(_running)
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    if interrupted:
+        store.requeue_jobs(interrupted)
+        logger.info(f"Requeued {len(interrupted)} interrupted jobs")
@@ -0,0 +1,320 @@
+"""
+Job store — SQLite table of background jobs, next to the analytics DB.
+
+A job row records what to run (tool, input paths, options) and where it
+got to:
+
+    queued → running → done | failed
+        ↘ cancelled ↙
+
+Inputs and results live in JOBS_DIR/<job_id>/, outside TEMP_DIR, so both
+the table and the files survive a restart. Rows are claimed atomically
+(``UPDATE … WHERE status = 'queued'``), so several server processes can
+share one table.
+
+Secret options (the unlock password) are never written here — see
+``app.jobs.runner``.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.analytics.db import DB_PATH
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(os.path.dirname(DB_PATH), "jobs.db"))
+JOBS_DIR = os.getenv("JOBS_DIR", "jobs")
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class Job(NamedTuple):
+    id: str
+    tool: str
+    status: str
+    options: Dict[str, Any]
+    inputs: List[str]
+    needs_secret: bool
+    result_path: Optional[str]
+    result_name: Optional[str]
+    media_type: Optional[str]
+    error: Optional[str]
+    error_code: Optional[int]
+    attempts: int
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+    @property
+    def dir(self) -> str:
+        return job_dir(self.id)
+
+    def public(self) -> Dict[str, Any]:
+        """The job as returned by the API."""
+        return {
+            "job_id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result_url": f"/api/jobs/{self.id}/result" if self.status == "done" else None,
+        }
+
+
+def _row_to_job(row: sqlite3.Row) -> Job:
+    return Job(
+        row["id"], row["tool"], row["status"],
+        json.loads(row["options"]), json.loads(row["inputs"]), bool(row["needs_secret"]),
+        row["result_path"], row["result_name"], row["media_type"],
+        row["error"], row["error_code"], row["attempts"],
+        row["created_at"], row["started_at"], row["finished_at"],
+    )
+
+
+@contextmanager
+def get_db():
+    """Thread-safe SQLite connection context manager."""
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def init_jobs_db():
+    """Create the jobs table if it doesn't exist."""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    with get_db() as conn:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                tool TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                options TEXT NOT NULL DEFAULT '{}',
+                inputs TEXT NOT NULL DEFAULT '[]',
+                needs_secret INTEGER NOT NULL DEFAULT 0,
+                result_path TEXT,
+                result_name TEXT,
+                media_type TEXT,
+                error TEXT,
+                error_code INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                heartbeat REAL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+        """)
+    logger.info(f"✅  Jobs database initialized: {JOBS_DB_PATH}")
+
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+def job_dir(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def new_job_dir() -> Tuple[str, str]:
+    """Reserve a job ID and create its directory (inputs are saved there before insert)."""
+    job_id = uuid.uuid4().hex
+    path = job_dir(job_id)
+    os.makedirs(path)
+    return job_id, path
+
+
+def remove_job_dir(job_id: str) -> None:
+    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Rows
+# ---------------------------------------------------------------------------
+
+def insert_job(job_id: str, tool: str, inputs: List[str], options: Dict[str, Any], needs_secret: bool) -> Job:
+    with get_db() as conn:
+        conn.execute(
+            """INSERT INTO jobs (id, tool, options, inputs, needs_secret, created_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (job_id, tool, json.dumps(options), json.dumps(inputs), int(needs_secret), time.time()),
+        )
+    return get_job(job_id)
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    try:
+        uuid.UUID(hex=job_id)
+    except (TypeError, ValueError):
+        return None
+    with get_db() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def claim_job(accept: Callable[[Job], bool]) -> Optional[Job]:
+    """Mark the oldest queued job *accept* allows as running and return it."""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 50"
+        ).fetchall()
+        for row in rows:
+            job = _row_to_job(row)
+            if not accept(job):
+                continue
+            now = time.time()
+            claimed = conn.execute(
+                """UPDATE jobs SET status = 'running', started_at = ?, heartbeat = ?,
+                          attempts = attempts + 1
+                   WHERE id = ? AND status = 'queued'""",
+                (now, now, job.id),
+            ).rowcount
+            if claimed:
+                return job._replace(status="running", started_at=now, attempts=job.attempts + 1)
+    return None
+
+
+def touch_jobs(job_ids: List[str]) -> List[str]:
+    """
+    Heartbeat: the calling process is still working on *job_ids*. Returns
+    those that were cancelled meanwhile (possibly by another process).
+    """
+    if not job_ids:
+        return []
+    with get_db() as conn:
+        conn.executemany(
+            "UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = 'running'",
+            [(time.time(), job_id) for job_id in job_ids],
+        )
+        rows = conn.execute(
+            f"SELECT id FROM jobs WHERE status = 'cancelled' AND id IN ({', '.join('?' * len(job_ids))})",
+            job_ids,
+        ).fetchall()
+    return [row["id"] for row in rows]
+
+
+def finish_job(
+    job_id: str,
+    status: str,
+    result_path: Optional[str] = None,
+    result_name: Optional[str] = None,
+    media_type: Optional[str] = None,
+    error: Optional[str] = None,
+    error_code: Optional[int] = None,
+) -> bool:
+    """Record the outcome of a running job; False if it was cancelled meanwhile."""
+    with get_db() as conn:
+        return bool(conn.execute(
+            """UPDATE jobs SET status = ?, result_path = ?, result_name = ?, media_type = ?,
+                      error = ?, error_code = ?, finished_at = ?
+               WHERE id = ? AND status IN ('queued', 'running')""",
+            (status, result_path, result_name, media_type, error, error_code, time.time(), job_id),
+        ).rowcount)
+
+
+def cancel_job(job_id: str) -> Optional[str]:
+    """
+    Cancel a queued or running job. Returns the status it had ("queued" or
+    "running"), or None if it had already finished.
+    """
+    # Queued first: a job claimed in between is then cancelled as running
+    for status in ("queued", "running"):
+        with get_db() as conn:
+            if conn.execute(
+                """UPDATE jobs SET status = 'cancelled', error = 'Cancelled.', finished_at = ?
+                   WHERE id = ? AND status = ?""",
+                (time.time(), job_id, status),
+            ).rowcount:
+                return status
+    return None
+
+
+def delete_job(job_id: str) -> None:
+    with get_db() as conn:
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+    remove_job_dir(job_id)
+
+
+def requeue_stale_jobs(stale_before: float, max_attempts: int) -> int:
+    """
+    Put running jobs whose heartbeat stopped (their process died) back in the
+    queue — or fail them after *max_attempts*, in case the job itself is
+    what kills its worker.
+    """
+    with get_db() as conn:
+        failed = conn.execute(
+            """UPDATE jobs SET status = 'failed', error = 'The job stopped unexpectedly.',
+                      error_code = 500, finished_at = ?
+               WHERE status = 'running' AND heartbeat < ? AND attempts >= ?""",
+            (time.time(), stale_before, max_attempts),
+        ).rowcount
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND heartbeat < ?",
+            (stale_before,),
+        ).rowcount
+    if failed or requeued:
+        logger.warning(f"Recovered stale jobs: {requeued} requeued, {failed} failed")
+    return requeued
+
+
+def requeue_jobs(job_ids: List[str]) -> None:
+    """Put running jobs back in the queue (their process is shutting down)."""
+    with get_db() as conn:
+        conn.executemany(
+            "UPDATE jobs SET status = 'queued' WHERE id = ? AND status = 'running'",
+            [(job_id,) for job_id in job_ids],
+        )
+
+
+def queued_secret_jobs(created_before: float) -> List[str]:
+    """IDs of password jobs queued since before *created_before*."""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' AND needs_secret = 1 AND created_at < ?",
+            (created_before,),
+        ).fetchall()
+    return [row["id"] for row in rows]
+
+
+def expire_jobs(finished_before: float) -> int:
+    """Delete jobs (rows and files) that finished before *finished_before*."""
+    with get_db() as conn:
+        ids = [
+            row["id"] for row in conn.execute(
+                f"SELECT id FROM jobs WHERE status IN {FINISHED} AND finished_at < ?",
+                (finished_before,),
+            ).fetchall()
+        ]
+        conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in ids])
+    for job_id in ids:
+        remove_job_dir(job_id)
+    return len(ids)
+
+
+def job_counts() -> Dict[str, int]:
+    with get_db() as conn:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+    return {row["status"]: row["n"] for row in rows}
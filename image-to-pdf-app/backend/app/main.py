@@ -24,8 +24,21 @@ from app.routes.compress import router as compress_router
 from app.routes.unlock import router as unlock_router
 from app.routes.handwriting import router as handwriting_router
 from app.routes.analytics import router as analytics_router
+from app.routes.blobs import router as blobs_router
+from app.routes.uploads import router as uploads_router
+from app.routes.system import router as system_router
+from app.routes.jobs import router as jobs_router
+from app.routes.progress import router as progress_router
+from app.routes.batch import router as batch_router
+from app.routes.pipeline import router as pipeline_router
+from app.routes.results import router as results_router
 from app.analytics.db import init_db
 from app.analytics.middleware import AnalyticsMiddleware
+from app.jobs.runner import start_runner, stop_runner
+from app.jobs.store import init_jobs_db
+from app.janitor.middleware import DiskPressureMiddleware
+from app.janitor.sweeper import start_janitor, stop_janitor
+from app.workers.executor import PRELOAD_SERVICES, preload_services, shutdown_workers, start_workers
 from app.utils.file_handler import cleanup_temp_directory, ensure_temp_directory
 
 # ---------------------------------------------------------------------------
@@ -41,17 +54,28 @@ logger = logging.getLogger(__name__)
 
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
 
+# Services load on first use, unless preloading for a forking server (gunicorn --preload)
+if PRELOAD_SERVICES:
+    preload_services()
+
 
 # ---------------------------------------------------------------------------
 # Lifecycle (startup / shutdown)
 # ---------------------------------------------------------------------------
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Ensure temp directory exists on startup, init analytics DB."""
+    """Ensure temp directory exists on startup, init analytics/jobs DBs, start the janitor, workers and job runner."""
     ensure_temp_directory()
     init_db()
+    init_jobs_db()
+    start_janitor()
+    start_workers()
+    start_runner()
     logger.info("🚀  PDF Toolkit backend is starting …")
     yield
+    await stop_runner()
+    await stop_janitor()
+    shutdown_workers()
     cleanup_temp_directory()
     logger.info("🛑  Backend shutting down — temp files cleaned.")
 
@@ -73,8 +97,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Download tokens of kept results, and what a resuming client needs
+    expose_headers=["X-Result-Token", "X-Result-Url", "X-Result-Expires", "ETag", "Content-Range", "Accept-Ranges"],
 )
 
+# Disk-pressure admission — 503 for new work when disk / temp quota is exhausted
+app.add_middleware(DiskPressureMiddleware)
+
 # Analytics middleware — tracks every /api/* request
 app.add_middleware(AnalyticsMiddleware)
 
@@ -89,6 +118,14 @@ app.include_router(compress_router, prefix="/api")
 app.include_router(unlock_router, prefix="/api")
 app.include_router(handwriting_router, prefix="/api")
 app.include_router(analytics_router, prefix="/api")
+app.include_router(blobs_router, prefix="/api")
+app.include_router(uploads_router, prefix="/api")
+app.include_router(system_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+app.include_router(progress_router, prefix="/api")
+app.include_router(batch_router, prefix="/api")
+app.include_router(pipeline_router, prefix="/api")
+app.include_router(results_router, prefix="/api")
 
 
 # ---------------------------------------------------------------------------
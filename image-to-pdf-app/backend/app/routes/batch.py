@@ -0,0 +1,222 @@
+"""
+API route for running a single-file tool on many files at once.
+
+POST /api/batch/{tool} — tool: compress-pdf, unlock-pdf, pdf-to-word,
+pdf-to-excel or pdf-to-ppt. Takes the tool's usual options plus any number
+of ``files`` / ``file_hashes`` / ``upload_ids`` (up to BATCH_MAX_FILES),
+and returns a ZIP.
+
+FAN-OUT:
+Every file is a separate ``execute_tool`` call, so the files run in
+parallel across the tool's worker pool. At most that pool's worker count
+run (or wait for admission) at once, so one big batch cannot fill the
+admission queue ahead of everyone else.
+
+STREAMED ZIP:
+The response starts right away and each result is added to the archive as
+soon as its file finishes — in completion order, not upload order. A file
+that fails does not fail the batch: the last entry, ``manifest.json``,
+lists every input in upload order with its output name or its error
+(the status code and message the single-file route would have returned).
+The batch is cancelled, workers included, if the client disconnects.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app.analytics.db import log_request
+from app.utils.file_handler import (
+    PDF_TYPES,
+    cleanup_session_dir,
+    create_session_dir,
+    get_chunked_upload,
+    resolve_upload,
+    split_list,
+)
+from app.utils.zip_stream import ZipStream
+from app.workers.executor import POOL_SIZES, pool_for
+from app.workers.progress import close_channel, open_channel, publish
+from app.workers.tools import TOOL_SPECS, execute_tool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Batch"])
+
+BATCH_TOOLS = ("compress-pdf", "unlock-pdf", "pdf-to-word", "pdf-to-excel", "pdf-to-ppt")
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "50"))
+
+
+def _unique_name(name: str, taken: set) -> str:
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate.lower() in taken:
+        n += 1
+        candidate = f"{stem} ({n}){ext}"
+    taken.add(candidate.lower())
+    return candidate
+
+
+async def _run_one(
+    tool: str,
+    index: int,
+    pdf_path: str,
+    session_dir: str,
+    limit: asyncio.Semaphore,
+    options: Dict[str, Optional[str]],
+    timings: Dict[int, float],
+):
+    """Run *tool* on one input in its own directory (services name their scratch files per page, not per call)."""
+    work_dir = os.path.join(session_dir, f"out_{index}")
+    os.makedirs(work_dir, exist_ok=True)
+    async with limit:
+        start = time.perf_counter()
+        try:
+            return await execute_tool(tool, [pdf_path], work_dir, wait=True, **options)
+        finally:
+            timings[index] = (time.perf_counter() - start) * 1000
+
+
+@router.post("/batch/{tool}")
+async def batch_files(
+    tool: str,
+    files: List[UploadFile] = File(None),
+    file_hashes: Optional[str] = Form(None),
+    upload_ids: Optional[str] = Form(None),
+    quality: Optional[str] = Form("medium"),
+    password: Optional[str] = Form(""),
+    progress_id: Optional[str] = Form(None),
+):
+    if tool not in BATCH_TOOLS:
+        raise HTTPException(status_code=404, detail=f"Unknown batch tool: {tool}. Available: {', '.join(BATCH_TOOLS)}")
+
+    # (display name, resolve_upload kwargs) per input, in upload order
+    sources = [(file.filename or f"file_{i + 1}.pdf", {"file": file}) for i, file in enumerate(files or [])]
+    for file_hash in split_list(file_hashes):
+        sources.append((f"{file_hash.strip().lower()[:12]}.pdf", {"file_hash": file_hash}))
+    for upload_id in split_list(upload_ids):
+        try:
+            name = get_chunked_upload(upload_id).filename
+        except HTTPException:
+            name = None
+        sources.append((name or f"{upload_id}.pdf", {"upload_id": upload_id}))
+
+    if not sources:
+        raise HTTPException(status_code=400, detail="No files were uploaded.")
+    if len(sources) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files: at most {BATCH_MAX_FILES} per batch.")
+
+    if quality not in ("low", "medium", "high"):
+        quality = "medium"
+    given = {"quality": quality, "password": password or ""}
+    options = {name: given[name] for name in TOOL_SPECS[tool].options}
+
+    if progress_id is not None:
+        open_channel(progress_id, f"batch/{tool}")
+
+    session_dir = create_session_dir()
+    manifest: List[Dict[str, Any]] = [{"input": name} for name, _ in sources]
+
+    # Save / link every input now — the request body is gone once streaming starts
+    paths: Dict[int, str] = {}
+    try:
+        for index, (name, source) in enumerate(sources):
+            upload = source.get("file")
+            if upload is not None and not name.lower().endswith(".pdf"):
+                manifest[index].update(status="failed", error_code=400, error="Only PDF files are accepted.")
+                continue
+            try:
+                paths[index] = await resolve_upload(session_dir, PDF_TYPES, **source)
+            except HTTPException as exc:
+                manifest[index].update(status="failed", error_code=exc.status_code, error=str(exc.detail))
+    except BaseException:
+        cleanup_session_dir(session_dir)
+        if progress_id is not None:
+            close_channel(progress_id, "error", "Internal server error.")
+        raise
+
+    logger.info(f"Batch {tool}: {len(paths)} of {len(sources)} file(s) to process")
+    return StreamingResponse(
+        _stream_batch(tool, sources, paths, manifest, options, session_dir, progress_id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{tool}-batch.zip"'},
+    )
+
+
+async def _stream_batch(
+    tool: str,
+    sources: list,
+    paths: Dict[int, str],
+    manifest: List[Dict[str, Any]],
+    options: Dict[str, Optional[str]],
+    session_dir: str,
+    progress_id: Optional[str],
+):
+    """Yield the ZIP as files finish; always cancels what is left and removes the session directory."""
+    limit = asyncio.Semaphore(POOL_SIZES[pool_for(tool)])
+    timings: Dict[int, float] = {}
+    started = {
+        asyncio.ensure_future(_run_one(tool, index, path, session_dir, limit, options, timings)): index
+        for index, path in paths.items()
+    }
+    pending = set(started)
+    stream = ZipStream()
+    taken: set = {"manifest.json"}
+    finished = len(sources) - len(paths)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = started[task]
+                entry = manifest[index]
+                try:
+                    result = task.result()
+                except HTTPException as exc:
+                    entry.update(status="failed", error_code=exc.status_code, error=str(exc.detail))
+                except ValueError as exc:
+                    entry.update(status="failed", error_code=422, error=str(exc))
+                except Exception:
+                    logger.exception(f"Batch {tool} error on {entry['input']}")
+                    entry.update(status="failed", error_code=500, error="Internal server error.")
+                else:
+                    stem = os.path.splitext(os.path.basename(entry["input"]))[0]
+                    ext = os.path.splitext(result.path)[1]
+                    arcname = _unique_name(f"{stem}{ext}", taken)
+                    async for chunk in iterate_in_threadpool(stream.add_file(result.path, arcname)):
+                        yield chunk
+                    entry.update(status="done", output=arcname, bytes=os.path.getsize(result.path))
+
+                await run_in_threadpool(log_request, tool, entry.get("error_code", 200), timings.get(index, 0), 1)
+                finished += 1
+                if progress_id is not None:
+                    publish(progress_id, {"stage": "files", "current": finished, "total": len(sources)})
+
+        failed = sum(1 for entry in manifest if entry.get("status") == "failed")
+        summary = {"tool": tool, "files": manifest, "succeeded": len(sources) - failed, "failed": failed}
+        yield stream.add_bytes("manifest.json", json.dumps(summary, indent=2).encode())
+        yield stream.close()
+        logger.info(f"✅  Batch {tool} finished: {len(sources) - failed} done, {failed} failed")
+        if progress_id is not None:
+            close_channel(progress_id, "done")
+    finally:
+        if progress_id is not None:
+            close_channel(progress_id, "error", "Cancelled.")   # no-op once closed as done
+        # Not awaited here: after a disconnect this scope is cancelled, and
+        # the files must outlive the workers still writing them
+        asyncio.ensure_future(_cancel_and_cleanup(pending, session_dir))
+
+
+async def _cancel_and_cleanup(tasks: set, session_dir: str) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    cleanup_session_dir(session_dir)
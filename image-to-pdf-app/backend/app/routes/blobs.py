@@ -0,0 +1,49 @@
+"""
+API routes for the content-addressed upload store.
+POST /api/blobs        — upload a file once, returns its SHA-256 hash.
+GET  /api/blobs/{hash} — check whether a hash is still stored.
+
+Any tool route accepts ``file_hash`` (or ``file_hashes`` for convert / merge)
+in place of an upload. Clients can also hash files locally (SHA-256) and
+probe with GET before deciding whether to upload.
+"""
+
+import logging
+
+from fastapi import APIRouter, UploadFile, File, HTTPException
+
+from app.utils.blob_store import blob_store
+from app.utils.file_handler import (
+    IMAGE_TYPES,
+    PDF_TYPES,
+    create_session_dir,
+    cleanup_session_dir,
+    stream_upload,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Blobs"])
+
+
+@router.post("/blobs")
+async def upload_blob(file: UploadFile = File(...)):
+    """Store an image or PDF and return the hash to reference it by."""
+    session_dir = create_session_dir()
+    try:
+        saved = await stream_upload(file, session_dir, IMAGE_TYPES | PDF_TYPES)
+    finally:
+        # The store keeps its own link; the session copy is not needed
+        cleanup_session_dir(session_dir)
+
+    if blob_store.get(saved.digest) is None:
+        raise HTTPException(status_code=503, detail="Upload store is unavailable.")
+    return {"hash": saved.digest, "type": saved.kind, "size": saved.size}
+
+
+@router.get("/blobs/{file_hash}")
+async def get_blob(file_hash: str):
+    """Return metadata for a stored blob, 404 if it is unknown or evicted."""
+    blob = blob_store.get(file_hash.lower())
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Unknown file hash.")
+    return {"hash": blob.digest, "type": blob.kind, "size": blob.size, "refs": blob.refs}
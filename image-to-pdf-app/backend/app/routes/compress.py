@@ -6,12 +6,13 @@ POST /api/compress — accepts a PDF and quality level, returns compressed PDF.
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
 from fastapi.responses import FileResponse
 from starlette.background import BackgroundTask
 
-from app.utils.file_handler import create_session_dir, cleanup_session_dir, save_upload_file
-from app.services.compress_service import compress_pdf
+from app.utils.file_handler import PDF_TYPES, create_session_dir, cleanup_session_dir, resolve_upload
+from app.utils.result_store import keep_for_download
+from app.workers.tools import execute_tool
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Compress"])
@@ -19,10 +20,14 @@ router = APIRouter(tags=["Compress"])
 
 @router.post("/compress")
 async def compress_pdf_file(
-    file: UploadFile = File(...),
+    request: Request,
+    file: Optional[UploadFile] = File(None),
     quality: Optional[str] = Form("medium"),
+    file_hash: Optional[str] = Form(None),
+    upload_id: Optional[str] = Form(None),
+    progress_id: Optional[str] = Form(None),
 ):
-    if not file.filename or not file.filename.lower().endswith(".pdf"):
+    if file is not None and (not file.filename or not file.filename.lower().endswith(".pdf")):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
 
     if quality not in ("low", "medium", "high"):
@@ -31,15 +36,21 @@ async def compress_pdf_file(
     session_dir = create_session_dir()
 
     try:
-        pdf_path = await save_upload_file(file, session_dir)
-        result_path = compress_pdf(pdf_path, session_dir, quality=quality)
+        pdf_path = await resolve_upload(session_dir, PDF_TYPES, file, file_hash, upload_id)
+        result = await execute_tool(
+            "compress-pdf", [pdf_path], session_dir, quality=quality, request=request, progress=progress_id
+        )
 
         return FileResponse(
-            path=result_path,
-            media_type="application/pdf",
-            filename="compressed.pdf",
+            path=result.path,
+            media_type=result.media_type,
+            filename=result.filename,
+            headers=await keep_for_download(result.path, result.filename, result.media_type),
             background=BackgroundTask(cleanup_session_dir, session_dir),
         )
+    except HTTPException:
+        cleanup_session_dir(session_dir)
+        raise
     except ValueError as exc:
         cleanup_session_dir(session_dir)
         raise HTTPException(status_code=422, detail=str(exc))
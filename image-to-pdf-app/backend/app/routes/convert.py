@@ -4,58 +4,117 @@ POST /api/convert  — accepts multipart images, returns a PDF download.
 
 MULTI-USER ISOLATION:
 Every request creates its own UUID-based session directory.
-All uploaded images and the generated PDF live inside that directory.
-After the response is sent, a BackgroundTask cleans up the entire directory.
+All uploaded images live inside that directory.
+Once the PDF has been streamed, the entire directory is cleaned up.
 This means multiple users converting simultaneously never conflict.
+
+STREAMING RESPONSE:
+The PDF is sent with chunked transfer encoding as pages are produced, so the
+client starts receiving bytes before the last image has been processed.
+Page 1 is rendered before the response starts, so unreadable first images
+still get a proper 422; a failure on a later page aborts the stream.
+
+RESULT CACHE:
+The route streams, so it does not go through ``execute_tool``; it uses the
+result cache itself. A hit is sent as a plain file download without
+admission. A miss is copied to the session directory as it streams, and
+stored only if the stream ran to its end. Identical conversions running at
+the same time are not coalesced: each streams its own pages.
 """
 
 import os
+import uuid
 import logging
-from typing import List, Optional
+from itertools import chain
+from typing import Iterator, List, Optional
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from app.utils.file_handler import (
+    IMAGE_TYPES,
     validate_file_extension,
-    validate_file_size,
-    save_upload_file,
+    resolve_uploads,
     create_session_dir,
     cleanup_session_dir,
 )
-from app.services.pdf_service import images_to_pdf
+from app.utils.result_cache import result_cache
+from app.workers.admission import Ticket, admit
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Convert"])
 
+
+def _stream_and_cleanup(
+    first_chunk: bytes, chunks: Iterator[bytes], session_dir: str, ticket: Ticket, cache_key: Optional[str]
+) -> Iterator[bytes]:
+    """
+    Yield the PDF chunks, then free the budget and remove the session
+    directory — even on error. With a *cache_key*, a complete PDF is also
+    stored in the result cache.
+    """
+    copy = open(os.path.join(session_dir, f"{uuid.uuid4().hex}.pdf"), "wb") if cache_key else None
+    complete = False
+    try:
+        for chunk in chain((first_chunk,), chunks):
+            if copy is not None:
+                copy.write(chunk)
+            yield chunk
+        complete = True
+    finally:
+        ticket.release()
+        if copy is not None:
+            copy.close()
+            if complete:
+                result_cache.put(cache_key, copy.name)
+        cleanup_session_dir(session_dir)
+
+
 # ---------------------------------------------------------------------------
 # POST /api/convert
 # ---------------------------------------------------------------------------
 
 @router.post("/convert")
 async def convert_images_to_pdf(
-    files: List[UploadFile] = File(...),
+    files: List[UploadFile] = File(None),
     page_size: Optional[str] = Form("fit"),
+    color_mode: Optional[str] = Form("color"),
+    file_hashes: Optional[str] = Form(None),
+    upload_ids: Optional[str] = Form(None),
 ):
     """
     Accept multiple image uploads and return a single merged PDF.
     Each request is fully isolated via a unique session directory.
 
     Query params:
-      page_size  — "fit" (default), "a4", or "letter"
+      page_size   — "fit" (default), "a4", or "letter"
+      color_mode  — "color" (default), "gray", "bw", or "auto" (per-page detection)
+      file_hashes — comma-separated SHA-256 hashes of previously uploaded
+                    images, added after the uploaded files
+      upload_ids  — comma-separated IDs of finalized resumable uploads,
+                    added last
     """
+    # Pillow / NumPy load on the first conversion, not at startup (unless PRELOAD_SERVICES)
+    from app.services.pdf_service import COLOR_MODES, iter_images_to_pdf
 
     # --- Guard: no files ---------------------------------------------------
-    if not files:
+    files = files or []
+    if not files and not file_hashes and not upload_ids:
         raise HTTPException(status_code=400, detail="No files were uploaded.")
 
-    logger.info(f"Received {len(files)} file(s) for conversion (page_size={page_size}).")
+    if color_mode not in COLOR_MODES:
+        color_mode = "color"
+
+    logger.info(
+        f"Received {len(files)} file(s) for conversion "
+        f"(page_size={page_size}, color_mode={color_mode})."
+    )
 
     # --- Create isolated session directory for this request ----------------
     session_dir = create_session_dir()
-    saved_paths: List[str] = []
 
     try:
         # --- Validate & save each file ------------------------------------
@@ -65,29 +124,46 @@ async def convert_images_to_pdf(
                 raise HTTPException(
                     status_code=400,
                     detail=f"Invalid file type: {file.filename}. "
-                           f"Allowed: JPG, JPEG, PNG, BMP, GIF, WEBP, TIFF.",
+                           f"Allowed: JPG, JPEG, PNG, BMP, GIF, WEBP, TIFF, JP2.",
                 )
 
-            # Size check
-            if not await validate_file_size(file):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"File too large: {file.filename}. Max size is 10 MB per file.",
+        # Size and content (magic bytes) are checked while streaming to disk
+        saved_paths = await resolve_uploads(session_dir, IMAGE_TYPES, files, file_hashes, upload_ids)
+
+        # --- Same images and options converted before? ---------------------
+        cache_key = None
+        if result_cache.enabled:
+            options = {"page_size": page_size, "color_mode": color_mode}
+            cache_key = await run_in_threadpool(result_cache.key, "image-to-pdf", saved_paths, options)
+            cached = await run_in_threadpool(result_cache.link_into, cache_key, session_dir)
+            if cached is not None:
+                result_cache.hits += 1
+                logger.info(f"♻️  image-to-pdf: cached result {cache_key[:12]}…")
+                return FileResponse(
+                    path=cached,
+                    media_type="application/pdf",
+                    filename="converted.pdf",
+                    background=BackgroundTask(cleanup_session_dir, session_dir),
                 )
-
-            path = await save_upload_file(file, session_dir)
-            saved_paths.append(path)
-
-        # --- Convert to PDF -----------------------------------------------
-        pdf_path = images_to_pdf(saved_paths, session_dir, page_size=page_size)
-
-        # --- Return PDF as download ---------------------------------------
-        # BackgroundTask cleans up the entire session dir AFTER response is sent
-        return FileResponse(
-            path=pdf_path,
+            result_cache.misses += 1
+
+        # --- Wait for budget (held until the stream ends) ------------------
+        ticket = await admit("image-to-pdf", saved_paths)
+
+        # --- Convert to PDF (render page 1 up front) -----------------------
+        try:
+            chunks = iter_images_to_pdf(saved_paths, page_size=page_size, color_mode=color_mode)
+            first_chunk = await run_in_threadpool(next, chunks)
+        except BaseException:
+            ticket.release()
+            raise
+
+        # --- Stream PDF as download ---------------------------------------
+        # The session dir is cleaned up once the last chunk has been sent
+        return StreamingResponse(
+            _stream_and_cleanup(first_chunk, chunks, session_dir, ticket, cache_key),
             media_type="application/pdf",
-            filename="converted.pdf",
-            background=BackgroundTask(cleanup_session_dir, session_dir),
+            headers={"Content-Disposition": 'attachment; filename="converted.pdf"'},
         )
 
     except HTTPException:
@@ -0,0 +1,167 @@
+"""
+API routes for background jobs — every tool, without holding the request open.
+
+POST   /api/jobs/{tool}        — queue a job (same inputs/options as the tool's route), 202 with its ID
+GET    /api/jobs/{id}?wait=30  — status; with *wait*, long-polls until the status changes
+GET    /api/jobs/{id}/events   — Server-Sent Events: status, then progress until it finishes
+GET    /api/jobs/{id}/result   — download the result once the job is done (resumable: Range / If-Range)
+DELETE /api/jobs/{id}          — cancel a queued/running job, or delete a finished one
+"""
+
+import time
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.jobs import runner, store
+from app.utils.file_handler import resolve_uploads
+from app.utils.range_response import file_response, make_etag
+from app.workers.progress import SSE_HEADERS, sse, subscribe
+from app.workers.tools import TOOL_SPECS
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+MAX_WAIT_S = 60
+
+
+def _get_or_404(job_id: str) -> store.Job:
+    job = store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
+
+
+@router.post("/{tool}", status_code=202)
+async def submit_job(
+    tool: str,
+    files: List[UploadFile] = File(None),
+    file_hashes: Optional[str] = Form(None),
+    upload_ids: Optional[str] = Form(None),
+    page_size: Optional[str] = Form(None),
+    color_mode: Optional[str] = Form(None),
+    quality: Optional[str] = Form(None),
+    ranges: Optional[str] = Form(None),
+    password: Optional[str] = Form(None),
+    steps: Optional[str] = Form(None),
+):
+    """
+    Queue *tool* (an analytics tool name, e.g. ``compress-pdf``) on the
+    uploaded files, then any referenced by *file_hashes* / *upload_ids*.
+    Options the tool does not take are ignored.
+    """
+    spec = TOOL_SPECS.get(tool)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown tool: {tool}. Available: {', '.join(TOOL_SPECS)}")
+
+    job_id, job_dir = store.new_job_dir()
+    try:
+        inputs = await resolve_uploads(job_dir, spec.input_types, files, file_hashes, upload_ids)
+        if not inputs:
+            raise HTTPException(status_code=400, detail="No file was uploaded.")
+        if tool == "merge-pdf" and len(inputs) < 2:
+            raise HTTPException(status_code=400, detail="At least 2 PDF files are required.")
+        if not spec.multi and len(inputs) != 1:
+            raise HTTPException(status_code=400, detail=f"{tool} takes exactly one file.")
+
+        given = {
+            "page_size": page_size, "color_mode": color_mode, "quality": quality,
+            "ranges": ranges, "password": password, "steps": steps,
+        }
+        options = {name: given[name] for name in spec.options if given.get(name) is not None}
+        job = await runner.submit(job_id, tool, inputs, options)
+    except HTTPException:
+        store.remove_job_dir(job_id)
+        raise
+    except Exception:
+        logger.exception("Job submit error")
+        store.remove_job_dir(job_id)
+        raise HTTPException(status_code=500, detail="Internal server error while queueing the job.")
+
+    return {**job.public(), "status_url": f"/api/jobs/{job.id}"}
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str, wait: float = Query(0, ge=0, le=MAX_WAIT_S)):
+    """Job status. With *wait* > 0, returns as soon as the status changes (or after *wait* seconds)."""
+    job = await run_in_threadpool(_get_or_404, job_id)
+    deadline = time.monotonic() + wait
+    while job.status not in store.FINISHED and time.monotonic() < deadline:
+        # Events cover jobs run by this process; re-read at least every poll
+        # interval for jobs another process is running
+        await runner.wait_for_change(job_id, min(deadline - time.monotonic(), runner.JOB_POLL_S))
+        current = await run_in_threadpool(_get_or_404, job_id)
+        if current.status != job.status:
+            job = current
+            break
+    return job.public()
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    A "status" event (as ``GET /api/jobs/{id}``), then the job's progress
+    events (see ``GET /api/progress/{id}``), then a final "status" event.
+    Progress comes from the process running the job; for a job running
+    elsewhere only status changes are sent.
+    """
+    job = await run_in_threadpool(_get_or_404, job_id)
+
+    async def events():
+        current = job
+        yield sse("status", current.public())
+        if current.status in store.FINISHED:
+            return
+        async for kind, data in subscribe(job_id):
+            if kind == "progress":
+                yield sse(kind, data)
+            elif kind is None:
+                # Quiet — the job may be running in another process, or gone
+                latest = await run_in_threadpool(store.get_job, job_id)
+                if latest is None or latest.status in store.FINISHED:
+                    break
+                if latest.status != current.status:
+                    current = latest
+                    yield sse("status", current.public())
+                yield sse(kind, data)
+            else:
+                break
+        # The channel closes just before the job row is updated
+        latest = await run_in_threadpool(store.get_job, job_id)
+        if latest is not None and latest.status not in store.FINISHED:
+            await runner.wait_for_change(job_id, runner.JOB_POLL_S)
+            latest = await run_in_threadpool(store.get_job, job_id)
+        if latest is not None:
+            yield sse("status", latest.public())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.api_route("/{job_id}/result", methods=["GET", "HEAD"])
+async def job_result(job_id: str, request: Request):
+    job = await run_in_threadpool(_get_or_404, job_id)
+    if job.status == "done":
+        # A finished job's result never changes
+        etag = make_etag(job.id, job.finished_at)
+        try:
+            return file_response(request, job.result_path, job.result_name, job.media_type, etag, job.finished_at)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Job not found or expired.")
+    if job.status == "failed":
+        raise HTTPException(status_code=job.error_code or 500, detail=job.error)
+    if job.status == "cancelled":
+        raise HTTPException(status_code=410, detail="The job was cancelled.")
+    raise HTTPException(status_code=409, detail=f"The job is still {job.status}.")
+
+
+@router.delete("/{job_id}")
+async def delete_job(job_id: str):
+    """Cancel the job if it hasn't finished; otherwise delete it and its result."""
+    job = await run_in_threadpool(_get_or_404, job_id)
+    if job.status not in store.FINISHED and await runner.cancel(job_id):
+        return {"job_id": job_id, "status": "cancelled"}
+    await run_in_threadpool(store.delete_job, job_id)
+    return {"job_id": job_id, "status": "deleted"}
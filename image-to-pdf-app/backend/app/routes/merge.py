@@ -5,40 +5,59 @@ POST /api/merge — accepts multiple PDF uploads, returns merged PDF.
 
 import os
 import logging
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
 from fastapi.responses import FileResponse
 from starlette.background import BackgroundTask
 
-from app.utils.file_handler import create_session_dir, cleanup_session_dir, save_upload_file
-from app.services.merge_service import merge_pdfs
+from app.utils.file_handler import (
+    PDF_TYPES,
+    create_session_dir,
+    cleanup_session_dir,
+    resolve_uploads,
+    split_list,
+)
+from app.utils.result_store import keep_for_download
+from app.workers.tools import execute_tool
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Merge"])
 
 
 @router.post("/merge")
-async def merge_pdf_files(files: List[UploadFile] = File(...)):
-    if not files or len(files) < 2:
+async def merge_pdf_files(
+    request: Request,
+    files: List[UploadFile] = File(None),
+    file_hashes: Optional[str] = Form(None),
+    upload_ids: Optional[str] = Form(None),
+    progress_id: Optional[str] = Form(None),
+):
+    """
+    Merge the uploaded PDFs, then any referenced by *file_hashes* and
+    *upload_ids* (both comma-separated), in that order.
+    """
+    if len(files or []) + len(split_list(file_hashes)) + len(split_list(upload_ids)) < 2:
         raise HTTPException(status_code=400, detail="At least 2 PDF files are required.")
 
+    for file in files or []:
+        if not file.filename or not file.filename.lower().endswith(".pdf"):
+            raise HTTPException(status_code=400, detail=f"Invalid file: {file.filename}. Only PDF files are accepted.")
+
     session_dir = create_session_dir()
-    saved_paths = []
 
     try:
-        for file in files:
-            if not file.filename or not file.filename.lower().endswith(".pdf"):
-                raise HTTPException(status_code=400, detail=f"Invalid file: {file.filename}. Only PDF files are accepted.")
-            path = await save_upload_file(file, session_dir)
-            saved_paths.append(path)
+        saved_paths = await resolve_uploads(session_dir, PDF_TYPES, files, file_hashes, upload_ids)
 
-        pdf_path = merge_pdfs(saved_paths, session_dir)
+        result = await execute_tool(
+            "merge-pdf", saved_paths, session_dir, request=request, progress=progress_id
+        )
 
         return FileResponse(
-            path=pdf_path,
-            media_type="application/pdf",
-            filename="merged.pdf",
+            path=result.path,
+            media_type=result.media_type,
+            filename=result.filename,
+            headers=await keep_for_download(result.path, result.filename, result.media_type),
             background=BackgroundTask(cleanup_session_dir, session_dir),
         )
     except HTTPException:
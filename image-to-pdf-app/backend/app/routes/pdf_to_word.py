@@ -4,34 +4,49 @@ POST /api/pdf-to-word — accepts a PDF, returns a DOCX.
 """
 
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
 from fastapi.responses import FileResponse
 from starlette.background import BackgroundTask
 
-from app.utils.file_handler import create_session_dir, cleanup_session_dir, save_upload_file
-from app.services.word_service import pdf_to_word
+from app.utils.file_handler import PDF_TYPES, create_session_dir, cleanup_session_dir, resolve_upload
+from app.utils.result_store import keep_for_download
+from app.workers.tools import execute_tool
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["PDF to Word"])
 
 
 @router.post("/pdf-to-word")
-async def convert_pdf_to_word(file: UploadFile = File(...)):
-    if not file.filename or not file.filename.lower().endswith(".pdf"):
+async def convert_pdf_to_word(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    file_hash: Optional[str] = Form(None),
+    upload_id: Optional[str] = Form(None),
+    progress_id: Optional[str] = Form(None),
+):
+    if file is not None and (not file.filename or not file.filename.lower().endswith(".pdf")):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
 
     session_dir = create_session_dir()
 
     try:
-        pdf_path = await save_upload_file(file, session_dir)
-        docx_path = pdf_to_word(pdf_path, session_dir)
+        pdf_path = await resolve_upload(session_dir, PDF_TYPES, file, file_hash, upload_id)
+        result = await execute_tool(
+            "pdf-to-word", [pdf_path], session_dir, request=request, progress=progress_id
+        )
 
         return FileResponse(
-            path=docx_path,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            filename="converted.docx",
+            path=result.path,
+            media_type=result.media_type,
+            filename=result.filename,
+            headers=await keep_for_download(result.path, result.filename, result.media_type),
             background=BackgroundTask(cleanup_session_dir, session_dir),
         )
+    except HTTPException:
+        cleanup_session_dir(session_dir)
+        raise
     except ValueError as exc:
         cleanup_session_dir(session_dir)
         raise HTTPException(status_code=422, detail=str(exc))
@@ -0,0 +1,78 @@
+"""
+API route for chaining tools on one document.
+POST /api/pipeline — accepts images and/or PDFs plus a list of steps,
+returns the resulting PDF (or a ZIP of parts when the last step is split).
+
+    steps = [{"op": "merge"}, {"op": "compress", "quality": "medium"}, {"op": "split", "ranges": "1-3,4-6"}]
+
+Steps: convert (page_size, color_mode), unlock (uses the password field),
+merge, compress (quality), split (ranges; last step only). The document is
+kept open between steps and written once — see
+app/services/pipeline_service.py.
+"""
+
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+
+from app.utils.file_handler import (
+    IMAGE_TYPES,
+    PDF_TYPES,
+    create_session_dir,
+    cleanup_session_dir,
+    resolve_uploads,
+)
+from app.utils.result_store import keep_for_download
+from app.workers.tools import execute_tool
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Pipeline"])
+
+
+@router.post("/pipeline")
+async def run_pipeline(
+    request: Request,
+    steps: str = Form(...),
+    files: List[UploadFile] = File(None),
+    file_hashes: Optional[str] = Form(None),
+    upload_ids: Optional[str] = Form(None),
+    password: Optional[str] = Form(""),
+    progress_id: Optional[str] = Form(None),
+):
+    """
+    Run *steps* (a JSON list) on the uploaded files, then any referenced by
+    *file_hashes* and *upload_ids* (both comma-separated), in that order.
+    """
+    if not files and not file_hashes and not upload_ids:
+        raise HTTPException(status_code=400, detail="No files were uploaded.")
+
+    session_dir = create_session_dir()
+
+    try:
+        saved_paths = await resolve_uploads(session_dir, IMAGE_TYPES | PDF_TYPES, files, file_hashes, upload_ids)
+
+        result = await execute_tool(
+            "pipeline", saved_paths, session_dir, steps=steps, password=password or "",
+            request=request, progress=progress_id,
+        )
+
+        return FileResponse(
+            path=result.path,
+            media_type=result.media_type,
+            filename=result.filename,
+            headers=await keep_for_download(result.path, result.filename, result.media_type),
+            background=BackgroundTask(cleanup_session_dir, session_dir),
+        )
+    except HTTPException:
+        cleanup_session_dir(session_dir)
+        raise
+    except ValueError as exc:
+        cleanup_session_dir(session_dir)
+        raise HTTPException(status_code=422, detail=str(exc))
+    except Exception as exc:
+        logger.exception("Pipeline error")
+        cleanup_session_dir(session_dir)
+        raise HTTPException(status_code=500, detail="Internal server error while running the pipeline.")
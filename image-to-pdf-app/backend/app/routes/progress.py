@@ -0,0 +1,33 @@
+"""
+API route for following a tool request's progress.
+
+GET /api/progress/{progress_id} → Server-Sent Events for the tool request
+sent with that ``progress_id`` form field. Subscribe before or after
+sending it: past events are replayed. Events:
+
+    event: progress   {"stage": "transcribe", "current": 3, "total": 12, "elapsed_ms": 5120}
+    event: done       {"status": "done", "stages": {"queued": 2, "running": 8410}, ...}
+    event: error      {"status": "error", "detail": "...", "stages": {...}, ...}
+
+The stream ends after "done" / "error". Background jobs have their own
+stream: GET /api/jobs/{id}/events.
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.workers.progress import SSE_HEADERS, sse, subscribe, valid_channel
+
+router = APIRouter(prefix="/progress", tags=["Progress"])
+
+
+@router.get("/{progress_id}")
+async def progress_events(progress_id: str):
+    if not valid_channel(progress_id):
+        raise HTTPException(status_code=400, detail="Invalid progress_id — use 8-64 letters, digits, '-' or '_'.")
+
+    async def events():
+        async for kind, data in subscribe(progress_id):
+            yield sse(kind, data)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,47 @@
+"""
+API routes for kept tool results (see ``app.utils.result_store``).
+GET    /api/results/{token} — download the result; supports Range / If-Range / ETag
+HEAD   /api/results/{token} — size and validators, without the body
+DELETE /api/results/{token} — drop it before it expires
+
+Every tool route that returns a file also keeps it for RESULT_TTL_S and
+sends ``X-Result-Token`` / ``X-Result-Url`` / ``X-Result-Expires`` (Unix
+time). A download cut off halfway resumes from here with
+``Range: bytes=N-`` and ``If-Range: <ETag>`` — no re-upload, no recompute.
+"""
+
+import time
+import logging
+
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.range_response import file_response, make_etag
+from app.utils.result_store import result_store
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Results"])
+
+
+@router.api_route("/results/{token}", methods=["GET", "HEAD"])
+async def download_result(token: str, request: Request):
+    kept = await run_in_threadpool(result_store.get, token)
+    if kept is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired result token.")
+    remaining = max(int(kept.expires_at - time.time()), 0)
+    try:
+        return file_response(
+            request, kept.path, kept.filename, kept.media_type,
+            etag=make_etag(kept.token),
+            last_modified=kept.created_at,
+            headers={"Cache-Control": f"private, max-age={remaining}", "X-Result-Expires": str(int(kept.expires_at))},
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Unknown or expired result token.")
+
+
+@router.delete("/results/{token}")
+async def delete_result(token: str):
+    if not await run_in_threadpool(result_store.delete, token):
+        raise HTTPException(status_code=404, detail="Unknown or expired result token.")
+    return {"token": token, "deleted": True}
@@ -7,12 +7,13 @@ import os
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
 from fastapi.responses import FileResponse
 from starlette.background import BackgroundTask
 
-from app.utils.file_handler import create_session_dir, cleanup_session_dir, save_upload_file
-from app.services.split_service import split_pdf
+from app.utils.file_handler import PDF_TYPES, create_session_dir, cleanup_session_dir, resolve_upload
+from app.utils.result_store import keep_for_download
+from app.workers.tools import execute_tool
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Split"])
@@ -20,25 +21,29 @@ router = APIRouter(tags=["Split"])
 
 @router.post("/split")
 async def split_pdf_file(
-    file: UploadFile = File(...),
+    request: Request,
+    file: Optional[UploadFile] = File(None),
     ranges: Optional[str] = Form(None),
+    file_hash: Optional[str] = Form(None),
+    upload_id: Optional[str] = Form(None),
+    progress_id: Optional[str] = Form(None),
 ):
-    if not file.filename or not file.filename.lower().endswith(".pdf"):
+    if file is not None and (not file.filename or not file.filename.lower().endswith(".pdf")):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted.")
 
     session_dir = create_session_dir()
 
     try:
-        pdf_path = await save_upload_file(file, session_dir)
-        result_path = split_pdf(pdf_path, session_dir, ranges=ranges)
-
-        media_type = "application/pdf" if result_path.endswith(".pdf") else "application/zip"
-        filename = "split.pdf" if result_path.endswith(".pdf") else "split_pages.zip"
+        pdf_path = await resolve_upload(session_dir, PDF_TYPES, file, file_hash, upload_id)
+        result = await execute_tool(
+            "split-pdf", [pdf_path], session_dir, ranges=ranges, request=request, progress=progress_id
+        )
 
         return FileResponse(
-            path=result_path,
-            media_type=media_type,
-            filename=filename,
+            path=result.path,
+            media_type=result.media_type,
+            filename=result.filename,
+            headers=await keep_for_download(result.path, result.filename, result.media_type),
             background=BackgroundTask(cleanup_session_dir, session_dir),
         )
     except HTTPException:
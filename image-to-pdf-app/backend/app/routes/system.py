@@ -0,0 +1,57 @@
+"""
+System route — storage usage for operators.
+
+GET /api/system/storage → temp dir usage vs quota, free disk, blob store,
+result cache (with hit / miss ratios), kept results, chunked uploads, and
+janitor counters.
+GET /api/system/workers → worker pools, running calls, tool assignment,
+                           admission budget and queue depth, PDF engine rankings.
+"""
+
+import os
+
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+
+from app.engines.policy import policy_report
+from app.janitor.sweeper import usage
+from app.utils.blob_store import blob_store
+from app.utils.chunked_upload import UPLOAD_DIR
+from app.utils.result_cache import result_cache
+from app.utils.result_store import result_store
+from app.workers.admission import admission_stats
+from app.workers.executor import worker_stats
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+def _dir_bytes(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.stat(os.path.join(dirpath, name)).st_blocks * 512
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def _storage() -> dict:
+    report = usage()
+    report["blob_store"] = blob_store.usage()
+    report["result_cache"] = result_cache.usage()
+    report["results"] = result_store.usage()
+    report["uploads"] = {"bytes": _dir_bytes(UPLOAD_DIR)}
+    return report
+
+
+@router.get("/storage")
+async def storage():
+    """Current storage usage and the janitor's last sweep."""
+    return await run_in_threadpool(_storage)
+
+
+@router.get("/workers")
+async def workers():
+    """Worker pool sizes and load, admission budget and queue, engine rankings."""
+    return {**worker_stats(), "admission": admission_stats(), "engines": policy_report()}
@@ -0,0 +1,89 @@
+"""
+API routes for resumable chunked uploads.
+POST   /api/uploads                      — start an upload (filename, size)
+PUT    /api/uploads/{upload_id}?offset=N — write the request body at byte N
+GET    /api/uploads/{upload_id}          — received / missing byte ranges
+POST   /api/uploads/{upload_id}/finalize — verify, hash and seal the upload
+DELETE /api/uploads/{upload_id}          — abandon the upload
+
+Chunks may be sent in any order and in parallel. After a dropped
+connection the client asks GET for the missing ranges and re-sends only
+those. Every tool route accepts the finalized ``upload_id`` (or
+``upload_ids`` for convert / merge) in place of a multipart file.
+"""
+
+import logging
+
+from fastapi import APIRouter, HTTPException, Form, Query, Request
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.chunked_upload import UploadBusy, upload_store
+from app.utils.file_handler import (
+    MAX_FILE_SIZE_BYTES,
+    MAX_FILE_SIZE_MB,
+    finalize_chunked_upload,
+    get_chunked_upload,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Uploads"])
+
+# Suggested chunk size — small enough to retry cheaply on a mobile link
+CHUNK_SIZE = 1024 * 1024
+
+
+def _status(upload_id: str) -> dict:
+    info = get_chunked_upload(upload_id)
+    missing = upload_store.missing(info)
+    return {
+        "upload_id": info.upload_id,
+        "filename": info.filename,
+        "size": info.size,
+        "received": info.size - sum(end - start for start, end in missing),
+        "missing": [[start, end] for start, end in missing],
+        "finalized": info.digest is not None,
+        "hash": info.digest,
+    }
+
+
+@router.post("/uploads")
+async def start_upload(filename: str = Form(...), size: int = Form(...)):
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="Upload size must be positive.")
+    if size > MAX_FILE_SIZE_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large: {filename}. Max size is {MAX_FILE_SIZE_MB} MB per file.",
+        )
+    upload_id = upload_store.create(filename, size)
+    return {"upload_id": upload_id, "chunk_size": CHUNK_SIZE}
+
+
+@router.put("/uploads/{upload_id}")
+async def put_chunk(request: Request, upload_id: str, offset: int = Query(..., ge=0)):
+    info = get_chunked_upload(upload_id)
+    try:
+        written = await upload_store.write_chunk(info, offset, request.stream())
+    except UploadBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=416, detail=str(exc))
+    return {"offset": offset, "written": written}
+
+
+@router.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    return _status(upload_id)
+
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str):
+    info = await run_in_threadpool(finalize_chunked_upload, upload_id)
+    return {"upload_id": info.upload_id, "hash": info.digest, "type": info.kind, "size": info.size}
+
+
+@router.delete("/uploads/{upload_id}")
+async def delete_upload(upload_id: str):
+    get_chunked_upload(upload_id)
+    upload_store.delete(upload_id)
+    return {"deleted": upload_id}
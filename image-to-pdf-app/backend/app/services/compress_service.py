@@ -8,6 +8,9 @@ import logging
 
 import pikepdf
 
+from app.utils.pdf_input import PdfInput
+from app.utils.progress import report
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,30 +24,11 @@ def compress_pdf(pdf_path: str, session_dir: str, quality: str = "medium") -> st
     output_filename = f"{uuid.uuid4().hex}_compressed.pdf"
     output_path = os.path.join(session_dir, output_filename)
 
-    # Map quality to pikepdf stream decode level
-    stream_decode = {
-        "low": pikepdf.ObjectStreamMode.generate,
-        "medium": pikepdf.ObjectStreamMode.generate,
-        "high": pikepdf.ObjectStreamMode.preserve,
-    }.get(quality, pikepdf.ObjectStreamMode.generate)
-
     try:
-        with pikepdf.open(pdf_path) as pdf:
-            # Recompress images within the PDF
-            if quality in ("low", "medium"):
-                _compress_images(pdf, quality)
-
-            # Remove metadata to save space
-            if quality == "low":
-                pdf.docinfo.clear()
-
-            pdf.save(
-                output_path,
-                object_stream_mode=stream_decode,
-                compress_streams=True,
-                recompress_flate=True,
-                linearize=True,
-            )
+        with PdfInput(pdf_path) as source:
+            pdf = source.pikepdf()
+            save_options = compress_document(pdf, quality)
+            pdf.save(output_path, **save_options, progress=lambda percent: report("save", percent, 100))
     except Exception as exc:
         logger.error(f"Failed to compress PDF: {exc}")
         raise ValueError(f"PDF compression failed: {exc}") from exc
@@ -60,6 +44,34 @@ def compress_pdf(pdf_path: str, session_dir: str, quality: str = "medium") -> st
     return output_path
 
 
+def compress_document(pdf: pikepdf.Pdf, quality: str) -> dict:
+    """
+    Compress an open document in place; returns the ``Pdf.save()`` options
+    that finish the job. Shared with the pipeline service.
+    """
+    # Map quality to pikepdf stream decode level
+    stream_decode = {
+        "low": pikepdf.ObjectStreamMode.generate,
+        "medium": pikepdf.ObjectStreamMode.generate,
+        "high": pikepdf.ObjectStreamMode.preserve,
+    }.get(quality, pikepdf.ObjectStreamMode.generate)
+
+    # Recompress images within the PDF
+    if quality in ("low", "medium"):
+        _compress_images(pdf, quality)
+
+    # Remove metadata to save space
+    if quality == "low":
+        del pdf.docinfo
+
+    return {
+        "object_stream_mode": stream_decode,
+        "compress_streams": True,
+        "recompress_flate": True,
+        "linearize": True,
+    }
+
+
 def _compress_images(pdf: pikepdf.Pdf, quality: str) -> None:
     """Walk through PDF objects and recompress images."""
     from PIL import Image as PILImage
@@ -67,7 +79,9 @@ def _compress_images(pdf: pikepdf.Pdf, quality: str) -> None:
 
     jpeg_quality = 40 if quality == "low" else 65
 
-    for page in pdf.pages:
+    total = len(pdf.pages)
+    for page_number, page in enumerate(pdf.pages, start=1):
+        report("recompress", page_number, total)
         try:
             resources = page.get("/Resources", {})
             xobjects = resources.get("/XObject", {})
@@ -6,9 +6,11 @@ import os
 import uuid
 import logging
 
-import pdfplumber
 from openpyxl import Workbook
 
+from app.engines.document import Document
+from app.utils.progress import report
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,9 +30,11 @@ def pdf_to_excel(pdf_path: str, session_dir: str) -> str:
     tables_found = 0
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                tables = page.extract_tables()
+        with Document(pdf_path) as doc:
+            page_count = doc.page_count("tables")
+            for page_num in range(1, page_count + 1):
+                report("extract", page_num, page_count, tables=tables_found)
+                tables = doc.tables(page_num - 1)
                 if not tables:
                     continue
 
@@ -60,6 +64,7 @@ def pdf_to_excel(pdf_path: str, session_dir: str) -> str:
         ws.append(["Try a PDF that contains tabular data."])
         logger.warning("No tables found in the uploaded PDF.")
 
+    report("save")
     wb.save(xlsx_path)
 
     file_size = os.path.getsize(xlsx_path)
@@ -2,7 +2,7 @@
 Handwritten Notes to PDF Service — extracts handwritten content from PDF pages
 using GPT-4o Vision and compiles clean LaTeX output into a typeset PDF.
 
-Pipeline: PDF → images (PyMuPDF) → GPT-4o Vision → LaTeX → pdflatex → PDF
+Pipeline: PDF → images (render engine) → GPT-4o Vision → LaTeX → pdflatex → PDF
 """
 
 import os
@@ -11,22 +11,25 @@ import base64
 import logging
 import subprocess
 
-import fitz  # PyMuPDF — no Poppler dependency needed
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from app.engines.document import Document
+from app.utils.progress import report
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+PDFLATEX_TIMEOUT_S = float(os.getenv("PDFLATEX_TIMEOUT_S", "60"))
 
 
 def handwritten_notes_to_pdf(pdf_path: str, session_dir: str) -> str:
     """
     Convert handwritten notes in a PDF to a clean, typeset PDF.
 
-    1. Render each PDF page to a PNG via PyMuPDF
+    1. Render each PDF page to a PNG
     2. Send each image to GPT-4o Vision to extract LaTeX code
     3. Compile the combined LaTeX into a PDF with pdflatex
     """
@@ -41,11 +44,13 @@ def handwritten_notes_to_pdf(pdf_path: str, session_dir: str) -> str:
     # --- Step 2: Images → LaTeX via GPT-4o Vision ---
     latex_sections = []
     for idx, img_path in enumerate(image_paths):
+        report("transcribe", idx + 1, len(image_paths))
         latex_code = _extract_latex_from_image(client, img_path, idx + 1)
         latex_sections.append(latex_code)
         logger.info(f"Extracted LaTeX from page {idx + 1}/{len(image_paths)}")
 
     # --- Step 3: Compile LaTeX → PDF ---
+    report("compile")
     output_path = _compile_latex_to_pdf(latex_sections, session_dir)
 
     file_size = os.path.getsize(output_path)
@@ -57,25 +62,26 @@ def handwritten_notes_to_pdf(pdf_path: str, session_dir: str) -> str:
 
 
 def _pdf_to_images(pdf_path: str, session_dir: str) -> list[str]:
-    """Render every PDF page to a high-res PNG using PyMuPDF."""
-    try:
-        doc = fitz.open(pdf_path)
-    except Exception as exc:
-        logger.error(f"Failed to open PDF: {exc}")
-        raise ValueError(f"Could not open PDF: {exc}") from exc
+    """Render every PDF page to a high-res PNG."""
+    with Document(pdf_path) as doc:
+        try:
+            page_count = doc.page_count("render")
+        except Exception as exc:
+            logger.error(f"Failed to open PDF: {exc}")
+            raise ValueError(f"Could not open PDF: {exc}") from exc
+
+        if page_count == 0:
+            raise ValueError("The PDF has no pages.")
+
+        image_paths = []
+        for page_num in range(page_count):
+            report("render", page_num + 1, page_count)
+            img = doc.render(page_num, dpi=300)
+            img_path = os.path.join(session_dir, f"page_{page_num}.png")
+            img.save(img_path, "PNG")
+            img.close()
+            image_paths.append(img_path)
 
-    if len(doc) == 0:
-        raise ValueError("The PDF has no pages.")
-
-    image_paths = []
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        pix = page.get_pixmap(dpi=300)
-        img_path = os.path.join(session_dir, f"page_{page_num}.png")
-        pix.save(img_path)
-        image_paths.append(img_path)
-
-    doc.close()
     logger.info(f"Converted PDF to {len(image_paths)} page image(s)")
     return image_paths
 
@@ -212,12 +218,17 @@ def _compile_with_raw_latex(latex_sections: list, session_dir: str, output_filen
         f.write(tex_content)
 
     for _ in range(2):
-        result = subprocess.run(
-            ["pdflatex", "-interaction=nonstopmode", "-output-directory", session_dir, tex_path],
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
+        try:
+            result = subprocess.run(
+                ["pdflatex", "-interaction=nonstopmode", "-output-directory", session_dir, tex_path],
+                capture_output=True,
+                text=True,
+                timeout=PDFLATEX_TIMEOUT_S,
+            )
+        except subprocess.TimeoutExpired as exc:
+            raise ValueError(
+                f"LaTeX compilation did not finish within {PDFLATEX_TIMEOUT_S:g} s."
+            ) from exc
         if result.returncode != 0:
             logger.warning(f"pdflatex warnings/errors: {result.stderr[:500]}")
 
@@ -5,9 +5,11 @@ Merge PDF Service — combines multiple PDF files into one.
 import os
 import uuid
 import logging
+from contextlib import ExitStack
 from typing import List
 
-from pypdf import PdfReader, PdfWriter
+from app.engines.document import Document, write_pages
+from app.utils.progress import report
 
 logger = logging.getLogger(__name__)
 
@@ -20,24 +22,28 @@ def merge_pdfs(pdf_paths: List[str], session_dir: str) -> str:
     if not pdf_paths:
         raise ValueError("No PDF files provided.")
 
-    writer = PdfWriter()
-
-    for idx, pdf_path in enumerate(pdf_paths):
-        try:
-            reader = PdfReader(pdf_path)
-            for page in reader.pages:
-                writer.add_page(page)
-            logger.info(f"Added PDF {idx + 1}/{len(pdf_paths)}: {pdf_path} ({len(reader.pages)} pages)")
-        except Exception as exc:
-            logger.error(f"Failed to read PDF {pdf_path}: {exc}")
-            raise ValueError(f"Could not process PDF: {os.path.basename(pdf_path)}") from exc
-
     output_filename = f"{uuid.uuid4().hex}.pdf"
     output_path = os.path.join(session_dir, output_filename)
 
-    with open(output_path, "wb") as f:
-        writer.write(f)
+    # Inputs stay open until their pages have been written out
+    parts = []
+    total_pages = 0
+    with ExitStack() as inputs:
+        for idx, pdf_path in enumerate(pdf_paths):
+            try:
+                doc = inputs.enter_context(Document(pdf_path))
+                page_count = doc.page_count("merge")
+            except Exception as exc:
+                logger.error(f"Failed to read PDF {pdf_path}: {exc}")
+                raise ValueError(f"Could not process PDF: {os.path.basename(pdf_path)}") from exc
+            parts.append((doc, range(page_count)))
+            total_pages += page_count
+            report("read", idx + 1, len(pdf_paths), pages=total_pages)
+            logger.info(f"Added PDF {idx + 1}/{len(pdf_paths)}: {pdf_path} ({page_count} pages)")
+
+        report("write")
+        write_pages(parts, output_path, "merge")
 
     file_size = os.path.getsize(output_path)
-    logger.info(f"✅  Merged PDF created: {output_path} ({file_size:,} bytes, {len(writer.pages)} pages)")
+    logger.info(f"✅  Merged PDF created: {output_path} ({file_size:,} bytes, {total_pages} pages)")
     return output_path
@@ -8,45 +8,177 @@ Supports page-size modes:
   - "fit"       → each page is exactly the image size (default)
   - "a4"        → landscape A4 (297 × 210 mm), image centred
   - "letter"    → landscape US Letter (279.4 × 215.9 mm), image centred
+
+PASSTHROUGH ("fit" mode):
+JPEG, JPEG 2000 and plain PNG uploads are embedded byte-for-byte — no decode,
+no re-encode, no generation loss. Only inputs that need conversion (alpha,
+palette transparency, BMP/WEBP/TIFF/GIF, …) go through Pillow.
+
+STREAMING:
+Pages are decoded, fitted, encoded and written one at a time through
+``StreamingPdfWriter``, so peak memory is one page regardless of how many
+images were uploaded. ``iter_images_to_pdf`` yields the PDF bytes page by
+page for chunked responses; ``images_to_pdf`` writes them to a file.
+
+PARALLEL PAGE PREPARATION:
+Decode / flatten / fit / encode runs in the shared "pages" worker pool
+(CONVERT_WORKERS processes, see ``app.workers.executor``). Each request
+keeps at most CONVERT_MAX_PARALLEL pages in flight and pages are written in
+upload order, so memory stays bounded by the per-request window rather than
+the upload count.
+
+REDUCED-RESOLUTION DECODE (a4 / letter):
+Pages are only ~1750 × 1240 px, so large photos are never fully decoded —
+JPEGs use Pillow's draft mode (DCT scaling to 1/2, 1/4 or 1/8 during decode)
+and everything is box-reduced with ``Image.reduce`` to within 2× of the
+target before the final LANCZOS resize.
+
+PAGE PLACEMENT (a4 / letter):
+  - "vector" (default) → the image is embedded on its own and positioned on
+                         the A4/Letter MediaBox with a content-stream
+                         transform. No page canvas is allocated or encoded;
+                         images already under VECTOR_MAX_DPI keep their
+                         native resolution (and passthrough bytes).
+  - "raster"           → legacy behaviour: the image is pasted onto a white
+                         150 DPI page canvas and the whole page is encoded.
+
+MULTI-FRAME INPUTS:
+Every frame of a multi-page TIFF (fax / scanner output) or animated GIF
+becomes its own page. Frames are visited lazily — inline via
+``ImageSequence``, in the pool as (path, frame) jobs — so only the frames
+currently being prepared are ever decoded.
+
+NORMALISATION:
+Inputs that are not already 8-bit RGB / L go through ``app.services.normalize``
+— vectorised NumPy alpha compositing, 16→8 bit scaling, palette expansion and
+CMYK / ICC conversion, band by band without full-size intermediates.
+
+COLOUR MODES:
+  - "color" (default) → 24-bit RGB JPEG pages (or passthrough)
+  - "gray"            → 8-bit greyscale JPEG pages
+  - "bw"              → 1-bit pages, CCITT G4 (Flate if libtiff is missing)
+  - "auto"            → per page: a cheap statistical test on a small preview
+                        picks "color", "gray" or "bw". Ideal for phone scans
+                        of text, which shrink 5–20× as bilevel pages.
 """
 
+import io
 import os
+import zlib
+import struct
 import uuid
 import logging
-from typing import List, Optional
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Iterator, List, NamedTuple, Optional, Tuple
 
-from PIL import Image
+from PIL import Image, ImageChops, ImageSequence, features
 from dotenv import load_dotenv
 
+from app.services.normalize import to_gray, to_rgb
+from app.services.pdf_writer import PdfImage, StreamingPdfWriter
+from app.utils.progress import report
+from app.workers.executor import POOL_SIZES, cancel_call, get_pool, pool_for, reset_pool, submit_limited
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+PDF_PASSTHROUGH = os.getenv("PDF_PASSTHROUGH", "true").lower() in ("1", "true", "yes")
+_PAGE_POOL = pool_for("image-to-pdf")
+CONVERT_WORKERS = POOL_SIZES[_PAGE_POOL]
+CONVERT_MAX_PARALLEL = int(os.getenv("CONVERT_MAX_PARALLEL", "4"))
+PAGE_PLACEMENT = os.getenv("PAGE_PLACEMENT", "vector").lower()
+VECTOR_MAX_DPI = float(os.getenv("VECTOR_MAX_DPI", "150"))
+
 # Millimetre → pixel at 150 DPI
 _MM_TO_PX_150 = 150 / 25.4
 
+# Pixel (at 150 DPI) → PDF point
+_PX_150_TO_PT = 72 / 150
+
+# Millimetre → PDF point
+_MM_TO_PT = 72 / 25.4
+
+COLOR_MODES = ("color", "gray", "bw", "auto")
+
 PAGE_SIZES = {
     "a4":     (297, 210),       # landscape A4 in mm
     "letter": (279.4, 215.9),   # landscape US Letter in mm
 }
 
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Formats whose extra frames become extra pages
+_MULTI_FRAME_FORMATS = ("TIFF", "GIF")
+
+# "auto" colour detection — tuned on phone scans of printed text
+_PREVIEW_SIZE = 256                # classify on a preview at most this big
+_CHROMA_THRESHOLD = 24             # |R−G| or |G−B| above this counts as coloured
+_MAX_COLOURED_FRACTION = 0.005     # more coloured pixels than this → "color"
+_MIN_BILEVEL_FRACTION = 0.95       # this many near-black/near-white pixels → "bw"
+_BW_THRESHOLD = 128                # grey level separating black from white
+
+_HAS_LIBTIFF = features.check("libtiff")
+_TIFF_ROWSPERSTRIP = 278
+
+# Box-reduce until the image is within this factor of the target size;
+# LANCZOS does the rest (same idea as Pillow's ``reducing_gap``)
+_REDUCING_GAP = 2.0
+
+
+class PreparedPage(NamedTuple):
+    """One encoded page, ready for ``StreamingPdfWriter.add_image_page``."""
+
+    image: PdfImage
+    width: float            # page width in points
+    height: float           # page height in points
+    passthrough: bool       # True if the original file bytes were embedded
+    box: Optional[Tuple[float, float, float, float]] = None   # image placement (x, y, w, h) in points
+
 
 def _mm_to_px(mm_w: float, mm_h: float) -> tuple:
     return int(mm_w * _MM_TO_PX_150), int(mm_h * _MM_TO_PX_150)
 
 
+def _fit_size(img_w: int, img_h: int, page_w: int, page_h: int) -> Tuple[int, int]:
+    """Size of an (img_w × img_h) image centre-fitted on the page with a 3 % margin."""
+    margin = int(min(page_w, page_h) * 0.03)   # 3 % margin
+    avail_w = page_w - 2 * margin
+    avail_h = page_h - 2 * margin
+
+    ratio = min(avail_w / img_w, avail_h / img_h)
+    return int(img_w * ratio), int(img_h * ratio)
+
+
+def _decode_reduced(img: Image.Image, target_w: int, target_h: int) -> Image.Image:
+    """
+    Decode *img* at the smallest resolution that still covers the target.
+
+    Must be called before the image is loaded. JPEG draft mode only scales
+    by powers of two and always stays at or above the requested size.
+    """
+    if img.format == "JPEG":
+        img.draft(img.mode, (target_w, target_h))
+
+    factor = int(min(img.width / target_w, img.height / target_h) / _REDUCING_GAP)
+    if factor >= 2:
+        img = _reducible(img).reduce(factor)
+    return img
+
+
+def _reducible(img: Image.Image) -> Image.Image:
+    """``Image.reduce`` has no 16-bit kernels — scale I;16* down to L first."""
+    return to_gray(img) if img.mode.startswith("I;16") else img
+
+
 def _fit_image_on_page(img: Image.Image, page_w: int, page_h: int) -> Image.Image:
     """
     Centre-fit *img* onto a white canvas of (page_w × page_h) pixels,
     maintaining aspect ratio with a small margin.
     """
-    margin = int(min(page_w, page_h) * 0.03)   # 3 % margin
-    avail_w = page_w - 2 * margin
-    avail_h = page_h - 2 * margin
-
-    ratio = min(avail_w / img.width, avail_h / img.height)
-    new_w = int(img.width * ratio)
-    new_h = int(img.height * ratio)
+    new_w, new_h = _fit_size(img.width, img.height, page_w, page_h)
 
     resized = img.resize((new_w, new_h), Image.LANCZOS)
 
@@ -57,68 +189,459 @@ def _fit_image_on_page(img: Image.Image, page_w: int, page_h: int) -> Image.Imag
     return canvas
 
 
-def images_to_pdf(
+# ---------------------------------------------------------------------------
+# Encoding — turn one input image into a PdfImage
+# ---------------------------------------------------------------------------
+
+def _encode_jpeg(img: Image.Image) -> PdfImage:
+    """JPEG-encode an RGB image (same settings Pillow's own PDF writer uses)."""
+    buf = io.BytesIO()
+    img.save(buf, "JPEG")
+    return PdfImage(img.width, img.height, buf.getvalue(), "DCTDecode")
+
+
+def _encode_gray(img: Image.Image) -> PdfImage:
+    """JPEG-encode as a single-channel greyscale image."""
+    gray = to_gray(img)
+    buf = io.BytesIO()
+    gray.save(buf, "JPEG")
+    return PdfImage(gray.width, gray.height, buf.getvalue(), "DCTDecode", "DeviceGray")
+
+
+def _encode_bilevel(img: Image.Image) -> PdfImage:
+    """
+    Threshold to 1 bit per pixel and encode as CCITT G4, falling back to
+    Flate if Pillow was built without libtiff.
+    """
+    if img.mode != "1":
+        img = to_gray(img).point(lambda v: 255 if v >= _BW_THRESHOLD else 0).convert(
+            "1", dither=Image.Dither.NONE
+        )
+
+    if _HAS_LIBTIFF:
+        buf = io.BytesIO()
+        # One strip for the whole image: Pillow otherwise cuts ~64 KB strips,
+        # i.e. several for any page-sized scan (strip_size on newer Pillow,
+        # ROWSPERSTRIP on older)
+        img.save(
+            buf, "TIFF", compression="group4",
+            strip_size=2**31 - 1, tiffinfo={_TIFF_ROWSPERSTRIP: img.height},
+        )
+        buf.seek(0)
+        with Image.open(buf) as tiff:
+            offsets = tiff.tag_v2.get(273, ())
+            counts = tiff.tag_v2.get(279, ())
+            photometric = tiff.tag_v2.get(262, 1)
+        # A single strip is exactly the CCITT stream PDF needs
+        if len(offsets) == 1 and len(counts) == 1:
+            data = buf.getvalue()[offsets[0]:offsets[0] + counts[0]]
+            return PdfImage(
+                img.width,
+                img.height,
+                data,
+                "CCITTFaxDecode",
+                "DeviceGray",
+                bits=1,
+                decode_parms={
+                    "K": -1,
+                    "Columns": img.width,
+                    "Rows": img.height,
+                    "BlackIs1": photometric == 1,
+                },
+            )
+        logger.warning(f"CCITT G4 came out in {len(offsets)} strips; using Flate for this {img.width}×{img.height} page")
+
+    # Pillow packs "1" rows MSB-first, padded to a byte, 1 = white — same as PDF
+    return PdfImage(
+        img.width, img.height, zlib.compress(img.tobytes(), 6), "FlateDecode", "DeviceGray", bits=1
+    )
+
+
+def _encode(img: Image.Image, color_mode: str) -> PdfImage:
+    """Encode a decoded image in the given (resolved) colour mode."""
+    if color_mode == "bw":
+        return _encode_bilevel(img)
+    if color_mode == "gray":
+        return _encode_gray(img)
+    return _encode_jpeg(to_rgb(img))
+
+
+def _classify(img: Image.Image) -> str:
+    """Return "color", "gray" or "bw" for a small, already-decoded preview."""
+    if img.mode == "1":
+        return "bw"
+    rgb = to_rgb(img)
+    r, g, b = rgb.split()
+
+    chroma = ImageChops.lighter(ImageChops.difference(r, g), ImageChops.difference(g, b))
+    hist = chroma.histogram()
+    total = rgb.width * rgb.height
+    if sum(hist[_CHROMA_THRESHOLD:]) > total * _MAX_COLOURED_FRACTION:
+        return "color"
+
+    levels = rgb.convert("L").histogram()
+    extremes = sum(levels[:64]) + sum(levels[192:])
+    return "bw" if extremes >= total * _MIN_BILEVEL_FRACTION else "gray"
+
+
+def _detect_color_mode(img: Image.Image, img_path: str) -> str:
+    """
+    Classify *img* from a small preview.
+
+    JPEGs get a separate 1/8-scale draft decode so the main handle stays
+    undecoded (for passthrough / its own draft). Other formats are decoded
+    here — they are decoded for encoding anyway.
+    """
+    if img.format == "JPEG":
+        with Image.open(img_path) as preview:
+            preview.draft("RGB", (_PREVIEW_SIZE, _PREVIEW_SIZE))
+            preview.load()
+            return _classify(preview)
+
+    factor = max(img.width, img.height) // _PREVIEW_SIZE
+    if factor >= 2 and img.mode not in ("1", "P", "PA"):
+        return _classify(_reducible(img).reduce(factor))
+    return _classify(img)
+
+
+def _passthrough_allowed(img: Image.Image, color_mode: str) -> bool:
+    """Original bytes may be embedded only if they already match the colour mode."""
+    if not PDF_PASSTHROUGH:
+        return False
+    return color_mode == "color" or (color_mode == "gray" and img.mode == "L")
+
+
+def _read_png_idat(data: bytes) -> Optional[Tuple[bytes, int, int]]:
+    """
+    Return (IDAT payload, bit depth, colour type) of a PNG that can be
+    embedded as a FlateDecode stream as-is, or None if it needs re-encoding.
+
+    Only 8-bit, non-interlaced greyscale / RGB PNGs without tRNS qualify —
+    their zlib stream is exactly what PDF's PNG predictors expect.
+    """
+    if not data.startswith(_PNG_SIGNATURE):
+        return None
+
+    pos = len(_PNG_SIGNATURE)
+    idat = []
+    bit_depth = color_type = None
+    while pos + 8 <= len(data):
+        length, ctype = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if ctype == b"IHDR":
+            _, _, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+            if bit_depth != 8 or color_type not in (0, 2) or interlace:
+                return None
+        elif ctype == b"tRNS":
+            return None
+        elif ctype == b"IDAT":
+            idat.append(body)
+        elif ctype == b"IEND":
+            break
+        pos += 12 + length
+
+    if not idat or bit_depth is None:
+        return None
+    return b"".join(idat), bit_depth, color_type
+
+
+def _passthrough_image(img: Image.Image, img_path: str) -> Optional[PdfImage]:
+    """
+    Build a PdfImage from the original file bytes, without decoding pixels.
+
+    Only the header has been parsed at this point (Pillow opens lazily), so
+    deciding costs nothing. Returns None if the image needs conversion.
+    """
+    if img.format == "JPEG" and img.mode in ("L", "RGB", "CMYK"):
+        with open(img_path, "rb") as f:
+            data = f.read()
+        colorspace = {"L": "DeviceGray", "RGB": "DeviceRGB", "CMYK": "DeviceCMYK"}[img.mode]
+        # Adobe CMYK JPEGs store inverted values
+        decode = [1, 0] * 4 if img.mode == "CMYK" and "adobe" in img.info else None
+        return PdfImage(img.width, img.height, data, "DCTDecode", colorspace, decode=decode)
+
+    if img.format == "JPEG2000":
+        with open(img_path, "rb") as f:
+            data = f.read()
+        return PdfImage(img.width, img.height, data, "JPXDecode", colorspace=None)
+
+    if img.format == "PNG" and img.mode in ("L", "RGB"):
+        with open(img_path, "rb") as f:
+            png = _read_png_idat(f.read())
+        if png is None:
+            return None
+        idat, bit_depth, color_type = png
+        colors = 1 if color_type == 0 else 3
+        return PdfImage(
+            img.width,
+            img.height,
+            idat,
+            "FlateDecode",
+            "DeviceGray" if colors == 1 else "DeviceRGB",
+            bits=bit_depth,
+            decode_parms={
+                "Predictor": 15,
+                "Colors": colors,
+                "BitsPerComponent": bit_depth,
+                "Columns": img.width,
+            },
+        )
+
+    return None
+
+
+def _prepare_placed_page(
+    img: Image.Image, img_path: str, page_size: str, color_mode: str
+) -> PreparedPage:
+    """
+    Vector placement: embed the image alone and position it on the page.
+
+    The image keeps its native resolution if that is at most VECTOR_MAX_DPI
+    at its placed size; otherwise it is reduced to exactly that resolution.
+    """
+    mm_w, mm_h = PAGE_SIZES[page_size]
+    page_w, page_h = mm_w * _MM_TO_PT, mm_h * _MM_TO_PT
+    # Choose landscape or portrait based on the image orientation
+    if img.width < img.height:
+        page_w, page_h = page_h, page_w
+
+    margin = min(page_w, page_h) * 0.03   # 3 % margin
+    ratio = min((page_w - 2 * margin) / img.width, (page_h - 2 * margin) / img.height)
+    box_w, box_h = img.width * ratio, img.height * ratio
+    box = ((page_w - box_w) / 2, (page_h - box_h) / 2, box_w, box_h)
+
+    max_w = max(1, round(box_w * VECTOR_MAX_DPI / 72))
+    max_h = max(1, round(box_h * VECTOR_MAX_DPI / 72))
+
+    if img.width <= max_w and img.height <= max_h:
+        encoded = _passthrough_image(img, img_path) if _passthrough_allowed(img, color_mode) else None
+        passthrough = encoded is not None
+        if encoded is None:
+            encoded = _encode(img, color_mode)
+    else:
+        reduced = _decode_reduced(img, max_w, max_h)
+        if reduced.mode == "1":
+            reduced = reduced.convert("L")   # resize needs a continuous-tone mode
+        elif reduced.mode not in ("L", "RGB"):
+            reduced = to_rgb(reduced)
+        encoded = _encode(reduced.resize((max_w, max_h), Image.LANCZOS), color_mode)
+        passthrough = False
+
+    return PreparedPage(encoded, page_w, page_h, passthrough, box)
+
+
+def _prepare_image(
+    img: Image.Image, img_path: str, page_size: str, color_mode: str = "color"
+) -> PreparedPage:
+    """Decode (if needed), fit and encode a single image or frame."""
+    if color_mode == "auto":
+        color_mode = _detect_color_mode(img, img_path)
+
+    if page_size in PAGE_SIZES and PAGE_PLACEMENT == "vector":
+        return _prepare_placed_page(img, img_path, page_size, color_mode)
+
+    if page_size in PAGE_SIZES:
+        mm_w, mm_h = PAGE_SIZES[page_size]
+        pw, ph = _mm_to_px(mm_w, mm_h)
+        # Choose landscape or portrait based on the image orientation
+        if img.width < img.height:
+            pw, ph = ph, pw
+        reduced = _decode_reduced(img, *_fit_size(img.width, img.height, pw, ph))
+        page = _fit_image_on_page(to_rgb(reduced), pw, ph)
+        return PreparedPage(_encode(page, color_mode), pw * _PX_150_TO_PT, ph * _PX_150_TO_PT, False)
+
+    encoded = _passthrough_image(img, img_path) if _passthrough_allowed(img, color_mode) else None
+    passthrough = encoded is not None
+    if encoded is None:
+        encoded = _encode(img, color_mode)
+    return PreparedPage(
+        encoded, encoded.width * _PX_150_TO_PT, encoded.height * _PX_150_TO_PT, passthrough
+    )
+
+
+def _prepare_page(
+    img_path: str, page_size: str, frame: int = 0, color_mode: str = "color"
+) -> PreparedPage:
+    """Open *img_path*, seek to *frame* and prepare it (pool entry point)."""
+    with Image.open(img_path) as img:
+        if frame:
+            img.seek(frame)
+        return _prepare_image(img, img_path, page_size, color_mode)
+
+
+def _frame_count(img_path: str) -> int:
+    """Number of pages *img_path* contributes (header-only; 1 if unreadable)."""
+    try:
+        with Image.open(img_path) as img:
+            if img.format in _MULTI_FRAME_FORMATS:
+                return getattr(img, "n_frames", 1)
+    except Exception:
+        pass  # _prepare_page reports the real error
+    return 1
+
+
+def _iter_page_sources(image_paths: List[str]) -> Iterator[Tuple[str, int]]:
+    """Yield (path, frame) for every page, one file header at a time."""
+    for img_path in image_paths:
+        for frame in range(_frame_count(img_path)):
+            yield img_path, frame
+
+
+def _iter_pages_inline(
+    image_paths: List[str], page_size: str, color_mode: str
+) -> Iterator[PreparedPage]:
+    """Prepare pages in this process, walking multi-frame files with ImageSequence."""
+    for img_path in image_paths:
+        frame = 0
+        try:
+            with Image.open(img_path) as img:
+                if img.format not in _MULTI_FRAME_FORMATS:
+                    yield _prepare_image(img, img_path, page_size, color_mode)
+                    continue
+                for frame, frame_img in enumerate(ImageSequence.Iterator(img)):
+                    yield _prepare_image(frame_img, img_path, page_size, color_mode)
+        except GeneratorExit:
+            raise
+        except Exception as exc:
+            raise _page_error(img_path, frame, exc) from exc
+
+
+# ---------------------------------------------------------------------------
+# Parallel page preparation ("pages" worker pool)
+# ---------------------------------------------------------------------------
+
+def _page_error(
+    img_path: str, frame: int, exc: Exception, pool: Optional[ProcessPoolExecutor] = None
+) -> ValueError:
+    where = f"{os.path.basename(img_path)}" + (f" (frame {frame + 1})" if frame else "")
+    logger.error(f"Failed to process image {img_path} frame {frame}: {exc}")
+    if isinstance(exc, BrokenProcessPool):
+        reset_pool(_PAGE_POOL, pool)
+    return ValueError(f"Could not process image: {where}")
+
+
+def _iter_prepared_pages(
+    image_paths: List[str], page_size: str, color_mode: str, inline: bool = False
+) -> Iterator[PreparedPage]:
+    """
+    Yield prepared pages (one per image frame) in upload order.
+
+    With more than one worker and more than one page, up to
+    CONVERT_MAX_PARALLEL pages are prepared concurrently in the pool;
+    otherwise (or if *inline*) pages are prepared inline.
+    """
+    parallel = min(CONVERT_WORKERS, CONVERT_MAX_PARALLEL)
+    single_page = len(image_paths) == 1 and _frame_count(image_paths[0]) == 1
+
+    if inline or parallel <= 1 or single_page:
+        yield from _iter_pages_inline(image_paths, page_size, color_mode)
+        return
+
+    pool = get_pool(_PAGE_POOL)
+    sources = _iter_page_sources(image_paths)
+    in_flight: Deque[Tuple[str, int, Future]] = deque()
+
+    def submit_next() -> None:
+        source = next(sources, None)
+        if source is not None:
+            img_path, frame = source
+            future = submit_limited(pool, "image-to-pdf", _prepare_page, img_path, page_size, frame, color_mode)
+            in_flight.append((img_path, frame, future))
+
+    try:
+        for _ in range(parallel):
+            submit_next()
+        while in_flight:
+            img_path, frame, future = in_flight.popleft()
+            try:
+                page = future.result()
+            except Exception as exc:
+                raise _page_error(img_path, frame, exc, pool) from exc
+            submit_next()
+            yield page
+    finally:
+        # Stream aborted (error or client gone) — don't waste workers on the rest
+        for _, _, future in in_flight:
+            cancel_call(pool, future)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def iter_images_to_pdf(
     image_paths: List[str],
-    session_dir: str,
     page_size: Optional[str] = None,
-) -> str:
+    color_mode: Optional[str] = None,
+    inline: bool = False,
+) -> Iterator[bytes]:
     """
-    Convert a list of image file paths into a single PDF.
+    Convert images into a PDF, yielding the file's bytes as they are produced.
 
-    *page_size* can be ``"fit"`` (default), ``"a4"``, or ``"letter"``.
-    Returns the path to the generated PDF.
+    The first chunk is yielded once page 1 is written, then one chunk per
+    page, then the xref/trailer. Multi-frame TIFF/GIF files contribute one
+    page per frame. At most CONVERT_MAX_PARALLEL pages are held in memory
+    at once. With *inline*, every page is prepared in this process (for
+    callers that already run in a worker).
     """
     if not image_paths:
         raise ValueError("No image paths provided.")
 
     page_size = (page_size or "fit").lower().strip()
+    color_mode = (color_mode or "color").lower().strip()
+    if color_mode not in COLOR_MODES:
+        raise ValueError(f"Invalid color mode: {color_mode}")
 
-    pdf_filename = f"{uuid.uuid4().hex}.pdf"
-    pdf_path = os.path.join(session_dir, pdf_filename)
+    buf = io.BytesIO()
+    writer = StreamingPdfWriter(buf)
+    passthrough_count = 0
 
-    rgb_images: List[Image.Image] = []
+    for page in _iter_prepared_pages(image_paths, page_size, color_mode, inline):
+        writer.add_image_page(page.image, page.width, page.height, page.box)
+        passthrough_count += page.passthrough
+        del page
+        logger.info(f"Wrote page {writer.page_count} ({writer.bytes_written:,} bytes so far)")
+        report("page", writer.page_count, bytes_written=writer.bytes_written)
 
-    for idx, img_path in enumerate(image_paths):
-        try:
-            img = Image.open(img_path)
-
-            # Handle RGBA / palette images → convert to RGB
-            if img.mode in ("RGBA", "LA"):
-                background = Image.new("RGB", img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[-1])
-                img = background
-            elif img.mode != "RGB":
-                img = img.convert("RGB")
-
-            # Apply page-size fitting
-            if page_size in PAGE_SIZES:
-                mm_w, mm_h = PAGE_SIZES[page_size]
-                pw, ph = _mm_to_px(mm_w, mm_h)
-                # Choose landscape or portrait based on the image orientation
-                if img.width < img.height:
-                    pw, ph = ph, pw
-                img = _fit_image_on_page(img, pw, ph)
-
-            rgb_images.append(img)
-            logger.info(f"Processed image {idx + 1}/{len(image_paths)}: {img_path}")
-        except Exception as exc:
-            logger.error(f"Failed to process image {img_path}: {exc}")
-            raise ValueError(f"Could not process image: {os.path.basename(img_path)}") from exc
-
-    # First image is the base; remaining are appended
-    first, *rest = rgb_images
-    first.save(
-        pdf_path,
-        "PDF",
-        resolution=150.0,
-        save_all=True,
-        append_images=rest,
+        yield _drain(buf)
+
+    writer.close()
+    yield _drain(buf)
+
+    logger.info(
+        f"PDF stream finished: {writer.page_count} pages, {writer.bytes_written:,} bytes "
+        f"({passthrough_count} embedded without re-encoding)"
     )
 
-    # Close all images to free memory
-    for img in rgb_images:
-        img.close()
+
+def images_to_pdf(
+    image_paths: List[str],
+    session_dir: str,
+    page_size: Optional[str] = None,
+    color_mode: Optional[str] = None,
+) -> str:
+    """
+    Convert a list of image file paths into a single PDF.
+
+    *page_size* can be ``"fit"`` (default), ``"a4"``, or ``"letter"``.
+    *color_mode* can be ``"color"`` (default), ``"gray"``, ``"bw"`` or ``"auto"``.
+    Returns the path to the generated PDF.
+    """
+    pdf_filename = f"{uuid.uuid4().hex}.pdf"
+    pdf_path = os.path.join(session_dir, pdf_filename)
+
+    with open(pdf_path, "wb") as f:
+        for chunk in iter_images_to_pdf(image_paths, page_size=page_size, color_mode=color_mode):
+            f.write(chunk)
 
     file_size = os.path.getsize(pdf_path)
-    logger.info(f"✅  PDF created: {pdf_path} ({file_size:,} bytes, {len(image_paths)} pages)")
+    logger.info(f"✅  PDF created: {pdf_path} ({file_size:,} bytes, {len(image_paths)} images)")
     return pdf_path
+
+
+def _drain(buf: io.BytesIO) -> bytes:
+    """Return everything written to *buf* so far and reset it."""
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data
@@ -0,0 +1,173 @@
+"""
+Streaming PDF writer — emits each page's objects as soon as it is added.
+
+Unlike Pillow's ``save(append_images=...)`` or img2pdf, nothing is held back
+until the end: the only state kept between pages is the byte offset of every
+object (for the xref table) and the list of page object numbers. Callers can
+drain the output buffer after every ``add_image_page`` and send it straight
+to the client.
+
+Object layout:
+  1 0 obj  → Catalog              (written on close)
+  2 0 obj  → Pages tree           (written on close, Kids known by then)
+  3.. obj  → image XObject, content stream, page — three per page
+"""
+
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+_CATALOG_OBJ = 1
+_PAGES_OBJ = 2
+
+
+@dataclass
+class PdfImage:
+    """An encoded image ready to be written as an image XObject."""
+
+    width: int
+    height: int
+    data: bytes
+    filter: str                                   # "DCTDecode", "JPXDecode", "FlateDecode", "CCITTFaxDecode"
+    colorspace: Optional[str] = "DeviceRGB"       # None for JPXDecode (colour space is in the codestream)
+    bits: int = 8
+    decode_parms: Dict[str, Union[int, bool]] = field(default_factory=dict)
+    decode: Optional[List[int]] = None
+
+
+def _value(value: Union[int, bool]) -> str:
+    """Format a DecodeParms value — PDF booleans are lowercase."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _num(value: float) -> str:
+    """Format a number the way PDF likes it — no exponent, no trailing zeros."""
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return text or "0"
+
+
+class StreamingPdfWriter:
+    """Write a PDF made of one full-bleed (or placed) image per page."""
+
+    def __init__(self, out: BinaryIO):
+        self._out = out
+        self._pos = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_obj = 3
+        self._kids: List[int] = []
+        self._closed = False
+        # PDF 1.5 for JPXDecode; the binary comment marks the file as binary
+        self._write(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._kids)
+
+    @property
+    def bytes_written(self) -> int:
+        return self._pos
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def add_image_page(
+        self,
+        image: PdfImage,
+        page_w: float,
+        page_h: float,
+        box: Optional[Tuple[float, float, float, float]] = None,
+    ) -> None:
+        """
+        Append a page of *page_w* × *page_h* points showing *image*.
+
+        *box* is the (x, y, width, height) rectangle the image is drawn into,
+        in points from the bottom-left corner. Defaults to the whole page.
+        """
+        if self._closed:
+            raise RuntimeError("Cannot add pages to a closed PDF writer.")
+
+        x, y, w, h = box or (0, 0, page_w, page_h)
+        image_obj = self._alloc()
+        content_obj = self._alloc()
+        page_obj = self._alloc()
+
+        self._write_object(image_obj, self._image_dict(image), image.data)
+
+        content = f"q {_num(w)} 0 0 {_num(h)} {_num(x)} {_num(y)} cm /Im0 Do Q".encode()
+        self._write_object(content_obj, "<< /Length %d >>" % len(content), content)
+
+        self._write_object(
+            page_obj,
+            f"<< /Type /Page /Parent {_PAGES_OBJ} 0 R "
+            f"/MediaBox [0 0 {_num(page_w)} {_num(page_h)}] "
+            f"/Resources << /XObject << /Im0 {image_obj} 0 R >> >> "
+            f"/Contents {content_obj} 0 R >>",
+        )
+        self._kids.append(page_obj)
+
+    def close(self) -> None:
+        """Write the page tree, catalog, xref table and trailer."""
+        if self._closed:
+            return
+        if not self._kids:
+            raise ValueError("Cannot write a PDF with no pages.")
+
+        kids = " ".join(f"{n} 0 R" for n in self._kids)
+        self._write_object(
+            _PAGES_OBJ, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._kids)} >>"
+        )
+        self._write_object(_CATALOG_OBJ, f"<< /Type /Catalog /Pages {_PAGES_OBJ} 0 R >>")
+
+        xref_pos = self._pos
+        size = self._next_obj
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for num in range(1, size):
+            lines.append(f"{self._offsets[num]:010d} 00000 n \n")
+        self._write("".join(lines).encode())
+        self._write(
+            f"trailer\n<< /Size {size} /Root {_CATALOG_OBJ} 0 R >>\n"
+            f"startxref\n{xref_pos}\n%%EOF\n".encode()
+        )
+        self._closed = True
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _write(self, data: bytes) -> None:
+        self._out.write(data)
+        self._pos += len(data)
+
+    def _alloc(self) -> int:
+        num = self._next_obj
+        self._next_obj += 1
+        return num
+
+    def _write_object(self, num: int, header: str, stream: Optional[bytes] = None) -> None:
+        self._offsets[num] = self._pos
+        self._write(f"{num} 0 obj\n{header}\n".encode())
+        if stream is not None:
+            self._write(b"stream\n")
+            self._write(stream)
+            self._write(b"\nendstream\n")
+        self._write(b"endobj\n")
+
+    @staticmethod
+    def _image_dict(image: PdfImage) -> str:
+        parts = [
+            "/Type /XObject /Subtype /Image",
+            f"/Width {image.width} /Height {image.height}",
+            f"/BitsPerComponent {image.bits}",
+            f"/Filter /{image.filter}",
+            f"/Length {len(image.data)}",
+        ]
+        if image.colorspace:
+            parts.append(f"/ColorSpace /{image.colorspace}")
+        if image.decode_parms:
+            parms = " ".join(f"/{k} {_value(v)}" for k, v in image.decode_parms.items())
+            parts.append(f"/DecodeParms << {parms} >>")
+        if image.decode:
+            parts.append("/Decode [" + " ".join(str(v) for v in image.decode) + "]")
+        return "<< " + " ".join(parts) + " >>"
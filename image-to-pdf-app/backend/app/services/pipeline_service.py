@@ -0,0 +1,207 @@
+"""
+Pipeline Service — runs several tools on one open document and writes the
+result once.
+
+Chaining the single tools (merge → compress → split) writes and re-parses
+the whole document between every step. Here the document stays open in
+pikepdf from the first step to the last, and is serialized once at the end
+(once per part for split).
+
+STEPS (a JSON list, applied in order to the uploaded files):
+
+  {"op": "convert", "page_size": "a4", "color_mode": "gray"}
+        every run of consecutive images becomes one PDF document
+  {"op": "unlock"}
+        opens the password-protected PDFs with the request's password
+        (the result is always written without encryption)
+  {"op": "merge"}
+        all documents → one, in order (images must be converted first)
+  {"op": "compress", "quality": "low" | "medium" | "high"}
+        as compress-pdf; needs a single document
+  {"op": "split", "ranges": "1-3,5"}
+        as split-pdf; needs a single document, must be the last step
+
+After the last step there must be exactly one document (or split parts).
+"""
+
+import io
+import os
+import json
+import uuid
+import zipfile
+import logging
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+
+import pikepdf
+
+from app.services.compress_service import compress_document
+from app.services.pdf_service import iter_images_to_pdf
+from app.services.split_service import _parse_ranges
+from app.utils.pdf_input import PdfInput
+from app.utils.progress import report
+
+logger = logging.getLogger(__name__)
+
+OPS = ("convert", "unlock", "merge", "compress", "split")
+MAX_STEPS = 20
+
+
+def parse_steps(steps: Optional[str]) -> List[Dict[str, str]]:
+    """Validate the *steps* JSON; raises ValueError with the offending step."""
+    try:
+        parsed = json.loads(steps or "")
+    except ValueError:
+        raise ValueError("steps must be a JSON list, e.g. [{\"op\": \"merge\"}, {\"op\": \"compress\"}].")
+    if not isinstance(parsed, list) or not parsed:
+        raise ValueError("steps must be a non-empty JSON list.")
+    if len(parsed) > MAX_STEPS:
+        raise ValueError(f"At most {MAX_STEPS} steps are allowed.")
+
+    for number, step in enumerate(parsed, start=1):
+        if not isinstance(step, dict) or step.get("op") not in OPS:
+            raise ValueError(f"Step {number}: op must be one of {', '.join(OPS)}.")
+        if step["op"] == "split" and number != len(parsed):
+            raise ValueError(f"Step {number}: split must be the last step.")
+    return parsed
+
+
+class _Image:
+    """An image input waiting for a convert step."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+
+def run_pipeline(input_paths: List[str], session_dir: str, steps: str, password: str = "") -> str:
+    """
+    Apply *steps* (JSON, see module docstring) to the uploaded files.
+    Returns the path to the resulting PDF, or a ZIP of the split parts.
+    """
+    parsed = parse_steps(steps)
+    if not input_paths:
+        raise ValueError("No files provided.")
+
+    # Inputs stay open until the result has been written
+    with ExitStack() as inputs:
+        # Each document is an _Image, an unopened PDF path, or an open pikepdf.Pdf
+        docs: list = [_Image(p) if _is_image(p) else p for p in input_paths]
+        unlock_password: Optional[str] = None
+        save_options: dict = {}
+        parts: Optional[List[List[int]]] = None
+
+        def opened(doc, number: int) -> pikepdf.Pdf:
+            if isinstance(doc, pikepdf.Pdf):
+                return doc
+            if isinstance(doc, _Image):
+                raise ValueError(f"Step {number}: convert the images to PDF first (add a convert step).")
+            source = inputs.enter_context(PdfInput(doc))
+            try:
+                try:
+                    return source.pikepdf()
+                except pikepdf.PasswordError:
+                    if unlock_password is None:
+                        raise ValueError(f"Step {number}: a PDF is password-protected — add an unlock step first.")
+                    return source.pikepdf(password=unlock_password)
+            except pikepdf.PasswordError:
+                raise ValueError("Incorrect password. Please provide the correct password to unlock this PDF.")
+            except ValueError:
+                raise
+            except Exception as exc:
+                raise ValueError(f"Could not open PDF: {exc}") from exc
+
+        def single(number: int, op: str) -> pikepdf.Pdf:
+            if len(docs) != 1:
+                raise ValueError(
+                    f"Step {number} ({op}) needs one document, not {len(docs)} — add a merge step first."
+                )
+            docs[0] = opened(docs[0], number)
+            return docs[0]
+
+        for number, step in enumerate(parsed, start=1):
+            op = step["op"]
+            report(op, number, len(parsed))
+
+            if op == "convert":
+                docs = _convert(docs, step)
+            elif op == "unlock":
+                unlock_password = password or ""
+                docs = [opened(doc, number) if isinstance(doc, str) else doc for doc in docs]
+            elif op == "merge":
+                merged, *others = [opened(doc, number) for doc in docs]
+                for other in others:
+                    merged.pages.extend(other.pages)
+                docs = [merged]
+            elif op == "compress":
+                doc = single(number, op)
+                try:
+                    save_options = compress_document(doc, step.get("quality", "medium"))
+                except Exception as exc:
+                    raise ValueError(f"PDF compression failed: {exc}") from exc
+            elif op == "split":
+                doc = single(number, op)
+                if len(doc.pages) == 0:
+                    raise ValueError("The PDF has no pages.")
+                ranges = step.get("ranges")
+                parts = _parse_ranges(ranges, len(doc.pages)) if ranges else [[i] for i in range(len(doc.pages))]
+
+        doc = single(len(parsed), "output")
+        report("save")
+        if parts is None or len(parts) == 1:
+            output_path = os.path.join(session_dir, f"{uuid.uuid4().hex}.pdf")
+            _save(doc, parts[0] if parts else None, output_path, save_options)
+            file_size = os.path.getsize(output_path)
+            logger.info(f"✅  Pipeline ({len(parsed)} steps) → {output_path} ({file_size:,} bytes)")
+            return output_path
+
+        zip_path = os.path.join(session_dir, f"{uuid.uuid4().hex}_pipeline.zip")
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for index, pages in enumerate(parts, start=1):
+                if len(pages) == 1:
+                    fname = f"page_{pages[0] + 1}.pdf"
+                else:
+                    fname = f"pages_{pages[0] + 1}-{pages[-1] + 1}.pdf"
+                buf = io.BytesIO()
+                _save(doc, pages, buf, save_options)
+                zf.writestr(fname, buf.getvalue())
+                report("write", index, len(parts))
+        logger.info(f"✅  Pipeline ({len(parsed)} steps) → {zip_path} ({len(parts)} parts)")
+        return zip_path
+
+
+def _is_image(path: str) -> bool:
+    # Same test as file_handler.sniff_file_type: uploads were checked to be an image or a PDF
+    with open(path, "rb") as f:
+        return b"%PDF-" not in f.read(1024)
+
+
+def _convert(docs: list, step: Dict[str, str]) -> list:
+    """Replace every run of consecutive images with one PDF document."""
+    converted: list = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            chunks = iter_images_to_pdf(
+                list(run), page_size=step.get("page_size"), color_mode=step.get("color_mode"), inline=True
+            )
+            converted.append(pikepdf.open(io.BytesIO(b"".join(chunks))))
+            run.clear()
+
+    for doc in docs:
+        if isinstance(doc, _Image):
+            run.append(doc.path)
+        else:
+            flush()
+            converted.append(doc)
+    flush()
+    return converted
+
+
+def _save(doc: pikepdf.Pdf, pages: Optional[List[int]], target, save_options: dict) -> None:
+    """Write *doc* (or just *pages* of it) to *target*, a path or a file object."""
+    if pages is not None and len(pages) != len(doc.pages):
+        part = pikepdf.new()
+        part.pages.extend(doc.pages[i] for i in pages)
+        doc = part
+    doc.save(target, **save_options)
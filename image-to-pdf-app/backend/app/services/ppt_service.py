@@ -7,17 +7,18 @@ import os
 import uuid
 import logging
 
-from PIL import Image as PILImage
 from pptx import Presentation
 from pptx.util import Inches, Emu
 
-from pypdf import PdfReader
+from app.engines.document import Document
+from app.utils.progress import report
 
 logger = logging.getLogger(__name__)
 
 # Standard slide dimensions (10 × 7.5 inches)
 SLIDE_WIDTH = Inches(10)
 SLIDE_HEIGHT = Inches(7.5)
+RENDER_DPI = 200
 
 
 def pdf_to_ppt(pdf_path: str, session_dir: str) -> str:
@@ -29,86 +30,50 @@ def pdf_to_ppt(pdf_path: str, session_dir: str) -> str:
     pptx_filename = f"{uuid.uuid4().hex}.pptx"
     pptx_path = os.path.join(session_dir, pptx_filename)
 
-    try:
-        # Try using pdf2image (requires poppler)
-        from pdf2image import convert_from_path
-        page_images = convert_from_path(pdf_path, dpi=200)
-    except Exception:
-        # Fallback: use pypdf to extract pages as images via Pillow
-        # This is simpler but only works for image-based PDFs
-        logger.warning("pdf2image unavailable, using fallback method")
-        page_images = _fallback_extract_pages(pdf_path, session_dir)
-
-    if not page_images:
-        raise ValueError("Could not extract any pages from the PDF.")
-
-    prs = Presentation()
-    prs.slide_width = SLIDE_WIDTH
-    prs.slide_height = SLIDE_HEIGHT
-
-    for idx, img in enumerate(page_images):
-        # Save page image temporarily
-        img_path = os.path.join(session_dir, f"slide_{idx}.png")
-        if isinstance(img, PILImage.Image):
+    with Document(pdf_path) as doc:
+        try:
+            page_count = doc.page_count("render")
+        except Exception as exc:
+            logger.error(f"Failed to open PDF: {exc}")
+            raise ValueError(f"Could not open PDF: {exc}") from exc
+
+        if page_count == 0:
+            raise ValueError("Could not extract any pages from the PDF.")
+
+        prs = Presentation()
+        prs.slide_width = SLIDE_WIDTH
+        prs.slide_height = SLIDE_HEIGHT
+
+        # One page image at a time: rendered, saved for add_picture, released
+        for idx in range(page_count):
+            report("slide", idx + 1, page_count)
+            img = doc.render(idx, dpi=RENDER_DPI)
+            img_w, img_h = img.size
+            img_path = os.path.join(session_dir, f"slide_{idx}.png")
             img.save(img_path, "PNG")
-        else:
-            # Already a path
-            img_path = img
-
-        slide_layout = prs.slide_layouts[6]  # Blank layout
-        slide = prs.slides.add_slide(slide_layout)
+            img.close()
 
-        # Calculate image size to fit slide maintaining aspect ratio
-        pil_img = PILImage.open(img_path)
-        img_w, img_h = pil_img.size
-        pil_img.close()
+            slide_layout = prs.slide_layouts[6]  # Blank layout
+            slide = prs.slides.add_slide(slide_layout)
 
-        slide_w = SLIDE_WIDTH
-        slide_h = SLIDE_HEIGHT
+            # Calculate image size to fit slide maintaining aspect ratio
+            slide_w = SLIDE_WIDTH
+            slide_h = SLIDE_HEIGHT
 
-        ratio = min(slide_w / Emu(img_w * 9525), slide_h / Emu(img_h * 9525))
-        final_w = int(img_w * 9525 * ratio)
-        final_h = int(img_h * 9525 * ratio)
+            ratio = min(slide_w / Emu(img_w * 9525), slide_h / Emu(img_h * 9525))
+            final_w = int(img_w * 9525 * ratio)
+            final_h = int(img_h * 9525 * ratio)
 
-        left = (SLIDE_WIDTH - final_w) // 2
-        top = (SLIDE_HEIGHT - final_h) // 2
+            left = (SLIDE_WIDTH - final_w) // 2
+            top = (SLIDE_HEIGHT - final_h) // 2
 
-        slide.shapes.add_picture(img_path, left, top, final_w, final_h)
-        logger.info(f"Added slide {idx + 1}")
+            slide.shapes.add_picture(img_path, left, top, final_w, final_h)
+            logger.info(f"Added slide {idx + 1}")
 
+    report("save")
     prs.save(pptx_path)
 
     file_size = os.path.getsize(pptx_path)
-    logger.info(f"✅  PPTX created: {pptx_path} ({file_size:,} bytes, {len(page_images)} slides)")
+    logger.info(f"✅  PPTX created: {pptx_path} ({file_size:,} bytes, {page_count} slides)")
     return pptx_path
 
-
-def _fallback_extract_pages(pdf_path: str, session_dir: str) -> list:
-    """
-    Fallback: extract each PDF page as a separate single-page PDF,
-    then convert to image using Pillow (works for simple PDFs).
-    """
-    reader = PdfReader(pdf_path)
-    images = []
-
-    for idx, page in enumerate(reader.pages):
-        from pypdf import PdfWriter
-        writer = PdfWriter()
-        writer.add_page(page)
-        temp_pdf = os.path.join(session_dir, f"_temp_page_{idx}.pdf")
-        with open(temp_pdf, "wb") as f:
-            writer.write(f)
-
-        # Try to render via Pillow (limited support)
-        try:
-            from pdf2image import convert_from_path
-            imgs = convert_from_path(temp_pdf, dpi=200)
-            if imgs:
-                images.extend(imgs)
-        except Exception:
-            # Last resort: create a placeholder slide
-            placeholder = PILImage.new("RGB", (1920, 1080), (255, 255, 255))
-            images.append(placeholder)
-            logger.warning(f"Could not render page {idx + 1}, using placeholder")
-
-    return images
@@ -8,7 +8,8 @@ import zipfile
 import logging
 from typing import Optional
 
-from pypdf import PdfReader, PdfWriter
+from app.engines.document import Document, write_pages
+from app.utils.progress import report
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +27,13 @@ def split_pdf(
 
     Returns the path to a ZIP archive containing the split PDFs.
     """
-    reader = PdfReader(pdf_path)
-    total_pages = len(reader.pages)
+    with Document(pdf_path) as doc:
+        return _split(doc, session_dir, ranges)
+
+
+def _split(doc: Document, session_dir: str, ranges: Optional[str]) -> str:
+    """Write the requested page groups of *doc* and return the result path."""
+    total_pages = doc.page_count("split")
 
     if total_pages == 0:
         raise ValueError("The PDF has no pages.")
@@ -39,20 +45,18 @@ def split_pdf(
     os.makedirs(split_dir, exist_ok=True)
 
     output_files = []
+    bytes_written = 0
     for group_idx, pages in enumerate(page_groups):
-        writer = PdfWriter()
-        for page_num in pages:
-            writer.add_page(reader.pages[page_num])
-
         if len(pages) == 1:
             fname = f"page_{pages[0] + 1}.pdf"
         else:
             fname = f"pages_{pages[0] + 1}-{pages[-1] + 1}.pdf"
 
         out_path = os.path.join(split_dir, fname)
-        with open(out_path, "wb") as f:
-            writer.write(f)
+        write_pages([(doc, pages)], out_path, "split")
         output_files.append(out_path)
+        bytes_written += os.path.getsize(out_path)
+        report("write", group_idx + 1, len(page_groups), bytes_written=bytes_written)
         logger.info(f"Split part {group_idx + 1}: {fname}")
 
     # If only one output file, return it directly
@@ -62,6 +66,7 @@ def split_pdf(
     # Otherwise, zip them up
     zip_filename = f"{uuid.uuid4().hex}_split.zip"
     zip_path = os.path.join(session_dir, zip_filename)
+    report("zip")
     with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
         for fpath in output_files:
             zf.write(fpath, os.path.basename(fpath))
@@ -6,7 +6,9 @@ import os
 import uuid
 import logging
 
-import pikepdf
+from app.engines.base import PasswordError
+from app.engines.document import Document, save_unlocked
+from app.utils.progress import report
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +24,9 @@ def unlock_pdf(pdf_path: str, session_dir: str, password: str = "") -> str:
     output_path = os.path.join(session_dir, output_filename)
 
     try:
-        pdf = pikepdf.open(pdf_path, password=password)
-        pdf.save(output_path)
-        pdf.close()
-    except pikepdf.PasswordError:
+        with Document(pdf_path, password) as doc:
+            save_unlocked(doc, output_path, progress=lambda percent: report("save", percent, 100))
+    except PasswordError:
         raise ValueError("Incorrect password. Please provide the correct password to unlock this PDF.")
     except Exception as exc:
         logger.error(f"Failed to unlock PDF: {exc}")
@@ -0,0 +1,218 @@
+"""
+Content-addressed blob store — dedupes uploads across requests.
+
+Every upload is hashed (SHA-256) while it streams to disk. The finished file
+is then hard-linked into BLOB_DIR as ``<sha256><ext>``; no extra bytes are
+written. A later request can reference the blob by hash instead of
+re-uploading it, and gets its own hard link inside its session directory.
+
+REFERENCE COUNTING:
+The filesystem does it: every session using a blob holds a hard link, so a
+blob's ``st_nlink - 1`` is the number of live sessions referencing it. This
+works across uvicorn worker processes and survives crashes — removing a
+session directory (cleanup, janitor, restart) drops its references.
+
+LRU EVICTION:
+Referencing a blob bumps its mtime. When the store exceeds BLOB_STORE_MB,
+unreferenced blobs are removed oldest-mtime first. Referenced blobs are
+never evicted (they could not be reclaimed anyway — the session links keep
+the data alive).
+
+Session directories on another filesystem (tmpfs sessions) cannot hard-link;
+blobs are copied in and out for those, and such copies are not references.
+"""
+
+import os
+import re
+import errno
+import shutil
+import logging
+import threading
+from typing import NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = os.getenv("BLOB_DIR", "blob_store")
+BLOB_STORE_BYTES = int(os.getenv("BLOB_STORE_MB", "512")) * 1024 * 1024
+
+# Extension a blob is stored with, per sniffed file kind (see file_handler)
+KIND_EXTENSIONS = {
+    "pdf": ".pdf",
+    "jpeg": ".jpg",
+    "png": ".png",
+    "gif": ".gif",
+    "bmp": ".bmp",
+    "webp": ".webp",
+    "tiff": ".tiff",
+    "jp2": ".jp2",
+}
+_EXTENSION_KINDS = {ext: kind for kind, ext in KIND_EXTENSIONS.items()}
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobInfo(NamedTuple):
+    digest: str
+    kind: str
+    size: int
+    refs: int
+    path: str
+
+
+def is_valid_digest(digest: str) -> bool:
+    return bool(_DIGEST_RE.match(digest or ""))
+
+
+class BlobStore:
+    """Hard-link based blob store rooted at *root*, capped at *budget* bytes."""
+
+    def __init__(self, root: str, budget: int):
+        self.root = root
+        self.budget = budget
+        self._evict_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, digest: str) -> Optional[BlobInfo]:
+        """Return the blob stored under *digest*, or None."""
+        if not is_valid_digest(digest):
+            return None
+        for kind, ext in KIND_EXTENSIONS.items():
+            path = os.path.join(self.root, digest + ext)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return BlobInfo(digest, kind, st.st_size, st.st_nlink - 1, path)
+        return None
+
+    def usage(self) -> dict:
+        """Current size of the store."""
+        count = total = referenced = 0
+        for entry in self._scan():
+            st = entry.stat()
+            count += 1
+            total += st.st_size
+            referenced += st.st_nlink > 1
+        return {"blobs": count, "bytes": total, "referenced": referenced, "budget_bytes": self.budget}
+
+    # ------------------------------------------------------------------
+    # Add / reference
+    # ------------------------------------------------------------------
+
+    def adopt(self, path: str, digest: str, kind: str) -> None:
+        """
+        Register the freshly written file at *path* as blob *digest*.
+
+        If the blob is new, *path* is hard-linked into the store (so the
+        session's copy is its first reference). If it already exists, the
+        session file is swapped for a link to the stored blob instead, so
+        the duplicate bytes are freed when the request ends.
+
+        *path* must be complete and closed for writing: once linked, a later
+        write would change the blob under its digest (chunked uploads hand
+        over a freshly copied inode for this reason).
+        """
+        os.makedirs(self.root, exist_ok=True)
+        blob_path = os.path.join(self.root, digest + KIND_EXTENSIONS[kind])
+        try:
+            os.link(path, blob_path)
+            logger.info(f"Blob stored: {digest[:12]}… ({kind})")
+            self._evict()
+            return
+        except FileExistsError:
+            pass
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+            # Session on another filesystem (tmpfs) — store a copy instead
+            if not os.path.exists(blob_path):
+                tmp = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                shutil.copyfile(path, tmp)
+                os.replace(tmp, blob_path)
+                self._evict()
+            return
+
+        self._touch(blob_path)
+        tmp = path + ".dedupe"
+        try:
+            os.link(blob_path, tmp)
+            os.replace(tmp, path)
+        except OSError:
+            pass   # keep the session's own copy
+
+    def link_into(self, digest: str, session_dir: str, filename: str) -> Optional[str]:
+        """
+        Give *session_dir* a reference to blob *digest* as *filename*.
+
+        Returns the new path, or None if the blob is not (or no longer) stored.
+        """
+        blob = self.get(digest)
+        if blob is None:
+            return None
+
+        path = os.path.join(session_dir, filename)
+        try:
+            os.link(blob.path, path)
+        except FileNotFoundError:
+            return None   # evicted between get() and link()
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+            shutil.copyfile(blob.path, path)
+        self._touch(blob.path)
+        return path
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _scan(self):
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    digest, ext = os.path.splitext(entry.name)
+                    if ext in _EXTENSION_KINDS and is_valid_digest(digest):
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Remove unreferenced blobs, least recently used first, until under budget."""
+        if not self._evict_lock.acquire(blocking=False):
+            return   # another thread is already evicting
+        try:
+            blobs = [(entry.path, entry.stat()) for entry in self._scan()]
+            total = sum(st.st_size for _, st in blobs)
+            if total <= self.budget:
+                return
+
+            for path, st in sorted(blobs, key=lambda b: b[1].st_mtime):
+                if total <= self.budget:
+                    break
+                if st.st_nlink > 1:
+                    continue   # still referenced by a session
+                try:
+                    os.remove(path)
+                    total -= st.st_size
+                    logger.info(f"Blob evicted: {os.path.basename(path)}")
+                except FileNotFoundError:
+                    total -= st.st_size
+        finally:
+            self._evict_lock.release()
+
+
+blob_store = BlobStore(BLOB_DIR, BLOB_STORE_BYTES)
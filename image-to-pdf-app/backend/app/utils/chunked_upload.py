@@ -0,0 +1,252 @@
+"""
+Resumable chunked uploads — init, write chunks by offset, finalize.
+
+Each upload is a directory under UPLOAD_DIR:
+
+    <upload_id>/meta.json      filename, size, and (once finalized) hash + kind
+    <upload_id>/data           preallocated to the full size
+    <upload_id>/parts/S-E      empty marker: bytes [S, E) have been written
+    <upload_id>/lock           flock: shared while a chunk is written,
+                               exclusive while the upload is finalized
+
+Chunks are written with ``os.pwrite`` at their own offset, so they may
+arrive in any order and in parallel (even on different worker processes).
+A chunk's marker is created only after all of its bytes are written; a
+chunk cut off by a dropped connection leaves no marker and is simply
+re-sent. Finalize checks the markers cover the whole file.
+
+SEALING:
+Finalize holds the lock exclusively, so it neither starts while a chunk is
+being written nor lets one start (either side gets UploadBusy, never
+waits). Under the lock it copies the data to a new inode, hashing it on
+the way, and replaces ``data`` with the copy: the hashed bytes — which go
+into the shared blob store — are in a file nobody has open for writing.
+A chunk write re-reads the metadata once it holds the lock and refuses a
+sealed upload.
+
+The directory lives outside TEMP_DIR so half-finished uploads survive a
+server restart. Finalized data is handed to sessions as a hard link, just
+like blob store entries.
+"""
+
+import os
+import json
+import uuid
+import fcntl
+import errno
+import shutil
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadBusy(Exception):
+    """A chunk is being written while finalizing, or the other way round."""
+
+
+class UploadInfo(NamedTuple):
+    upload_id: str
+    filename: str
+    size: int
+    digest: Optional[str]     # set once finalized
+    kind: Optional[str]       # set once finalized
+    path: str                 # the data file
+
+
+def _merge(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class UploadStore:
+    """Chunked uploads rooted at *root*."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def create(self, filename: str, size: int) -> str:
+        """Start an upload of *size* bytes, return its ID."""
+        upload_id = uuid.uuid4().hex
+        upload_dir = os.path.join(self.root, upload_id)
+        os.makedirs(os.path.join(upload_dir, "parts"))
+        with open(os.path.join(upload_dir, "data"), "wb") as f:
+            f.truncate(size)   # sparse — no bytes written yet
+        self._write_meta(upload_id, {"filename": filename, "size": size})
+        logger.info(f"Chunked upload started: {upload_id} ({size} bytes)")
+        return upload_id
+
+    def get(self, upload_id: str) -> Optional[UploadInfo]:
+        """Return the upload's metadata, or None if it does not exist."""
+        try:
+            uuid.UUID(hex=upload_id)
+        except (TypeError, ValueError):
+            return None
+        try:
+            with open(os.path.join(self.root, upload_id, "meta.json")) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return UploadInfo(
+            upload_id, meta["filename"], meta["size"], meta.get("digest"), meta.get("kind"),
+            os.path.join(self.root, upload_id, "data"),
+        )
+
+    def delete(self, upload_id: str) -> None:
+        if self.get(upload_id) is not None:
+            shutil.rmtree(os.path.join(self.root, upload_id), ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Chunks
+    # ------------------------------------------------------------------
+
+    async def write_chunk(
+        self, info: UploadInfo, offset: int, body: AsyncIterator[bytes]
+    ) -> int:
+        """
+        Write a chunk starting at *offset* from *body*, return its length.
+
+        Raises ValueError if the upload is finalized or the chunk falls
+        outside the declared size, UploadBusy if it is being finalized.
+        """
+        if offset < 0 or offset > info.size:
+            raise ValueError(f"Offset {offset} is outside the upload (size {info.size}).")
+
+        with self._lock(info.upload_id, exclusive=False):
+            # Re-read under the lock: *info* may predate a finalize
+            current = self.get(info.upload_id)
+            if current is None or current.digest is not None:
+                raise ValueError("Upload is already finalized.")
+
+            pos = offset
+            fd = os.open(info.path, os.O_WRONLY)
+            try:
+                async for piece in body:
+                    if pos + len(piece) > info.size:
+                        raise ValueError(f"Chunk at offset {offset} runs past the declared size {info.size}.")
+                    os.pwrite(fd, piece, pos)
+                    pos += len(piece)
+            finally:
+                os.close(fd)
+
+            if pos > offset:
+                marker = os.path.join(self.root, info.upload_id, "parts", f"{offset}-{pos}")
+                open(marker, "wb").close()
+        return pos - offset
+
+    def received(self, upload_id: str) -> List[Tuple[int, int]]:
+        """Byte ranges written so far, merged and sorted."""
+        ranges = []
+        for name in os.listdir(os.path.join(self.root, upload_id, "parts")):
+            start, _, end = name.partition("-")
+            ranges.append((int(start), int(end)))
+        return _merge(ranges)
+
+    def missing(self, info: UploadInfo) -> List[Tuple[int, int]]:
+        """Byte ranges still to be sent."""
+        gaps, pos = [], 0
+        for start, end in self.received(info.upload_id):
+            if start > pos:
+                gaps.append((pos, start))
+            pos = max(pos, end)
+        if pos < info.size:
+            gaps.append((pos, info.size))
+        return gaps
+
+    # ------------------------------------------------------------------
+    # Finalize / use
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def sealing(self, upload_id: str) -> Iterator[None]:
+        """Hold off chunk writes while finalizing (raises UploadBusy if one is in progress)."""
+        with self._lock(upload_id, exclusive=True):
+            yield
+
+    def detach(self, info: UploadInfo) -> Tuple[str, bytes]:
+        """
+        Replace the data with a copy on a new inode, returning its SHA-256
+        and first bytes. Call inside ``sealing()``.
+        """
+        digest = hashlib.sha256()
+        head = b""
+        tmp = info.path + ".sealed"
+        with open(info.path, "rb") as src, open(tmp, "wb") as dest:
+            while True:
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                head = head or chunk
+                digest.update(chunk)
+                dest.write(chunk)
+        os.replace(tmp, info.path)
+        return digest.hexdigest(), head
+
+    def finalize(self, info: UploadInfo, digest: str, kind: str) -> UploadInfo:
+        """Record the verified hash and kind; no more chunks are accepted."""
+        self._write_meta(
+            info.upload_id,
+            {"filename": info.filename, "size": info.size, "digest": digest, "kind": kind},
+        )
+        logger.info(f"Chunked upload finalized: {info.upload_id} ({kind})")
+        return info._replace(digest=digest, kind=kind)
+
+    def link_into(self, info: UploadInfo, session_dir: str, filename: str) -> str:
+        """Hard-link (or copy, across filesystems) the data into a session."""
+        path = os.path.join(session_dir, filename)
+        try:
+            os.link(info.path, path)
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+            shutil.copyfile(info.path, path)
+        return path
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _lock(self, upload_id: str, exclusive: bool) -> Iterator[None]:
+        try:
+            fd = os.open(os.path.join(self.root, upload_id, "lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        except FileNotFoundError:
+            raise ValueError(f"Unknown upload ID: {upload_id}.")
+        try:
+            try:
+                fcntl.flock(fd, (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if exclusive:
+                    raise UploadBusy("A chunk is still being written; finalize again once it completes.")
+                raise UploadBusy("Upload is being finalized.")
+            yield
+        finally:
+            os.close(fd)
+
+    def _write_meta(self, upload_id: str, meta: dict) -> None:
+        path = os.path.join(self.root, upload_id, "meta.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+
+upload_store = UploadStore(UPLOAD_DIR)
@@ -5,17 +5,40 @@ MULTI-USER ISOLATION:
 Each conversion request gets its own UUID-based sub-directory inside TEMP_DIR.
 This guarantees zero cross-user file conflicts even under concurrent load.
 Directories are cleaned up immediately after the PDF is sent.
+
+STORAGE BACKENDS:
+Session directories are created by the backend selected with SESSION_STORAGE
+(see ``app.utils.session_storage``) — on disk under TEMP_DIR, or on tmpfs
+with a spill-over to TEMP_DIR for large sessions.
+
+SINGLE-PASS UPLOADS:
+``save_upload_file`` copies the upload to disk in UPLOAD_CHUNK_SIZE pieces,
+checking the size as it goes and the file signature (magic bytes) on the
+first chunk. Peak memory per upload is one chunk, not the whole file; an
+oversized or mistyped upload is rejected before the rest of it is copied.
+
+CONTENT ADDRESSING:
+The same pass computes the upload's SHA-256 and registers the file in the
+blob store (``app.utils.blob_store``). Routes accept ``file_hash`` /
+``file_hashes`` form fields to reuse a stored blob instead of re-uploading,
+and ``upload_id`` / ``upload_ids`` for finished resumable uploads
+(``app.utils.chunked_upload``); ``resolve_upload`` / ``resolve_uploads``
+handle every form.
 """
 
 import os
-import shutil
 import uuid
+import hashlib
 import logging
-from typing import List
+from typing import AbstractSet, List, NamedTuple, Optional, Set
 
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile
 from dotenv import load_dotenv
 
+from app.utils.blob_store import KIND_EXTENSIONS, blob_store
+from app.utils.chunked_upload import UploadBusy, UploadInfo, upload_store
+from app.utils.session_storage import get_session_storage
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -23,11 +46,22 @@ logger = logging.getLogger(__name__)
 TEMP_DIR = os.getenv("TEMP_DIR", "temp_files")
 MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "10"))
 ALLOWED_EXTENSIONS = os.getenv(
-    "ALLOWED_EXTENSIONS", ".jpg,.jpeg,.png,.bmp,.gif,.webp,.tiff"
+    "ALLOWED_EXTENSIONS", ".jpg,.jpeg,.png,.bmp,.gif,.webp,.tiff,.tif,.jp2"
 ).split(",")
 
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# File kinds recognised by sniff_file_type
+IMAGE_TYPES = frozenset({"jpeg", "png", "gif", "bmp", "webp", "tiff", "jp2"})
+PDF_TYPES = frozenset({"pdf"})
+
+_storage = get_session_storage(TEMP_DIR)
+
+# Session dirs this process has created and not yet cleaned (janitor skips them)
+_active_sessions: Set[str] = set()
+
 
 # ---------------------------------------------------------------------------
 # Session-based isolation — every request gets a unique directory
@@ -35,39 +69,46 @@ MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 
 def create_session_dir() -> str:
     """Create and return a unique per-request temp directory."""
-    session_id = uuid.uuid4().hex
-    session_dir = os.path.join(TEMP_DIR, session_id)
-    os.makedirs(session_dir, exist_ok=True)
+    session_dir = _storage.create()
+    _active_sessions.add(session_dir)
     logger.info(f"Session directory created: {session_dir}")
     return session_dir
 
 
 def cleanup_session_dir(session_dir: str) -> None:
     """Remove an entire session directory and all its contents."""
+    _active_sessions.discard(session_dir)
     try:
-        if os.path.exists(session_dir):
-            shutil.rmtree(session_dir)
-            logger.info(f"Session directory cleaned: {session_dir}")
+        _storage.cleanup(session_dir)
+        logger.info(f"Session directory cleaned: {session_dir}")
     except OSError as exc:
         logger.warning(f"Could not clean session dir {session_dir}: {exc}")
 
 
+def session_roots() -> List[str]:
+    """Directories session dirs are created in (for the janitor)."""
+    return _storage.roots()
+
+
+def active_session_dirs() -> Set[str]:
+    """Session dirs in use by this process."""
+    return set(_active_sessions)
+
+
 # ---------------------------------------------------------------------------
 # Global temp directory management (startup / shutdown)
 # ---------------------------------------------------------------------------
 
 def ensure_temp_directory() -> None:
-    """Create the root temporary directory if it doesn't exist."""
-    os.makedirs(TEMP_DIR, exist_ok=True)
-    logger.info(f"Temp directory ready: {TEMP_DIR}")
+    """Create the root temporary directory (or directories) if missing."""
+    _storage.ensure()
+    logger.info(f"Temp directory ready: {', '.join(_storage.roots())} ({_storage.name} sessions)")
 
 
 def cleanup_temp_directory() -> None:
     """Remove and recreate the root temp directory (shutdown cleanup)."""
-    if os.path.exists(TEMP_DIR):
-        shutil.rmtree(TEMP_DIR)
-        logger.info("Temp directory cleaned up.")
-    ensure_temp_directory()
+    _storage.clear()
+    logger.info("Temp directory cleaned up.")
 
 
 # ---------------------------------------------------------------------------
@@ -86,24 +127,229 @@ def validate_file_extension(filename: str) -> bool:
     return ext in ALLOWED_EXTENSIONS
 
 
-async def validate_file_size(file: UploadFile) -> bool:
-    """Return True if file size is within the allowed limit."""
-    contents = await file.read()
-    await file.seek(0)  # Reset pointer for later use
-    return len(contents) <= MAX_FILE_SIZE_BYTES
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """Identify a file from its first bytes; None if the signature is unknown."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head.startswith(b"BM"):
+        return "bmp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:4] in (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+"):
+        return "tiff"
+    if head.startswith(b"\x00\x00\x00\x0cjP  \r\n\x87\n") or head.startswith(b"\xff\x4f\xff\x51"):
+        return "jp2"
+    # PDF readers accept leading junk before the header within the first 1 KB
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    return None
+
+
+def _too_large(file: UploadFile) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"File too large: {file.filename}. Max size is {MAX_FILE_SIZE_MB} MB per file.",
+    )
+
+
+class SavedUpload(NamedTuple):
+    path: str
+    digest: str            # SHA-256 hex of the contents
+    kind: Optional[str]    # sniffed file kind, None if unrecognised
+    size: int
+
+
+async def stream_upload(
+    file: UploadFile,
+    session_dir: str,
+    allowed_types: Optional[AbstractSet[str]] = None,
+) -> SavedUpload:
+    """
+    Stream an uploaded file into the session directory.
+
+    Raises HTTPException(400) — after removing the partial file — if the
+    upload exceeds MAX_FILE_SIZE_BYTES or, when *allowed_types* is given,
+    its magic bytes do not match one of those file kinds. Recognised files
+    are added to the blob store.
+    """
+    # The multipart parser already knows the size — skip the copy entirely
+    if file.size is not None and file.size > MAX_FILE_SIZE_BYTES:
+        raise _too_large(file)
 
+    unique_name = get_unique_filename(file.filename or "image.png")
+    expected = file.size if file.size is not None else MAX_FILE_SIZE_BYTES
+    file_path = _storage.upload_path(session_dir, unique_name, expected)
 
-async def save_upload_file(file: UploadFile, session_dir: str) -> str:
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(file_path, "wb") as f:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            kind = sniff_file_type(chunk)
+            if allowed_types is not None and kind not in allowed_types:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid file type: {file.filename}. "
+                           f"The file contents do not match an accepted format.",
+                )
+            while chunk:
+                written += len(chunk)
+                if written > MAX_FILE_SIZE_BYTES:
+                    raise _too_large(file)
+                digest.update(chunk)
+                f.write(chunk)
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        remove_file(file_path)
+        raise
+
+    saved = SavedUpload(file_path, digest.hexdigest(), kind, written)
+    if kind is not None:
+        try:
+            blob_store.adopt(file_path, saved.digest, kind)
+        except OSError as exc:
+            logger.warning(f"Could not add upload to blob store: {exc}")
+
+    logger.info(f"Saved upload → {file_path} ({written} bytes)")
+    return saved
+
+
+async def save_upload_file(
+    file: UploadFile,
+    session_dir: str,
+    allowed_types: Optional[AbstractSet[str]] = None,
+) -> str:
     """Save an uploaded file into the session directory, return its path."""
-    unique_name = get_unique_filename(file.filename or "image.png")
-    file_path = os.path.join(session_dir, unique_name)
+    return (await stream_upload(file, session_dir, allowed_types)).path
+
+
+def link_blob(file_hash: str, session_dir: str, allowed_types: AbstractSet[str]) -> str:
+    """Reference a stored blob from the session directory, return its path."""
+    file_hash = file_hash.strip().lower()
+    blob = blob_store.get(file_hash)
+    if blob is not None and blob.kind not in allowed_types:
+        raise HTTPException(status_code=400, detail=f"Invalid file type for hash {file_hash}.")
+
+    path = None
+    if blob is not None:
+        path = blob_store.link_into(
+            file_hash, session_dir, f"{uuid.uuid4().hex}{KIND_EXTENSIONS[blob.kind]}"
+        )
+    if path is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown file hash: {file_hash}. Upload the file instead.",
+        )
+    return path
+
+
+def get_chunked_upload(upload_id: str) -> UploadInfo:
+    """Look up a resumable upload, 404 if it does not exist."""
+    info = upload_store.get(upload_id.strip().lower())
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload ID: {upload_id}.")
+    return info
+
+
+def finalize_chunked_upload(upload_id: str) -> UploadInfo:
+    """
+    Verify a resumable upload is complete and valid, then seal it.
+
+    Hashes the assembled file, sniffs its type and adds it to the blob
+    store. Finalizing twice returns the first result.
+    """
+    info = get_chunked_upload(upload_id)
+    if info.digest is not None:
+        return info
 
-    contents = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    try:
+        with upload_store.sealing(info.upload_id):
+            # Re-read under the lock: another finalize may have just finished
+            info = get_chunked_upload(upload_id)
+            if info.digest is not None:
+                return info
+
+            missing = upload_store.missing(info)
+            if missing:
+                ranges = ", ".join(f"{start}-{end - 1}" for start, end in missing[:10])
+                raise HTTPException(status_code=409, detail=f"Upload is incomplete; missing bytes {ranges}.")
+
+            # Hashed on a fresh inode that no chunk writer has open
+            digest, head = upload_store.detach(info)
+            kind = sniff_file_type(head)
+            if kind not in IMAGE_TYPES | PDF_TYPES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid file type: {info.filename}. "
+                           f"The file contents do not match an accepted format.",
+                )
+
+            info = upload_store.finalize(info, digest, kind)
+    except UploadBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
 
-    logger.info(f"Saved upload → {file_path} ({len(contents)} bytes)")
-    return file_path
+    try:
+        blob_store.adopt(info.path, info.digest, kind)
+    except OSError as exc:
+        logger.warning(f"Could not add upload to blob store: {exc}")
+    return info
+
+
+def link_upload(upload_id: str, session_dir: str, allowed_types: AbstractSet[str]) -> str:
+    """Reference a finalized resumable upload from the session directory."""
+    info = get_chunked_upload(upload_id)
+    if info.digest is None:
+        raise HTTPException(status_code=409, detail=f"Upload {upload_id} is not finalized.")
+    if info.kind not in allowed_types:
+        raise HTTPException(status_code=400, detail=f"Invalid file type for upload {upload_id}.")
+    return upload_store.link_into(
+        info, session_dir, f"{uuid.uuid4().hex}{KIND_EXTENSIONS[info.kind]}"
+    )
+
+
+async def resolve_upload(
+    session_dir: str,
+    allowed_types: AbstractSet[str],
+    file: Optional[UploadFile] = None,
+    file_hash: Optional[str] = None,
+    upload_id: Optional[str] = None,
+) -> str:
+    """Path of the request's input file — uploaded, referenced by hash or by upload ID."""
+    if upload_id:
+        return link_upload(upload_id, session_dir, allowed_types)
+    if file_hash:
+        return link_blob(file_hash, session_dir, allowed_types)
+    if file is None:
+        raise HTTPException(status_code=400, detail="No file was uploaded.")
+    return await save_upload_file(file, session_dir, allowed_types)
+
+
+async def resolve_uploads(
+    session_dir: str,
+    allowed_types: AbstractSet[str],
+    files: Optional[List[UploadFile]] = None,
+    file_hashes: Optional[str] = None,
+    upload_ids: Optional[str] = None,
+) -> List[str]:
+    """
+    Paths of the request's input files, in order: uploaded files first,
+    then the comma-separated *file_hashes*, then *upload_ids*.
+    """
+    paths = [await save_upload_file(file, session_dir, allowed_types) for file in files or []]
+    for file_hash in split_list(file_hashes):
+        paths.append(link_blob(file_hash, session_dir, allowed_types))
+    for upload_id in split_list(upload_ids):
+        paths.append(link_upload(upload_id, session_dir, allowed_types))
+    return paths
+
+
+def split_list(value: Optional[str]) -> List[str]:
+    """Split a comma-separated form field, dropping blanks."""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
 
 
 def remove_file(path: str) -> None:
@@ -0,0 +1,122 @@
+"""
+PDF input — open a session PDF for any engine without buffering it whole.
+
+The services use four PDF libraries, and each reads its input differently:
+
+  - pypdf       ``PdfReader(path)`` reads the entire file into a BytesIO
+                before parsing. A 300 MB merge input costs 300 MB of
+                anonymous memory even if only a few pages are copied.
+                → given a read-only mmap of the file instead; only the
+                  pages of the file that are parsed become resident, and
+                  they are clean page cache the kernel can drop.
+  - pikepdf     qpdf reads on demand through a file stream.
+                → opened by path with AccessMode.stream. AccessMode.mmap
+                  was measured too: same anonymous memory, but a full
+                  rewrite (compress / unlock) maps in the whole file,
+                  so peak RSS grows by the file size.
+  - PyMuPDF     MuPDF seeks in the file itself; ``fitz.open(stream=...)``
+                needs bytes, i.e. a full copy.
+                → opened by path.
+  - pdfplumber  pdfminer seeks in an open file object.
+                → opened by path.
+
+pdf2docx opens its input through PyMuPDF, so it is already lazy on a path.
+Most services go through ``app.engines`` instead of calling these directly;
+the engine adapters open their documents here.
+
+Usage — the mapping stays open until the PdfInput is closed, so keep it
+open for as long as objects from the document are in use (e.g. until a
+PdfWriter holding its pages has been written):
+
+    with PdfInput(pdf_path) as source:
+        reader = source.pypdf()
+        ...
+
+See benchmarks/bench_pdf_input.py for measurements.
+"""
+
+import os
+import mmap
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PdfInput:
+    """A session PDF, handed to each engine in its cheapest lazy form."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._opened = []   # engine documents to close with the input
+
+    # ------------------------------------------------------------------
+    # Engines
+    # ------------------------------------------------------------------
+
+    def pypdf(self, password: Optional[str] = None):
+        """A pypdf PdfReader over a read-only mapping of the file."""
+        from pypdf import PdfReader
+
+        return PdfReader(self._buffer(), password=password)
+
+    def pikepdf(self, password: str = ""):
+        """A pikepdf Pdf reading the file on demand."""
+        import pikepdf
+
+        pdf = pikepdf.open(self.path, password=password, access_mode=pikepdf.AccessMode.stream)
+        self._opened.append(pdf)
+        return pdf
+
+    def fitz(self):
+        """A PyMuPDF document reading the file on demand."""
+        import fitz
+
+        doc = fitz.open(self.path)
+        self._opened.append(doc)
+        return doc
+
+    def pdfplumber(self, password: str = ""):
+        """A pdfplumber PDF reading the file on demand."""
+        import pdfplumber
+
+        pdf = pdfplumber.open(self.path, password=password)
+        self._opened.append(pdf)
+        return pdf
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def close(self) -> None:
+        while self._opened:
+            try:
+                self._opened.pop().close()
+            except Exception:
+                pass
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "PdfInput":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _buffer(self):
+        """Read-only mmap of the file (a plain file object if it is empty)."""
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        if self._map is None and os.fstat(self._file.fileno()).st_size > 0:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map if self._map is not None else self._file
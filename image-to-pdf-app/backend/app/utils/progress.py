@@ -0,0 +1,66 @@
+"""
+Progress reporting — services call ``report()`` as they work.
+
+    report("transcribe", page, len(images))
+    report("write", part, total, bytes_written=size)
+
+``report()`` does nothing unless someone is watching: for calls made with a
+progress channel, the executor installs a sink (``reporting_to``) that
+forwards events to the server process, which streams them to the client as
+Server-Sent Events (``app.workers.progress``). Events for the same stage
+are throttled to one per MIN_INTERVAL_S, except the last one (i == N).
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+Event = Dict[str, Any]
+
+MIN_INTERVAL_S = 0.1
+
+_sink: ContextVar[Optional[Callable[[Event], None]]] = ContextVar("progress_sink", default=None)
+
+
+def report(stage: str, current: Optional[int] = None, total: Optional[int] = None, **fields: Any) -> None:
+    """Report that the running call is at *stage*, item *current* of *total*."""
+    sink = _sink.get()
+    if sink is None:
+        return
+    event: Event = {"stage": stage}
+    if current is not None:
+        event["current"] = current
+    if total is not None:
+        event["total"] = total
+    event.update(fields)
+    sink(event)
+
+
+class _Throttled:
+    def __init__(self, sink: Callable[[Event], None]):
+        self.sink = sink
+        self.stage: Optional[str] = None
+        self.sent_at = 0.0
+
+    def __call__(self, event: Event) -> None:
+        now = time.monotonic()
+        same_stage = event["stage"] == self.stage
+        last_item = "total" in event and event.get("current") == event["total"]
+        if same_stage and not last_item and now - self.sent_at < MIN_INTERVAL_S:
+            return
+        self.stage, self.sent_at = event["stage"], now
+        try:
+            self.sink(event)
+        except Exception:
+            pass   # progress is best-effort — never fail the work over it
+
+
+@contextmanager
+def reporting_to(sink: Callable[[Event], None]) -> Iterator[None]:
+    """Send ``report()`` events from this context (and ``run_in_threadpool`` calls made in it) to *sink*."""
+    token = _sink.set(_Throttled(sink))
+    try:
+        yield
+    finally:
+        _sink.reset(token)
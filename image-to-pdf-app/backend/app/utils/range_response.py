@@ -0,0 +1,170 @@
+"""
+File downloads that can be resumed — ``Range``, ``If-Range``, ``ETag``.
+
+Starlette's FileResponse always sends the whole file. ``file_response()``
+looks at the request's conditional and range headers first:
+
+    If-None-Match matches the ETag        → 304, no body
+    Range: bytes=S-E (or S-, or -N)       → 206 with that slice
+        …unless If-Range names another version of the file → 200, whole file
+    a range starting past the end         → 416 with ``Content-Range: bytes */size``
+    anything else                         → 200, whole file
+
+Only single ranges are served; a multi-range request gets the whole file,
+which RFC 9110 allows (a client resuming a download asks for one range).
+The file is only served under a validator the caller guarantees: the
+ETag must change whenever the file's contents could.
+"""
+
+import os
+import hashlib
+from email.utils import formatdate
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from starlette.types import Receive, Scope, Send
+
+CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag for whatever *parts* identify (never the file's contents)."""
+    digest = hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    The ``[start, end)`` byte span a ``Range`` header asks for, or None to
+    send the whole file (no header, another unit, several ranges, or a
+    malformed one). Raises RangeNotSatisfiable if it lies past the end.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = (part.strip() for part in spec.partition("-"))
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+
+    if not first:
+        # bytes=-N: the last N bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - suffix, 0), size
+
+    start = int(first)
+    if last and int(last) < start:
+        return None   # invalid: ignored, like a malformed header
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, (min(int(last) + 1, size) if last else size)
+
+
+def _if_range_holds(value: Optional[str], etag: str, last_modified: str) -> bool:
+    """Whether a range may be served: no If-Range, or it names the version we have."""
+    if value is None:
+        return True
+    value = value.strip()
+    if value.startswith(("W/", '"')):
+        return value == etag   # weak tags never match in If-Range
+    return value == last_modified
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class _FileSlice(Response):
+    """Sends bytes ``[start, end)`` of the file at *path* (headers only for HEAD)."""
+
+    def __init__(self, path: str, start: int, end: int, status_code: int, headers: Dict[str, str], head: bool):
+        super().__init__(status_code=status_code, headers=headers)
+        self.path, self.start, self.end, self.head = path, start, end, head
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            f = await anyio.open_file(self.path, "rb")
+        except FileNotFoundError:
+            # Removed (expired, deleted) after the request was checked
+            await JSONResponse({"detail": "The file is no longer available."}, status_code=404)(scope, receive, send)
+            return
+
+        async with f:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if self.head:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            await f.seek(self.start)
+            remaining = self.end - self.start
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break   # shorter than promised; the client sees a truncated body and retries
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_response(
+    request: Request,
+    path: str,
+    filename: str,
+    media_type: str,
+    etag: str,
+    last_modified: float,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serve the file at *path*, honouring the request's conditional and ``Range`` headers."""
+    size = os.path.getsize(path)
+    modified = formatdate(last_modified, usegmt=True)
+    # As FileResponse words it
+    quoted = quote(filename)
+    if quoted == filename:
+        disposition = f'attachment; filename="{filename}"'
+    else:
+        disposition = f"attachment; filename*=utf-8''{quoted}"
+    base = {
+        **(headers or {}),
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": modified,
+        "Content-Disposition": disposition,
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=base)
+
+    span = None
+    if _if_range_holds(request.headers.get("if-range"), etag, modified):
+        try:
+            span = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**base, "Content-Range": f"bytes */{size}"})
+
+    head = request.method == "HEAD"
+    if span is None:
+        return _FileSlice(path, 0, size, 200, {**base, "Content-Length": str(size), "Content-Type": media_type}, head)
+    start, end = span
+    return _FileSlice(
+        path, start, end, 206,
+        {
+            **base,
+            "Content-Length": str(end - start),
+            "Content-Range": f"bytes {start}-{end - 1}/{size}",
+            "Content-Type": media_type,
+        },
+        head,
+    )
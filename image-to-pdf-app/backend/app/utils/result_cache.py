@@ -0,0 +1,258 @@
+"""
+Result cache — reuse a tool's output for the same inputs and options.
+
+Every tool call is keyed by the SHA-256 of its input files (in order), the
+tool name and its normalized options. A finished result is hard-linked
+into RESULT_CACHE_DIR as ``<key><ext>``; a later call with the same key
+gets its own link to it instead of running the service again. Coalescing
+of identical calls that are still running is done by ``execute_tool``
+(``app.workers.tools``), which is where this cache is used — and by the
+streaming ``/api/convert`` route, which caches but does not coalesce.
+
+KEYS:
+Options are normalized first — defaults filled in, case and whitespace
+dropped, pipeline steps re-serialized — so equivalent requests share an
+entry. Passwords never reach the key or the disk: they enter it as an
+HMAC under a secret generated per process, so an unlock result is only
+found again with the same password, and not at all after a restart or
+from another worker process. Bump KEY_VERSION when a service's output
+changes, so old entries are no longer found.
+
+LRU EVICTION:
+As in the blob store: a hit bumps the entry's mtime, and once the cache
+exceeds RESULT_CACHE_MB, entries no session is still using are removed
+oldest-mtime first. RESULT_CACHE_MB=0 turns the cache off.
+
+STATS:
+Hits, misses and coalesced calls are counted per process and reported by
+``GET /api/system/storage``.
+"""
+
+import os
+import re
+import hmac
+import json
+import uuid
+import errno
+import shutil
+import hashlib
+import logging
+import secrets
+import threading
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "result_cache")
+RESULT_CACHE_BYTES = int(os.getenv("RESULT_CACHE_MB", "256")) * 1024 * 1024
+
+KEY_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Extensions tool results come with (see tools.MEDIA_TYPES)
+RESULT_EXTENSIONS = (".pdf", ".zip", ".docx", ".xlsx", ".pptx")
+
+# Option values the services fall back to when an option is left out
+OPTION_DEFAULTS = {"quality": "medium", "page_size": "fit", "color_mode": "color", "ranges": "", "password": ""}
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Never written anywhere: passwords are keyed with it, so entries die with the process
+_SECRET = secrets.token_bytes(32)
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def normalize_options(options: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """Options in the form that goes into a key (secrets replaced by their HMAC)."""
+    normalized = {}
+    for name, value in options.items():
+        value = value or OPTION_DEFAULTS.get(name, "")
+        if name == "password":
+            value = hmac.new(_SECRET, value.encode(), hashlib.sha256).hexdigest()
+        elif name == "steps":
+            try:
+                value = json.dumps(json.loads(value), sort_keys=True, separators=(",", ":"))
+            except ValueError:
+                pass   # invalid — the service rejects it, and errors are not cached
+        elif name == "ranges":
+            value = "".join(value.split())
+        else:
+            value = value.strip().lower()
+        normalized[name] = value
+    return normalized
+
+
+class ResultCache:
+    """Hard-link based result cache rooted at *root*, capped at *budget* bytes."""
+
+    def __init__(self, root: str, budget: int):
+        self.root = root
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._evict_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def key(self, tool: str, inputs: List[str], options: Dict[str, Optional[str]]) -> str:
+        """Cache key of *tool* run on *inputs* with *options* (reads every input)."""
+        parts = {
+            "version": KEY_VERSION,
+            "tool": tool,
+            "inputs": [file_digest(path) for path in inputs],
+            "options": normalize_options(options),
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the entry stored under *key*, or None."""
+        if not _KEY_RE.match(key or ""):
+            return None
+        for ext in RESULT_EXTENSIONS:
+            path = os.path.join(self.root, key + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def link_into(self, key: str, session_dir: str) -> Optional[str]:
+        """
+        Give *session_dir* its own link to entry *key*.
+
+        Returns the new path, or None if nothing is stored under *key*.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        try:
+            path = link_result(entry, session_dir)
+        except FileNotFoundError:
+            return None   # evicted between get() and link()
+        self._touch(entry)
+        return path
+
+    def usage(self) -> dict:
+        """Current size of the cache and this process's hit / miss ratios."""
+        count = total = 0
+        for entry in self._scan():
+            count += 1
+            total += entry.stat().st_size
+        # A coalesced call is neither: it waited for a miss that was being computed
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": count,
+            "bytes": total,
+            "budget_bytes": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "miss_ratio": round(self.misses / lookups, 3) if lookups else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Store
+    # ------------------------------------------------------------------
+
+    def put(self, key: str, path: str) -> None:
+        """Store the result at *path* as entry *key* (skipped if it alone is over budget)."""
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in RESULT_EXTENSIONS or os.path.getsize(path) > self.budget:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        entry = os.path.join(self.root, key + ext)
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            _link_or_copy(path, tmp)
+            os.replace(tmp, entry)
+        except OSError:
+            logger.exception(f"Result cache: could not store {key[:12]}…")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        logger.info(f"Result cached: {key[:12]}… ({os.path.getsize(entry):,} bytes)")
+        self._evict()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _scan(self):
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    key, ext = os.path.splitext(entry.name)
+                    if ext in RESULT_EXTENSIONS and _KEY_RE.match(key):
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Remove entries no session uses, least recently used first, until under budget."""
+        if not self._evict_lock.acquire(blocking=False):
+            return   # another thread is already evicting
+        try:
+            entries = [(entry.path, entry.stat()) for entry in self._scan()]
+            total = sum(st.st_size for _, st in entries)
+            if total <= self.budget:
+                return
+
+            for path, st in sorted(entries, key=lambda e: e[1].st_mtime):
+                if total <= self.budget:
+                    break
+                if st.st_nlink > 1:
+                    continue   # a session or a kept result still uses it
+                try:
+                    os.remove(path)
+                    total -= st.st_size
+                    logger.info(f"Result evicted: {os.path.basename(path)}")
+                except FileNotFoundError:
+                    total -= st.st_size
+        finally:
+            self._evict_lock.release()
+
+
+def link_result(path: str, session_dir: str) -> str:
+    """Link (or copy) the file at *path* into *session_dir* under a fresh name; returns the new path."""
+    dest = os.path.join(session_dir, uuid.uuid4().hex + os.path.splitext(path)[1])
+    _link_or_copy(path, dest)
+    return dest
+
+
+def _link_or_copy(src: str, dest: str) -> None:
+    try:
+        os.link(src, dest)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        # Session on another filesystem (tmpfs) — copy instead
+        shutil.copyfile(src, dest)
+
+
+result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_BYTES)
@@ -0,0 +1,216 @@
+"""
+Result retention — keeps tool results downloadable for a while after the
+request that produced them.
+
+A tool route used to delete its result as soon as the response was sent,
+so an interrupted download meant uploading and computing everything again.
+Now the route also keeps the result here and returns an opaque download
+token (``X-Result-Token``); ``GET /api/results/{token}`` serves the file
+with ``Range`` support until the token expires.
+
+Each kept result is a directory under RESULTS_DIR:
+
+    <token>/meta.json      download filename, media type, size, expiry
+    <token>/data           hard link to the result (a copy across filesystems)
+
+Kept results never change, so a token names one immutable file — its ETag
+is derived from the token.
+
+EXPIRY AND QUOTA:
+A result expires RESULT_TTL_S after it was kept; the janitor removes
+expired ones on its regular sweep, and an expired token is refused even
+before that. Kept results together may use RESULTS_QUOTA_MB: keeping a new
+one first removes those closest to expiry until it fits, and a result
+larger than the whole quota is not kept. RESULT_TTL_S=0 turns retention off.
+
+The directory lives outside TEMP_DIR (same filesystem, for hard links) so
+results are not counted as session storage, and survive a restart.
+"""
+
+import os
+import re
+import json
+import time
+import errno
+import shutil
+import logging
+import secrets
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.getenv("RESULTS_DIR", "results")
+RESULT_TTL_S = float(os.getenv("RESULT_TTL_S", "3600"))
+RESULTS_QUOTA_BYTES = int(os.getenv("RESULTS_QUOTA_MB", "1024")) * 1024 * 1024
+
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{43}$")   # secrets.token_urlsafe(32)
+
+
+class KeptResult(NamedTuple):
+    token: str
+    filename: str
+    media_type: str
+    size: int
+    created_at: float
+    expires_at: float
+    path: str                 # the data file
+
+
+class ResultStore:
+    """Kept results rooted at *root*, each for *ttl* seconds, *quota* bytes in total."""
+
+    def __init__(self, root: str, ttl: float, quota: int):
+        self.root = root
+        self.ttl = ttl
+        self.quota = quota
+        self._lock = threading.Lock()   # keep() / sweep() of this process
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def keep(self, path: str, filename: str, media_type: str) -> Optional[KeptResult]:
+        """Keep the file at *path* for download; returns None if it cannot fit the quota."""
+        size = os.path.getsize(path)
+        if not self.enabled or size > self.quota:
+            return None
+
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        meta = {
+            "filename": filename, "media_type": media_type, "size": size,
+            "created_at": now, "expires_at": now + self.ttl,
+        }
+        # Assembled under a dot-name, then renamed: a token is never seen half-written
+        staging = os.path.join(self.root, f".{token}")
+        with self._lock:
+            self._make_room(size, now)
+            os.makedirs(staging)
+            try:
+                _link_or_copy(path, os.path.join(staging, "data"))
+                with open(os.path.join(staging, "meta.json"), "w") as f:
+                    json.dump(meta, f)
+                os.rename(staging, os.path.join(self.root, token))
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+        logger.info(f"Result kept: {filename} ({size:,} bytes) for {self.ttl:.0f} s")
+        return self._read(token)
+
+    def get(self, token: str) -> Optional[KeptResult]:
+        """Return the kept result, or None if the token is unknown or expired."""
+        kept = self._read(token) if _TOKEN_RE.match(token or "") else None
+        if kept is None or kept.expires_at <= time.time():
+            return None   # an expired one is removed by the janitor's next sweep
+        return kept
+
+    def delete(self, token: str) -> bool:
+        if not _TOKEN_RE.match(token or ""):
+            return False
+        try:
+            shutil.rmtree(os.path.join(self.root, token))
+            return True
+        except FileNotFoundError:
+            return False
+
+    # ------------------------------------------------------------------
+    # Expiry
+    # ------------------------------------------------------------------
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove expired results; returns how many."""
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            for kept in self._scan():
+                if kept.expires_at <= now and self.delete(kept.token):
+                    removed += 1
+                    logger.info(f"🧹 Expired result removed: {kept.filename}")
+        return removed
+
+    def usage(self) -> dict:
+        """Live kept results against the quota."""
+        now = time.time()
+        kept = [k for k in self._scan() if k.expires_at > now]
+        return {
+            "results": len(kept),
+            "bytes": sum(k.size for k in kept),
+            "quota_bytes": self.quota,
+            "ttl_s": self.ttl,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _scan(self) -> List[KeptResult]:
+        try:
+            with os.scandir(self.root) as entries:
+                tokens = [e.name for e in entries if e.is_dir() and _TOKEN_RE.match(e.name)]
+        except FileNotFoundError:
+            return []
+        return [kept for kept in map(self._read, tokens) if kept is not None]
+
+    def _read(self, token: str) -> Optional[KeptResult]:
+        try:
+            with open(os.path.join(self.root, token, "meta.json")) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return KeptResult(
+            token, meta["filename"], meta["media_type"], meta["size"], meta["created_at"], meta["expires_at"],
+            os.path.join(self.root, token, "data"),
+        )
+
+    def _make_room(self, size: int, now: float) -> None:
+        """Remove expired results, then those closest to expiry, until *size* more bytes fit."""
+        kept = sorted(self._scan(), key=lambda k: k.expires_at)
+        total = sum(k.size for k in kept)
+        for k in kept:
+            if total + size <= self.quota and k.expires_at > now:
+                break
+            if self.delete(k.token) and k.expires_at > now:
+                logger.info(f"Result dropped before expiry: {k.filename} (results over quota)")
+            total -= k.size
+
+
+def _link_or_copy(src: str, dest: str) -> None:
+    try:
+        os.link(src, dest)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        # Session on another filesystem (tmpfs) — copy instead
+        shutil.copyfile(src, dest)
+
+
+result_store = ResultStore(RESULTS_DIR, RESULT_TTL_S, RESULTS_QUOTA_BYTES)
+
+
+async def keep_for_download(path: str, filename: str, media_type: str) -> Dict[str, str]:
+    """
+    Keep a route's result; returns the response headers that tell the
+    client its download token (none if it was not kept).
+    """
+    try:
+        kept = await run_in_threadpool(result_store.keep, path, filename, media_type)
+    except OSError:
+        logger.exception(f"Could not keep result {filename}")
+        return {}
+    if kept is None:
+        return {}
+    return {
+        "X-Result-Token": kept.token,
+        "X-Result-Url": f"/api/results/{kept.token}",
+        "X-Result-Expires": str(int(kept.expires_at)),
+    }
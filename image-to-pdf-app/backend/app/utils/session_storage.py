@@ -0,0 +1,145 @@
+"""
+Session storage backends — where per-request session directories live.
+
+Every route works on a session directory of plain files (the PDF libraries
+all take paths), so a backend decides *where* that directory is:
+
+  - "disk"   (default) → TEMP_DIR, as before.
+  - "memory"           → a tmpfs directory (SESSION_MEMORY_DIR, /dev/shm by
+                         default). Files are page-cache memory: writes never
+                         touch the disk, there is nothing to fsync and
+                         removing a session is a few unlinks. Services keep
+                         opening paths — at memory speed.
+
+The memory backend spills to disk so RAM stays bounded:
+  - an upload that would take its session past SESSION_MEMORY_MAX_MB is
+    written to a per-session spill directory under TEMP_DIR instead;
+  - once the tmpfs holds SESSION_MEMORY_TOTAL_MB, new sessions are created
+    on disk until usage drops again.
+
+Only ``app.utils.file_handler`` talks to this module.
+"""
+
+import os
+import shutil
+import uuid
+import logging
+import threading
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SESSION_STORAGE = os.getenv("SESSION_STORAGE", "disk").lower()
+SESSION_MEMORY_DIR = os.getenv("SESSION_MEMORY_DIR", "/dev/shm/pdf-toolkit")
+SESSION_MEMORY_MAX_BYTES = int(os.getenv("SESSION_MEMORY_MAX_MB", "32")) * 1024 * 1024
+SESSION_MEMORY_TOTAL_BYTES = int(os.getenv("SESSION_MEMORY_TOTAL_MB", "256")) * 1024 * 1024
+
+
+class DiskStorage:
+    """Session directories under a single root on disk."""
+
+    name = "disk"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def roots(self) -> List[str]:
+        """Every directory this backend may create sessions in."""
+        return [self.root]
+
+    def ensure(self) -> None:
+        for root in self.roots():
+            os.makedirs(root, exist_ok=True)
+
+    def clear(self) -> None:
+        """Remove and recreate every root (shutdown cleanup)."""
+        for root in self.roots():
+            if os.path.exists(root):
+                shutil.rmtree(root)
+        self.ensure()
+
+    def create(self) -> str:
+        session_dir = os.path.join(self.root, uuid.uuid4().hex)
+        os.makedirs(session_dir, exist_ok=True)
+        return session_dir
+
+    def upload_path(self, session_dir: str, filename: str, size: int) -> str:
+        """Where an upload of *size* bytes for this session should be written."""
+        return os.path.join(session_dir, filename)
+
+    def cleanup(self, session_dir: str) -> None:
+        if os.path.exists(session_dir):
+            shutil.rmtree(session_dir)
+
+
+class MemoryStorage(DiskStorage):
+    """Session directories on tmpfs, spilling to *spill_root* on disk."""
+
+    name = "memory"
+
+    def __init__(self, root: str, spill_root: str, session_max: int, total_max: int):
+        super().__init__(root)
+        self.spill_root = spill_root
+        self.session_max = session_max
+        self.total_max = total_max
+        self._lock = threading.Lock()
+        self._in_memory: Dict[str, int] = {}   # session dir → upload bytes on tmpfs
+
+    def roots(self) -> List[str]:
+        return [self.root, self.spill_root]
+
+    def create(self) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        if shutil.disk_usage(self.root).used >= self.total_max:
+            logger.info("Session memory budget reached — creating session on disk.")
+            session_dir = os.path.join(self.spill_root, uuid.uuid4().hex)
+            os.makedirs(session_dir, exist_ok=True)
+            return session_dir
+
+        session_dir = super().create()
+        with self._lock:
+            self._in_memory[session_dir] = 0
+        return session_dir
+
+    def upload_path(self, session_dir: str, filename: str, size: int) -> str:
+        with self._lock:
+            used = self._in_memory.get(session_dir)
+            if used is not None and used + size <= self.session_max:
+                self._in_memory[session_dir] = used + size
+                return os.path.join(session_dir, filename)
+
+        if used is None:
+            return os.path.join(session_dir, filename)   # session already on disk
+
+        spill_dir = self._spill_dir(session_dir)
+        os.makedirs(spill_dir, exist_ok=True)
+        logger.info(f"Session {os.path.basename(session_dir)} over memory threshold — spilling upload to disk.")
+        return os.path.join(spill_dir, filename)
+
+    def cleanup(self, session_dir: str) -> None:
+        with self._lock:
+            in_memory = self._in_memory.pop(session_dir, None) is not None
+        super().cleanup(session_dir)
+        if in_memory:
+            super().cleanup(self._spill_dir(session_dir))
+
+    def _spill_dir(self, session_dir: str) -> str:
+        return os.path.join(self.spill_root, os.path.basename(session_dir))
+
+
+def get_session_storage(temp_dir: str) -> DiskStorage:
+    """Build the backend selected by SESSION_STORAGE."""
+    if SESSION_STORAGE == "memory":
+        parent = os.path.dirname(SESSION_MEMORY_DIR.rstrip("/")) or "/"
+        if os.path.isdir(parent) and os.access(parent, os.W_OK):
+            return MemoryStorage(
+                SESSION_MEMORY_DIR, temp_dir, SESSION_MEMORY_MAX_BYTES, SESSION_MEMORY_TOTAL_BYTES
+            )
+        logger.warning(f"{parent} is not writable — using disk session storage.")
+    elif SESSION_STORAGE != "disk":
+        logger.warning(f"Unknown SESSION_STORAGE={SESSION_STORAGE!r} — using disk.")
+    return DiskStorage(temp_dir)
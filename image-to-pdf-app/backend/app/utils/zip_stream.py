@@ -0,0 +1,68 @@
+"""
+Streaming ZIP writer — build an archive entry by entry and send its bytes
+as they are produced, without a seekable file behind it.
+
+    stream = ZipStream()
+    for chunk in stream.add_file(path, "invoice.pdf"):
+        send(chunk)
+    send(stream.add_bytes("manifest.json", data))
+    send(stream.close())
+
+``zipfile`` writes to an unseekable target by putting each entry's sizes
+and CRC in a data descriptor after its data, which every unzip tool reads.
+Entries are stored, not deflated: PDF, DOCX, XLSX and PPTX are compressed
+already, and deflating them again costs CPU for a few percent at best.
+"""
+
+import zipfile
+from typing import Iterator, List
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class _Buffer:
+    """Write-only file object that hands its contents out on ``drain()``."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    def __init__(self):
+        self._buffer = _Buffer()
+        # No tell()/seek() on the buffer — zipfile switches to streaming mode
+        self._zip = zipfile.ZipFile(self._buffer, "w", zipfile.ZIP_STORED)
+
+    def add_file(self, path: str, arcname: str) -> Iterator[bytes]:
+        """Add the file at *path* as *arcname*, yielding the archive bytes chunk by chunk."""
+        with open(path, "rb") as src, self._zip.open(arcname, "w") as dest:
+            yield self._buffer.drain()   # local header
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                dest.write(chunk)
+                yield self._buffer.drain()
+        yield self._buffer.drain()       # data descriptor
+
+    def add_bytes(self, arcname: str, data: bytes) -> bytes:
+        """Add *data* as *arcname*; returns the archive bytes for it."""
+        self._zip.writestr(arcname, data)
+        return self._buffer.drain()
+
+    def close(self) -> bytes:
+        """Finish the archive; returns the central directory."""
+        self._zip.close()
+        return self._buffer.drain()
@@ -0,0 +1,338 @@
+"""
+Admission control — bounds the total cost of work in progress.
+
+Worker pools bound how many calls *run*, not how much memory they need: two
+300 DPI handwriting renders and a pdf2docx conversion can still exhaust RAM
+together. Each request is therefore priced before it is processed and has
+to fit a weighted budget:
+
+  cost ≈ MB of peak worker memory
+       = base + per input MB × size + per page × pages
+              + per megapixel × pixels rendered / held at once
+
+Pages and pixel counts come from the PDF's page boxes (read lazily with
+pikepdf) or the images' headers; nothing is decoded. The coefficients in
+TOOL_COSTS are rough measurements, not promises — the point is that a
+200-page pdf-to-word costs far more than a 2-page unlock.
+
+LIMITS (per server process):
+  - ADMISSION_BUDGET_MB    total cost admitted at once (default: half of RAM)
+  - per-tool share         heavy tools may only use part of the budget
+                           (TOOL_SHARES, ADMISSION_TOOL_SHARES to override)
+
+A request that does not fit waits in a FIFO queue for up to
+ADMISSION_QUEUE_TIMEOUT_S; if the queue already holds ADMISSION_MAX_QUEUE
+requests, or the wait times out, it gets 503 with Retry-After. Background
+jobs (``wait=True``) queue without either limit. A request larger than the
+whole budget (or its tool's share) is admitted alone.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, NamedTuple, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _default_budget_mb() -> int:
+    try:
+        ram = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return 2048
+    return max(256, ram // 2 // (1024 * 1024))
+
+
+ADMISSION_BUDGET = float(os.getenv("ADMISSION_BUDGET_MB", str(_default_budget_mb())))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+ADMISSION_RETRY_AFTER_S = int(os.getenv("ADMISSION_RETRY_AFTER_S", "5"))
+
+# Render resolution of the tools that rasterise pages (see their services)
+RENDER_DPI = {"pdf-to-ppt": 200, "handwriting-to-pdf": 300}
+
+
+class ToolCost(NamedTuple):
+    base: float          # interpreter + libraries + fixed buffers
+    per_mb: float        # per MB of input
+    per_page: float      # per input page
+    per_mpx: float       # per megapixel held in memory at once
+
+
+TOOL_COSTS: Dict[str, ToolCost] = {
+    "merge-pdf": ToolCost(30, 1.0, 0.05, 0),          # pypdf writer holds copied streams
+    "split-pdf": ToolCost(30, 0.1, 0.05, 0),
+    "compress-pdf": ToolCost(40, 0.1, 0.5, 0),        # one image decoded at a time
+    "unlock-pdf": ToolCost(30, 0.1, 0.02, 0),
+    "pdf-to-word": ToolCost(150, 0.5, 2.0, 0),        # pdf2docx keeps every page's layout
+    "pdf-to-excel": ToolCost(60, 0.5, 1.0, 0),
+    "pdf-to-ppt": ToolCost(80, 0, 0.5, 3.0),          # one 200 DPI page at a time; slide PNGs kept until saved
+    "handwriting-to-pdf": ToolCost(60, 0, 0.2, 3.0),  # one 300 DPI page at a time
+    "image-to-pdf": ToolCost(40, 0, 0, 3.0),          # CONVERT_MAX_PARALLEL pages in flight
+    "pipeline": ToolCost(40, 1.0, 0.5, 3.0),          # whole document open, images converted one by one
+}
+
+# Largest fraction of the budget one tool may hold
+TOOL_SHARES: Dict[str, float] = {
+    "pdf-to-word": 0.5,
+    "pdf-to-excel": 0.5,
+    "pdf-to-ppt": 0.5,
+    "handwriting-to-pdf": 0.5,
+}
+for _pair in filter(None, os.getenv("ADMISSION_TOOL_SHARES", "").split(",")):
+    _tool, _, _share = _pair.partition("=")
+    try:
+        TOOL_SHARES[_tool.strip()] = float(_share)
+    except ValueError:
+        logger.warning(f"Ignoring ADMISSION_TOOL_SHARES entry {_pair!r}")
+
+
+# ---------------------------------------------------------------------------
+# Cost estimation
+# ---------------------------------------------------------------------------
+
+def _pdf_pages(path: str) -> Tuple[int, List[float]]:
+    """Page count and each page's area in square inches (empty if unreadable)."""
+    import pikepdf
+
+    try:
+        with pikepdf.open(path) as pdf:
+            areas = []
+            for page in pdf.pages:
+                x0, y0, x1, y1 = (float(v) for v in page.mediabox)
+                areas.append(abs(x1 - x0) * abs(y1 - y0) / (72 * 72))
+            return len(areas), areas
+    except Exception:
+        return 0, []   # encrypted / damaged — priced by size alone
+
+
+def _image_pages(path: str) -> List[float]:
+    """Megapixels of each frame of an image (from its header)."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            frames = getattr(img, "n_frames", 1) if img.format in ("TIFF", "GIF") else 1
+            return [img.width * img.height / 1e6] * frames
+    except Exception:
+        return []
+
+
+def estimate_cost(tool: str, paths: List[str]) -> float:
+    """Estimated peak memory (MB) of running *tool* on *paths*."""
+    model = TOOL_COSTS.get(tool, ToolCost(50, 1.0, 0, 0))
+    size_mb = sum(os.path.getsize(p) for p in paths if os.path.exists(p)) / (1024 * 1024)
+
+    if tool == "image-to-pdf":
+        from app.services.pdf_service import CONVERT_MAX_PARALLEL
+
+        mpx = sorted((m for p in paths for m in _image_pages(p)), reverse=True)
+        return model.base + model.per_mpx * sum(mpx[:CONVERT_MAX_PARALLEL])
+
+    if tool == "pipeline":
+        # PDFs priced like a merge + compress, plus the largest image being converted
+        pages = sum(_pdf_pages(p)[0] for p in paths)
+        mpx = [m for p in paths for m in _image_pages(p)]
+        return model.base + model.per_mb * size_mb + model.per_page * pages + model.per_mpx * max(mpx, default=0.0)
+
+    pages, areas = 0, []
+    for path in paths:
+        count, page_areas = _pdf_pages(path)
+        pages += count
+        areas += page_areas
+
+    cost = model.base + model.per_mb * size_mb + model.per_page * pages
+    if model.per_mpx and areas:
+        mpx = [a * RENDER_DPI.get(tool, 150) ** 2 / 1e6 for a in areas]
+        cost += model.per_mpx * max(mpx)   # pages are rendered one at a time
+    return cost
+
+
+# ---------------------------------------------------------------------------
+# Budget
+# ---------------------------------------------------------------------------
+
+class Ticket:
+    """An admitted request's share of the budget; release exactly once."""
+
+    def __init__(self, controller: "AdmissionController", tool: str, cost: float):
+        self.controller = controller
+        self.tool = tool
+        self.cost = cost
+        self._loop = asyncio.get_running_loop()
+        self._released = False
+
+    def release(self) -> None:
+        """Return the budget. Safe to call from any thread, and more than once."""
+        if self._released:
+            return
+        self._released = True
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self.controller._release(self)
+        else:
+            self._loop.call_soon_threadsafe(self.controller._release, self)
+
+
+class AdmissionController:
+    """Weighted budget with per-tool shares and a short FIFO queue."""
+
+    def __init__(self, budget: float, shares: Dict[str, float], max_queue: int, timeout: float):
+        self.budget = budget
+        self.shares = shares
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.used = 0.0
+        self.running = 0
+        self.tool_used: Dict[str, float] = {}
+        self.tool_running: Dict[str, int] = {}
+        self._queue: Deque[Tuple[str, float, asyncio.Future]] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def tool_cap(self, tool: str) -> float:
+        return self.budget * self.shares.get(tool, 1.0)
+
+    def _fits(self, tool: str, cost: float) -> bool:
+        if self.running == 0:
+            return True   # always let something run, however large
+        if self.used + cost > self.budget:
+            return False
+        if self.tool_running.get(tool, 0) == 0:
+            return True
+        return self.tool_used.get(tool, 0.0) + cost <= self.tool_cap(tool)
+
+    def _take(self, tool: str, cost: float) -> None:
+        self.used += cost
+        self.running += 1
+        self.tool_used[tool] = self.tool_used.get(tool, 0.0) + cost
+        self.tool_running[tool] = self.tool_running.get(tool, 0) + 1
+
+    def _release(self, ticket: Ticket) -> None:
+        self.used = max(0.0, self.used - ticket.cost)
+        self.running -= 1
+        self.tool_used[ticket.tool] = max(0.0, self.tool_used[ticket.tool] - ticket.cost)
+        self.tool_running[ticket.tool] -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Admit queued requests in order while the head of the queue fits."""
+        while self._queue:
+            tool, cost, waiter = self._queue[0]
+            if waiter.done():
+                self._queue.popleft()   # timed out / cancelled
+                continue
+            if not self._fits(tool, cost):
+                break
+            self._queue.popleft()
+            self._take(tool, cost)
+            waiter.set_result(None)
+
+    async def acquire(self, tool: str, cost: float, wait: bool = False) -> Ticket:
+        """
+        Wait for room for *cost*; raises HTTPException(503) when overloaded.
+
+        With *wait* (background jobs) the request queues for as long as it
+        takes and is never rejected.
+        """
+        cost = min(cost, self.tool_cap(tool))
+        if not self._queue and self._fits(tool, cost):
+            self._take(tool, cost)
+            self.admitted += 1
+            return Ticket(self, tool, cost)
+
+        if not wait and len(self._queue) >= self.max_queue:
+            self._reject(tool, cost, "queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queue.append((tool, cost, waiter))
+        self.queued += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), None if wait else self.timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._wake()   # requests behind this one may fit
+                self._reject(tool, cost, "queue timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release(Ticket(self, tool, cost))   # admitted just as the client left
+            else:
+                waiter.cancel()
+                self._wake()
+            raise
+        self.admitted += 1
+        logger.info(f"Admitted {tool} (cost {cost:.0f}) after {time.perf_counter() - start:.1f}s in queue")
+        return Ticket(self, tool, cost)
+
+    def _reject(self, tool: str, cost: float, reason: str) -> None:
+        self.rejected += 1
+        logger.warning(f"Rejected {tool} (cost {cost:.0f}): {reason}")
+        raise HTTPException(
+            status_code=503,
+            detail="The server is busy. Please try again shortly.",
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER_S)},
+        )
+
+    def stats(self) -> dict:
+        return {
+            "budget": self.budget,
+            "used": round(self.used, 1),
+            "running": self.running,
+            "queue_depth": sum(1 for _, _, w in self._queue if not w.done()),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "tools": {
+                tool: {
+                    "used": round(self.tool_used.get(tool, 0.0), 1),
+                    "running": self.tool_running.get(tool, 0),
+                    "cap": round(self.tool_cap(tool), 1),
+                }
+                for tool in TOOL_COSTS
+            },
+        }
+
+
+controller = AdmissionController(
+    ADMISSION_BUDGET, TOOL_SHARES, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT_S
+)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+async def admit(tool: str, paths: List[str], wait: bool = False) -> Ticket:
+    """Price *tool* on *paths* and wait for budget; 503 if overloaded (unless *wait*)."""
+    cost = await run_in_threadpool(estimate_cost, tool, paths)
+    return await controller.acquire(tool, cost, wait=wait)
+
+
+@asynccontextmanager
+async def admitted(tool: str, paths: List[str], wait: bool = False) -> AsyncIterator[Ticket]:
+    """``async with admitted(tool, paths):`` — hold budget for the block."""
+    ticket = await admit(tool, paths, wait=wait)
+    try:
+        yield ticket
+    finally:
+        ticket.release()
+
+
+def admission_stats() -> dict:
+    return controller.stats()
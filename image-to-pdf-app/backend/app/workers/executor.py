@@ -0,0 +1,510 @@
+"""
+Worker pools — runs CPU-bound service calls off the event loop.
+
+Every route is ``async def``; calling a service directly would block the
+event loop for every other user (health checks included) until it returns.
+Routes instead ``await run_tool(tool, func, *args)``, which runs the call in
+a process pool so concurrent requests use multiple cores.
+
+POOLS:
+Tools are assigned to separate pools so a queue of slow conversions cannot
+starve the quick ones:
+
+  - "documents"   merge / split / compress / unlock / pipeline (DOCUMENT_WORKERS, CPU count)
+  - "office"      pdf-to-word / pdf-to-excel / pdf-to-ppt (OFFICE_WORKERS, CPU count / 2)
+  - "handwriting" handwriting (mostly waiting on the API) (HANDWRITING_WORKERS, 2)
+  - "pages"       image-to-PDF page preparation           (CONVERT_WORKERS, CPU count)
+
+TOOL_POOLS (``"tool=pool,tool=pool"``) moves tools between pools.
+
+PRE-WARMING:
+Pools use "spawn" (forking a threaded server process is unsafe), so a fresh
+worker pays for a new interpreter plus the service's imports — pdf2docx,
+pikepdf, PyMuPDF — on its first job. ``start_workers()`` (at startup, unless
+WORKER_PREWARM=false) starts every worker and imports its pool's service
+modules up front.
+
+LAZY IMPORTS / PRELOAD:
+The server process itself imports no service (routes name them through
+``app.workers.tools``), so it starts fast on small instances. With
+PRELOAD_SERVICES=true, for multi-worker deployments:
+
+  - ``preload_services()`` (called when app.main is imported) imports every
+    service in the server process, so ``gunicorn --preload`` forks web
+    workers that share those pages copy-on-write;
+  - pools use "forkserver" with the services preloaded in the fork server,
+    so pool workers start by fork and share them too.
+
+LIMITS:
+Every call runs under a wall-clock limit (TOOL_TIMEOUT_S) and a CPU-time
+limit (TOOL_CPU_LIMIT_S), per tool via TOOL_LIMITS (``"tool=wall:cpu"``).
+The worker enforces both itself (SIGALRM / RLIMIT_CPU) and the call fails
+with ToolLimitExceeded — a ValueError, so routes answer 422. Subprocesses
+(pdflatex) are killed with it.
+
+CANCELLING:
+Cancelling the awaiting task (client disconnected, job cancelled) drops the
+call if it hasn't started, or interrupts the worker running it. A worker
+that doesn't stop within KILL_GRACE_S — stuck in C code, like one that
+ignores its own limits — is killed with its process group.
+
+PROGRESS:
+Calls made with ``progress=<channel>`` run with a ``report()`` sink that
+puts ``(channel, event)`` on their pool's queue; a thread per pool hands
+them to ``app.workers.progress`` for the SSE streams. Events arriving after
+the channel closed are dropped.
+
+A worker that dies (OOM kill, segfault in a C library) breaks its pool;
+the pool is replaced on the next call and the failed call raises
+RuntimeError. Calls that only failed because another call's worker was
+killed on purpose are retried once on the new pool.
+"""
+
+import os
+import queue
+import signal
+import asyncio
+import logging
+import resource
+import importlib
+import itertools
+import threading
+import multiprocessing
+import multiprocessing.forkserver
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+
+from app.utils.progress import reporting_to
+from app.workers.progress import publish
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_CPUS = os.cpu_count() or 1
+
+POOL_SIZES: Dict[str, int] = {
+    "documents": int(os.getenv("DOCUMENT_WORKERS", str(_CPUS))),
+    "office": int(os.getenv("OFFICE_WORKERS", str(max(1, _CPUS // 2)))),
+    "handwriting": int(os.getenv("HANDWRITING_WORKERS", "2")),
+    "pages": int(os.getenv("CONVERT_WORKERS", str(_CPUS))),
+}
+
+# Tool name (as in analytics) → pool it runs in, and the module it needs
+TOOL_POOLS: Dict[str, str] = {
+    "merge-pdf": "documents",
+    "split-pdf": "documents",
+    "compress-pdf": "documents",
+    "unlock-pdf": "documents",
+    "pdf-to-word": "office",
+    "pdf-to-excel": "office",
+    "pdf-to-ppt": "office",
+    "handwriting-to-pdf": "handwriting",
+    "image-to-pdf": "pages",
+    "pipeline": "documents",
+}
+TOOL_MODULES: Dict[str, str] = {
+    "merge-pdf": "app.services.merge_service",
+    "split-pdf": "app.services.split_service",
+    "compress-pdf": "app.services.compress_service",
+    "unlock-pdf": "app.services.unlock_service",
+    "pdf-to-word": "app.services.word_service",
+    "pdf-to-excel": "app.services.excel_service",
+    "pdf-to-ppt": "app.services.ppt_service",
+    "handwriting-to-pdf": "app.services.handwriting_service",
+    "image-to-pdf": "app.services.pdf_service",
+    "pipeline": "app.services.pipeline_service",
+}
+
+for _pair in filter(None, os.getenv("TOOL_POOLS", "").split(",")):
+    _tool, _, _pool = _pair.partition("=")
+    if _tool.strip() in TOOL_POOLS and _pool.strip() in POOL_SIZES:
+        TOOL_POOLS[_tool.strip()] = _pool.strip()
+    else:
+        logger.warning(f"Ignoring TOOL_POOLS entry {_pair!r}")
+
+WORKER_PREWARM = os.getenv("WORKER_PREWARM", "true").lower() == "true"
+PRELOAD_SERVICES = os.getenv("PRELOAD_SERVICES", "false").lower() == "true"
+
+# Per-call limits in seconds (0 = none): tool → (wall clock, CPU time)
+TOOL_TIMEOUT_S = float(os.getenv("TOOL_TIMEOUT_S", "300"))
+TOOL_CPU_LIMIT_S = float(os.getenv("TOOL_CPU_LIMIT_S", "120"))
+TOOL_LIMITS: Dict[str, Tuple[float, float]] = {tool: (TOOL_TIMEOUT_S, TOOL_CPU_LIMIT_S) for tool in TOOL_POOLS}
+
+for _pair in filter(None, os.getenv("TOOL_LIMITS", "").split(",")):
+    _tool, _, _values = _pair.partition("=")
+    _wall, _, _cpu = _values.partition(":")
+    try:
+        TOOL_LIMITS[_tool.strip()] = (float(_wall), float(_cpu) if _cpu else TOOL_CPU_LIMIT_S)
+    except ValueError:
+        logger.warning(f"Ignoring TOOL_LIMITS entry {_pair!r}")
+
+KILL_GRACE_S = float(os.getenv("KILL_GRACE_S", "5"))
+
+
+class ToolLimitExceeded(ValueError):
+    """A call ran past its wall-clock or CPU-time limit."""
+
+_LOG_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+
+_pools: Dict[str, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+_running: Dict[str, int] = {name: 0 for name in POOL_SIZES}
+_stopped: Dict[str, int] = {"timeout": 0, "cpu": 0, "cancelled": 0, "killed": 0}
+
+# Each pool shares a slot table with its workers: (pid, running call ID,
+# call ID to cancel) per worker, so the parent can find and signal the
+# worker running a given call.
+_SLOT = 3
+_slots: Dict[ProcessPoolExecutor, Any] = weakref.WeakKeyDictionary()
+_killed: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+_call_ids = itertools.count(1)
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+_table: Any = None
+_slot: Optional[int] = None
+_events: Any = None
+
+
+class _Interrupted(BaseException):
+    """Raised in a worker by a limit or cancel signal — past services' ``except Exception``."""
+
+
+def _claim_slot(table, lock) -> int:
+    with lock:
+        for i in range(0, len(table), _SLOT):
+            pid = table[i]
+            if pid:
+                try:
+                    os.kill(pid, 0)
+                    continue
+                except OSError:
+                    pass   # that worker is gone — reuse its slot
+            table[i:i + _SLOT] = [os.getpid(), 0, 0]
+            return i
+    raise RuntimeError("No free worker slot")
+
+
+def _on_signal(signum, frame) -> None:
+    if _slot is None:
+        return
+    call_id = _table[_slot + 1]
+    if not call_id:
+        return   # arrived between calls
+    if signum == signal.SIGUSR1 and _table[_slot + 2] != call_id:
+        return   # cancel meant for the call this worker already finished
+    raise _Interrupted(signum)
+
+
+def _import_all(modules: List[str]) -> None:
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as exc:
+            # Only that tool is unavailable; it fails with the same error when called
+            logger.warning(f"Could not preload {module}: {exc}")
+
+
+def _init_worker(modules: List[str], table=None, lock=None, events=None) -> None:
+    """Pool initializer — configure logging, register for limits/cancels/progress and import the pool's services."""
+    global _table, _slot, _events
+    logging.basicConfig(level=logging.INFO, format=_LOG_FORMAT)
+    _events = events
+    if table is not None:
+        # Own process group, so a kill takes the worker's subprocesses with it
+        os.setpgrp()
+        _table, _slot = table, _claim_slot(table, lock)
+        for signum in (signal.SIGALRM, signal.SIGXCPU, signal.SIGUSR1):
+            signal.signal(signum, _on_signal)
+    _import_all(modules)
+
+
+def call_service(module: str, name: str, *args, **kwargs):
+    """Import *module* (once per worker) and call its function *name*."""
+    return getattr(importlib.import_module(module), name)(*args, **kwargs)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def _limited_call(
+    call_id: int, limits: Tuple[float, float], channel: Optional[str], func: Callable[..., T], args: tuple, kwargs: dict
+) -> T:
+    """
+    Run ``func(*args, **kwargs)`` in this worker under *limits* (wall, CPU
+    seconds), sending its progress events to *channel* if given.
+    """
+    wall, cpu = limits
+    if channel is not None and _events is not None:
+        reporting = reporting_to(lambda event: _events.put((channel, event)))
+    else:
+        reporting = nullcontext()
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    _table[_slot + 1] = call_id
+    try:
+        if cpu:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            limit = int(usage.ru_utime + usage.ru_stime + cpu) + 1
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+        if wall:
+            signal.setitimer(signal.ITIMER_REAL, wall)
+        with reporting:
+            return func(*args, **kwargs)
+    except _Interrupted as exc:
+        signum = exc.args[0]
+        if signum == signal.SIGALRM:
+            raise ToolLimitExceeded(
+                f"Processing took longer than {wall:g} s — the file may be damaged or too complex."
+            ) from None
+        if signum == signal.SIGXCPU:
+            raise ToolLimitExceeded(
+                f"Processing used more than {cpu:g} s of CPU time — the file may be damaged or too complex."
+            ) from None
+        raise RuntimeError("Cancelled.") from None
+    finally:
+        _table[_slot + 1] = 0
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+# ---------------------------------------------------------------------------
+# Pools
+# ---------------------------------------------------------------------------
+
+def _pool_modules(name: str) -> List[str]:
+    return sorted({TOOL_MODULES[tool] for tool, pool in TOOL_POOLS.items() if pool == name})
+
+
+def preload_services() -> None:
+    """Import every service now (PRELOAD_SERVICES) — before the server forks, so the pages are shared."""
+    modules = sorted(set(TOOL_MODULES.values()))
+    _import_all(modules)
+    # The fork server (started by start_workers) imports them once; pool workers fork from it
+    multiprocessing.get_context("forkserver").set_forkserver_preload(modules)
+    logger.info(f"Preloaded {len(modules)} service modules")
+
+
+def _mp_context():
+    return multiprocessing.get_context("forkserver" if PRELOAD_SERVICES else "spawn")
+
+
+def get_pool(name: str) -> ProcessPoolExecutor:
+    """Return pool *name*, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            ctx = _mp_context()
+            # Room for replacement workers starting while dead ones are reaped
+            table = ctx.RawArray("q", POOL_SIZES[name] * 2 * _SLOT)
+            events = ctx.Queue()
+            # Never wait on the queue at exit — a killed worker may have left its lock held
+            events.cancel_join_thread()
+            pool = ProcessPoolExecutor(
+                max_workers=POOL_SIZES[name],
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(_pool_modules(name), table, ctx.Lock(), events),
+            )
+            _pools[name] = pool
+            _slots[pool] = table
+            threading.Thread(
+                target=_forward_events, args=(name, pool, events), name=f"progress-{name}", daemon=True
+            ).start()
+            logger.info(f"Worker pool '{name}' started ({POOL_SIZES[name]} workers)")
+        return pool
+
+
+def _forward_events(name: str, pool: ProcessPoolExecutor, events) -> None:
+    """Pass *pool*'s progress events on to their channels until the pool is replaced."""
+    while True:
+        try:
+            channel, event = events.get(timeout=1)
+        except queue.Empty:
+            if _pools.get(name) is not pool:
+                return
+            continue
+        except (EOFError, OSError):
+            return
+        publish(channel, event)
+
+
+def reset_pool(name: str, pool: Optional[ProcessPoolExecutor] = None) -> None:
+    """
+    Drop a broken pool (e.g. a worker was OOM-killed) so the next call gets a fresh one.
+
+    With *pool*, only that pool is dropped — not one another caller already
+    replaced it with.
+    """
+    with _pools_lock:
+        if pool is None or _pools.get(name) is pool:
+            pool = _pools.pop(name, None)
+        else:
+            pool = None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning(f"Worker pool '{name}' was broken — replaced")
+
+
+def pool_for(tool: str) -> str:
+    return TOOL_POOLS.get(tool, "documents")
+
+
+def start_workers() -> None:
+    """Start every pool's workers now so the first requests don't pay for spawning."""
+    if PRELOAD_SERVICES:
+        # Per server process (after any gunicorn fork): the fork server imports the services now
+        multiprocessing.forkserver.ensure_running()
+    if not WORKER_PREWARM:
+        return
+    for name, size in POOL_SIZES.items():
+        pool = get_pool(name)
+        # Workers are spawned on demand; one job each while none is idle yet
+        for _ in range(size):
+            pool.submit(_ready)
+
+
+def shutdown_workers() -> None:
+    """Stop all pools (called on application shutdown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def worker_stats() -> dict:
+    """Pool sizes, running calls and tool assignment."""
+    with _pools_lock:
+        started = set(_pools)
+    return {
+        "pools": {
+            name: {"workers": size, "running": _running[name], "started": name in started}
+            for name, size in POOL_SIZES.items()
+        },
+        "tools": dict(TOOL_POOLS),
+        "limits": {tool: {"wall_s": wall, "cpu_s": cpu} for tool, (wall, cpu) in TOOL_LIMITS.items()},
+        "stopped": dict(_stopped),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Dispatch
+# ---------------------------------------------------------------------------
+
+def submit_limited(
+    pool: ProcessPoolExecutor, tool: str, func: Callable[..., T], *args, progress: Optional[str] = None, **kwargs
+) -> "Future[T]":
+    """
+    Submit ``func(*args, **kwargs)`` to *pool* under *tool*'s limits (see
+    ``cancel_call``), publishing its progress events to channel *progress*.
+    """
+    call_id = next(_call_ids)
+    future = pool.submit(_limited_call, call_id, TOOL_LIMITS.get(tool, (0, 0)), progress, func, args, kwargs)
+    future.call_id = call_id
+    return future
+
+
+def _worker_running(pool: ProcessPoolExecutor, call_id: int) -> Optional[Tuple[Any, int]]:
+    """(slot table, slot) of the worker running *call_id*, if any."""
+    table = _slots.get(pool)
+    if table is None:
+        return None
+    for i in range(0, len(table), _SLOT):
+        if table[i + 1] == call_id:
+            return table, i
+    return None
+
+
+def cancel_call(pool: ProcessPoolExecutor, future: Future) -> None:
+    """
+    Stop a call made with ``submit_limited``: drop it if still queued,
+    otherwise interrupt its worker, and kill the worker if it is still
+    running the call after KILL_GRACE_S.
+    """
+    if future.done() or future.cancel():
+        return
+    running = _worker_running(pool, future.call_id)
+    if running is None:
+        return
+    table, i = running
+    table[i + 2] = future.call_id
+    try:
+        os.kill(table[i], signal.SIGUSR1)
+    except OSError:
+        return
+    _stopped["cancelled"] += 1
+    timer = threading.Timer(KILL_GRACE_S, kill_call, (pool, future))
+    timer.daemon = True
+    timer.start()
+
+
+def kill_call(pool: ProcessPoolExecutor, future: Future) -> None:
+    """Kill the worker (and its subprocesses) running *future*'s call; this breaks *pool*."""
+    if future.done():
+        return
+    running = _worker_running(pool, future.call_id)
+    if running is None:
+        return
+    table, i = running
+    _killed.add(pool)
+    try:
+        os.killpg(table[i], signal.SIGKILL)
+    except OSError:
+        return
+    _stopped["killed"] += 1
+    logger.warning(f"Killed worker {table[i]}: call {future.call_id} did not stop")
+
+
+async def run_tool(tool: str, func: Callable[..., T], *args, progress: Optional[str] = None, **kwargs) -> T:
+    """
+    Run ``func(*args, **kwargs)`` in *tool*'s pool and return its result.
+
+    *func* and its arguments must be picklable (module-level functions,
+    paths and plain values). Exceptions raised by *func* propagate as-is;
+    a call past its limits raises ToolLimitExceeded. Cancelling the caller
+    stops the call (``cancel_call``). Progress events go to channel *progress*.
+    """
+    name = pool_for(tool)
+    wall = TOOL_LIMITS.get(tool, (0, 0))[0]
+    for attempt in range(2):
+        pool = get_pool(name)
+        _running[name] += 1
+        try:
+            future = submit_limited(pool, tool, func, *args, progress=progress, **kwargs)
+            waiter = asyncio.wrap_future(future)
+            try:
+                return await asyncio.wait_for(asyncio.shield(waiter), wall + KILL_GRACE_S if wall else None)
+            except asyncio.TimeoutError:
+                # The worker's own alarm didn't stop it — stuck outside Python
+                waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+                kill_call(pool, future)
+                _stopped["timeout"] += 1
+                raise ToolLimitExceeded(f"Processing took longer than {wall:g} s.") from None
+            except asyncio.CancelledError:
+                waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+                cancel_call(pool, future)
+                raise
+            except ToolLimitExceeded as exc:
+                _stopped["cpu" if "CPU" in str(exc) else "timeout"] += 1
+                raise
+        except BrokenProcessPool as exc:
+            reset_pool(name, pool)
+            if attempt == 0 and pool in _killed:
+                continue   # another call's worker was killed on purpose — this one never failed
+            raise RuntimeError(f"The {tool} worker stopped unexpectedly.") from exc
+        finally:
+            _running[name] -= 1
@@ -0,0 +1,192 @@
+"""
+Progress channels — where ``app.utils.progress.report()`` events end up.
+
+A channel is named by the client (``progress_id`` on a tool request, any
+8–64 characters of ``[A-Za-z0-9_-]``) or is a job ID. ``execute_tool``
+opens it, worker events arrive through the executor, and ``subscribe()``
+replays what happened so far and then follows new events. The SSE
+endpoints (``GET /api/progress/{id}``, ``GET /api/jobs/{id}/events``) are
+thin wrappers around it, so a client may subscribe before or after it
+sends the request.
+
+Every event gets ``elapsed_ms`` since the channel opened. Each channel
+also times its stages; the timings are sent in the final event and logged.
+Closed channels are kept for PROGRESS_TTL_S so a late subscriber still
+sees the outcome.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TTL_S = float(os.getenv("PROGRESS_TTL_S", "60"))
+KEEPALIVE_S = 15
+HISTORY = 200
+
+_CHANNEL_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+class _Channel:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.events: Deque[Tuple[int, str, Dict[str, Any]]] = deque(maxlen=HISTORY)
+        self.seq = 0
+        self.changed = asyncio.Event()
+        self.opened_at = time.monotonic()
+        self.open = False
+        self.closing = False
+        self.closed = False
+        self.subscribers = 0
+        self.tool: Optional[str] = None
+        self.stage: Optional[str] = None
+        self.stage_started = self.opened_at
+        self.stages: Dict[str, float] = {}
+
+
+_channels: Dict[str, _Channel] = {}
+
+
+def valid_channel(channel_id: str) -> bool:
+    return bool(_CHANNEL_ID.match(channel_id or ""))
+
+
+def _get(channel_id: str) -> _Channel:
+    channel = _channels.get(channel_id)
+    if channel is None:
+        channel = _channels[channel_id] = _Channel(asyncio.get_running_loop())
+    return channel
+
+
+def _append(channel: _Channel, kind: str, data: Dict[str, Any]) -> None:
+    now = time.monotonic()
+    stage = data.get("stage")
+    if stage is not None and stage != channel.stage:
+        _end_stage(channel, now)
+        channel.stage, channel.stage_started = stage, now
+    channel.seq += 1
+    channel.events.append((channel.seq, kind, {**data, "elapsed_ms": round((now - channel.opened_at) * 1000)}))
+    # Wake everyone waiting on the old event; later waiters get a fresh one
+    channel.changed.set()
+    channel.changed = asyncio.Event()
+
+
+def _end_stage(channel: _Channel, now: float) -> None:
+    if channel.stage is not None:
+        ms = (now - channel.stage_started) * 1000
+        channel.stages[channel.stage] = round(channel.stages.get(channel.stage, 0) + ms)
+
+
+# ---------------------------------------------------------------------------
+# Publishing (event loop, except publish())
+# ---------------------------------------------------------------------------
+
+def open_channel(channel_id: str, tool: str) -> None:
+    """Start reporting *tool*'s progress on *channel_id* (first event: "queued")."""
+    if not valid_channel(channel_id):
+        raise ValueError("Invalid progress_id — use 8-64 letters, digits, '-' or '_'.")
+    channel = _channels.get(channel_id)
+    if channel is not None and channel.closing:
+        channel = None   # ID reused — start over
+    if channel is None:
+        channel = _channels[channel_id] = _Channel(asyncio.get_running_loop())
+    channel.open, channel.tool = True, tool
+    channel.opened_at = channel.stage_started = time.monotonic()
+    _append(channel, "progress", {"stage": "queued"})
+
+
+def publish(channel_id: str, event: Dict[str, Any]) -> None:
+    """Add a progress event to *channel_id*. Safe to call from any thread."""
+    channel = _channels.get(channel_id)
+    if channel is not None and not channel.closed:
+        channel.loop.call_soon_threadsafe(_append_open, channel, event)
+
+
+def _append_open(channel: _Channel, event: Dict[str, Any]) -> None:
+    # Events still in flight when the call finished may land after the close
+    if not channel.closed:
+        _append(channel, "progress", event)
+
+
+def close_channel(channel_id: str, status: str, detail: Optional[str] = None) -> None:
+    """Finish *channel_id* with a final "done" or "error" event carrying the stage timings."""
+    channel = _channels.get(channel_id)
+    if channel is None or channel.closing:
+        return
+    channel.closing = True
+
+    def close() -> None:
+        _end_stage(channel, time.monotonic())
+        channel.stage = None
+        _append(channel, status, {"status": status, "detail": detail, "stages": channel.stages})
+        channel.closed = True
+        timings = ", ".join(f"{stage} {ms} ms" for stage, ms in channel.stages.items())
+        logger.info(f"Stages of {channel.tool} ({status}): {timings}")
+        channel.loop.call_later(PROGRESS_TTL_S, _drop, channel_id, channel)
+
+    # After any events still on their way from worker threads
+    channel.loop.call_soon_threadsafe(close)
+
+
+def _drop(channel_id: str, channel: _Channel) -> None:
+    if _channels.get(channel_id) is channel:
+        del _channels[channel_id]
+
+
+# ---------------------------------------------------------------------------
+# Subscribing
+# ---------------------------------------------------------------------------
+
+async def subscribe(channel_id: str) -> AsyncIterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """
+    Yield ``(kind, data)`` for every event on *channel_id* — past ones
+    first — until it closes. Yields ``(None, {})`` every KEEPALIVE_S
+    while nothing happens. Ends with an "error" event if no request opens
+    the channel within PROGRESS_TTL_S (it was rejected before it started).
+    """
+    channel = _get(channel_id)
+    channel.subscribers += 1
+    seen = 0
+    give_up_at = time.monotonic() + PROGRESS_TTL_S
+    try:
+        while True:
+            waiter = channel.changed
+            for seq, kind, data in list(channel.events):
+                if seq > seen:
+                    seen = seq
+                    yield kind, data
+            if channel.closed:
+                return
+            if not channel.open and time.monotonic() >= give_up_at:
+                yield "error", {"status": "error", "detail": "No request with this progress_id has started."}
+                return
+            timeout = KEEPALIVE_S if channel.open else min(KEEPALIVE_S, give_up_at - time.monotonic())
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout)
+            except asyncio.TimeoutError:
+                yield None, {}
+    finally:
+        channel.subscribers -= 1
+        # Subscribed to a request that never came
+        if not channel.open and not channel.subscribers:
+            _drop(channel_id, channel)
+
+
+def sse(kind: Optional[str], data: Dict[str, Any]) -> str:
+    """One Server-Sent Events message (a comment for keep-alives)."""
+    if kind is None:
+        return ": keepalive\n\n"
+    return f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
@@ -0,0 +1,265 @@
+"""
+Tool registry — one place that knows how to run each service.
+
+Both the synchronous routes and background jobs go through
+``execute_tool``: admission (``app.workers.admission``), then the service
+call in its worker pool (``app.workers.executor``). A sync route is just
+"resolve the upload, execute_tool, return the file"; a job is the same call
+made later by the job runner.
+
+RESULT CACHE:
+Results are cached by input content and options (``app.utils.result_cache``).
+A call whose key is cached gets a link to the stored result and runs
+nothing. Identical calls arriving while one is being computed wait for
+that computation instead of starting their own (single flight). The shared
+computation runs in its own session directory on links to the inputs, so
+it survives the caller that started it; it is cancelled only once every
+caller waiting for it has gone.
+
+Tool names are the ones analytics uses. Services are named, not imported:
+each is imported where it runs (the worker), so a tool whose optional
+dependency is missing fails alone instead of taking every route down.
+"""
+
+import os
+import asyncio
+import logging
+from contextlib import nullcontext
+from functools import partial
+from typing import AbstractSet, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.file_handler import IMAGE_TYPES, PDF_TYPES, cleanup_session_dir, create_session_dir
+from app.utils.progress import reporting_to
+from app.utils.result_cache import link_result, result_cache
+from app.workers.admission import admitted
+from app.workers.executor import TOOL_MODULES, call_service, run_tool
+from app.workers.progress import close_channel, open_channel, publish
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    ".pdf": "application/pdf",
+    ".zip": "application/zip",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+
+class ToolSpec(NamedTuple):
+    func: str                        # function in TOOL_MODULES[tool]: (input(s), session_dir, **options) → path
+    input_types: AbstractSet[str]    # accepted upload kinds
+    multi: bool                      # takes a list of inputs (else exactly one)
+    options: Tuple[str, ...]         # keyword options passed through
+    downloads: Dict[str, str]        # result extension → download filename
+    in_process: bool = False         # manages its own pool — run in a thread instead
+
+
+TOOL_SPECS: Dict[str, ToolSpec] = {
+    # images_to_pdf already fans pages out to the "pages" pool itself
+    "image-to-pdf": ToolSpec(
+        "images_to_pdf", IMAGE_TYPES, True, ("page_size", "color_mode"), {".pdf": "converted.pdf"}, True
+    ),
+    "merge-pdf": ToolSpec("merge_pdfs", PDF_TYPES, True, (), {".pdf": "merged.pdf"}),
+    "split-pdf": ToolSpec(
+        "split_pdf", PDF_TYPES, False, ("ranges",), {".pdf": "split.pdf", ".zip": "split_pages.zip"}
+    ),
+    "compress-pdf": ToolSpec("compress_pdf", PDF_TYPES, False, ("quality",), {".pdf": "compressed.pdf"}),
+    "unlock-pdf": ToolSpec("unlock_pdf", PDF_TYPES, False, ("password",), {".pdf": "unlocked.pdf"}),
+    "pdf-to-word": ToolSpec("pdf_to_word", PDF_TYPES, False, (), {".docx": "converted.docx"}),
+    "pdf-to-excel": ToolSpec("pdf_to_excel", PDF_TYPES, False, (), {".xlsx": "extracted.xlsx"}),
+    "pdf-to-ppt": ToolSpec("pdf_to_ppt", PDF_TYPES, False, (), {".pptx": "converted.pptx"}),
+    "handwriting-to-pdf": ToolSpec(
+        "handwritten_notes_to_pdf", PDF_TYPES, False, (), {".pdf": "typeset_notes.pdf"}
+    ),
+    "pipeline": ToolSpec(
+        "run_pipeline", IMAGE_TYPES | PDF_TYPES, True, ("steps", "password"),
+        {".pdf": "pipeline.pdf", ".zip": "pipeline_parts.zip"},
+    ),
+}
+
+# Options that must never be written to disk (job table, logs)
+SECRET_OPTIONS = frozenset({"password"})
+
+
+class ToolResult(NamedTuple):
+    path: str
+    filename: str
+    media_type: str
+
+
+def describe_result(tool: str, path: str) -> ToolResult:
+    """Download filename and media type for *tool*'s result at *path*."""
+    ext = os.path.splitext(path)[1].lower()
+    filename = TOOL_SPECS[tool].downloads.get(ext, f"result{ext}")
+    return ToolResult(path, filename, MEDIA_TYPES.get(ext, "application/octet-stream"))
+
+
+async def _disconnected(request: Request) -> None:
+    """Return once the client has gone (the body is already read, so receive() only reports that)."""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _unless_disconnected(request: Request, task: "asyncio.Task[ToolResult]") -> ToolResult:
+    """Await *task*, cancelling it (and the worker call under it) if the client goes away."""
+    # Request.is_disconnected() only peeks, and misses the message behind BaseHTTPMiddleware
+    watcher = asyncio.ensure_future(_disconnected(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            return task.result()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # 499: nginx's "client closed request" — nobody receives it, analytics does
+        raise HTTPException(status_code=499, detail="Client closed the request.")
+    finally:
+        task.cancel()
+        watcher.cancel()
+
+
+async def execute_tool(
+    tool: str,
+    inputs: List[str],
+    session_dir: str,
+    wait: bool = False,
+    request: Optional[Request] = None,
+    progress: Optional[str] = None,
+    **options: Optional[str],
+) -> ToolResult:
+    """
+    Run *tool* on *inputs*, writing into *session_dir*.
+
+    Waits for admission first (503 when overloaded, unless *wait*), then
+    runs the service in its worker pool. Service errors propagate
+    (ValueError, including ToolLimitExceeded → the caller's 422). With
+    *request*, the work is cancelled — the worker interrupted — as soon as
+    that client disconnects (HTTPException 499). With *progress*, the
+    service's progress is published on that channel (``app.workers.progress``).
+    A cached result is returned without any of that (see RESULT CACHE).
+    """
+    if progress is not None:
+        open_channel(progress, tool)
+    try:
+        task = asyncio.ensure_future(_execute(tool, inputs, session_dir, wait, progress, options))
+        result = await (_unless_disconnected(request, task) if request is not None else task)
+    except HTTPException as exc:
+        if progress is not None:
+            close_channel(progress, "error", str(exc.detail))
+        raise
+    except ValueError as exc:
+        if progress is not None:
+            close_channel(progress, "error", str(exc))
+        raise
+    except asyncio.CancelledError:
+        if progress is not None:
+            close_channel(progress, "error", "Cancelled.")
+        raise
+    except BaseException:
+        if progress is not None:
+            close_channel(progress, "error", "Internal server error.")
+        raise
+    if progress is not None:
+        close_channel(progress, "done")
+    return result
+
+
+class _Flight:
+    """One computation of a cache key, shared by every call waiting for it."""
+
+    def __init__(self):
+        # Not any caller's session: the caller that started it may leave first
+        self.session_dir = create_session_dir()
+        self.task: Optional["asyncio.Task[str]"] = None
+        self.waiters = 0
+
+    def leave(self) -> None:
+        self.waiters -= 1
+        if self.waiters:
+            return
+        if self.task.done():
+            cleanup_session_dir(self.session_dir)
+        else:
+            # Nobody wants the result any more — stop the worker, then clean up
+            self.task.cancel()
+            self.task.add_done_callback(lambda _: cleanup_session_dir(self.session_dir))
+
+
+# Cache key → computation in progress (this process)
+_flights: Dict[str, _Flight] = {}
+
+
+async def _execute(
+    tool: str, inputs: List[str], session_dir: str, wait: bool, progress: Optional[str], options: Dict[str, Optional[str]]
+) -> ToolResult:
+    spec = TOOL_SPECS[tool]
+    kwargs = {name: options[name] for name in spec.options if options.get(name) is not None}
+    if not result_cache.enabled:
+        return describe_result(tool, await _run(tool, inputs, session_dir, wait, progress, kwargs))
+
+    key = await run_in_threadpool(result_cache.key, tool, inputs, {name: options.get(name) for name in spec.options})
+    while True:
+        flight = _flights.get(key)
+        if flight is None:
+            path = await run_in_threadpool(result_cache.link_into, key, session_dir)
+            if path is not None:
+                result_cache.hits += 1
+                logger.info(f"♻️  {tool}: cached result {key[:12]}…")
+                if progress is not None:
+                    publish(progress, {"stage": "cached"})
+                return describe_result(tool, path)
+            flight = _flights.get(key)   # started while we looked
+
+        if flight is None:
+            result_cache.misses += 1
+            flight = _flights[key] = _Flight()
+            flight.task = asyncio.ensure_future(_compute(flight, key, tool, inputs, wait, progress, kwargs))
+        else:
+            result_cache.coalesced += 1
+            logger.info(f"♻️  {tool}: waiting for the same call in progress ({key[:12]}…)")
+            if progress is not None:
+                publish(progress, {"stage": "coalesced"})
+
+        flight.waiters += 1
+        try:
+            result_path = await asyncio.shield(flight.task)
+            return describe_result(tool, await run_in_threadpool(link_result, result_path, session_dir))
+        except HTTPException as exc:
+            # The caller that started it was not willing to queue; this one is — try again
+            if not (wait and exc.status_code == 503):
+                raise
+        finally:
+            flight.leave()
+
+
+async def _compute(
+    flight: _Flight, key: str, tool: str, inputs: List[str], wait: bool, progress: Optional[str], kwargs: dict
+) -> str:
+    try:
+        own_inputs = await run_in_threadpool(lambda: [link_result(path, flight.session_dir) for path in inputs])
+        result_path = await _run(tool, own_inputs, flight.session_dir, wait, progress, kwargs)
+        await run_in_threadpool(result_cache.put, key, result_path)
+        return result_path
+    finally:
+        # Done: later calls find the cache entry (or, after an error, start again)
+        if _flights.get(key) is flight:
+            del _flights[key]
+
+
+async def _run(
+    tool: str, inputs: List[str], session_dir: str, wait: bool, progress: Optional[str], kwargs: dict
+) -> str:
+    spec = TOOL_SPECS[tool]
+    args = (TOOL_MODULES[tool], spec.func, inputs if spec.multi else inputs[0], session_dir)
+
+    async with admitted(tool, inputs, wait=wait):
+        if progress is not None:
+            publish(progress, {"stage": "running"})
+        if spec.in_process:
+            reporting = reporting_to(partial(publish, progress)) if progress is not None else nullcontext()
+            with reporting:
+                return await run_in_threadpool(call_service, *args, **kwargs)
+        return await run_tool(tool, call_service, *args, progress=progress, **kwargs)
@@ -0,0 +1,163 @@
+"""
+Benchmark — server cold start, lazy imports vs PRELOAD_SERVICES.
+
+Each mode runs in a fresh process with fresh worker pools:
+
+    import    — importing app.main
+    startup   — the app lifespan (DBs, janitor, workers, job runner)
+    first     — first compress / convert request (includes starting a
+                worker and importing the service)
+    warm      — the same request again
+    PSS       — proportional memory of the server plus all its workers
+                (every pool started), so pages shared copy-on-write are
+                counted once
+
+Pools are not pre-warmed (WORKER_PREWARM=false), so "first" shows what the
+first user of a tool waits for.
+
+Run from the backend directory:
+    python -m benchmarks.bench_cold_start [--workers 2]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    "lazy": {"PRELOAD_SERVICES": "false"},
+    "preload": {"PRELOAD_SERVICES": "true"},
+}
+
+
+def make_inputs(tmp: str) -> None:
+    import pikepdf
+    from PIL import Image
+
+    pdf = pikepdf.new()
+    for _ in range(3):
+        pdf.add_blank_page()
+        page = pdf.pages[-1]
+        page.Contents = pdf.make_stream(b"BT /F1 24 Tf 72 720 Td (Hello) Tj ET")
+        page.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=pikepdf.Dictionary(
+            Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1, BaseFont=pikepdf.Name.Helvetica,
+        )))
+    pdf.save(os.path.join(tmp, "input.pdf"))
+    Image.new("RGB", (1200, 900), "teal").save(os.path.join(tmp, "input.png"))
+
+
+# ---------------------------------------------------------------------------
+# Measurement (child process)
+# ---------------------------------------------------------------------------
+
+def _descendants(pid: int) -> list:
+    pids = [pid]
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                for child in f.read().split():
+                    pids += _descendants(int(child))
+        except OSError:
+            pass
+    return pids
+
+
+def _pss_mb() -> float:
+    total = 0
+    for pid in _descendants(os.getpid()):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        except (OSError, StopIteration):
+            pass
+    return total / 1024
+
+
+def run_child(tmp: str) -> None:
+    """Entry point of the measuring subprocess — prints its timings as JSON."""
+    timings = {}
+    start = time.perf_counter()
+    from app.main import app
+    timings["import"] = time.perf_counter() - start
+
+    from fastapi.testclient import TestClient
+
+    with open(os.path.join(tmp, "input.pdf"), "rb") as f:
+        pdf = f.read()
+    with open(os.path.join(tmp, "input.png"), "rb") as f:
+        png = f.read()
+
+    def timed(key: str, call) -> None:
+        started = time.perf_counter()
+        response = call()
+        response.raise_for_status()
+        timings[key] = time.perf_counter() - started
+
+    start = time.perf_counter()
+    with TestClient(app) as client:
+        timings["startup"] = time.perf_counter() - start
+        compress = lambda: client.post("/api/compress", files={"file": ("a.pdf", pdf)}, data={"quality": "medium"})
+        convert = lambda: client.post("/api/convert", files=[("files", ("a.png", png)), ("files", ("b.png", png))])
+        timed("first compress", compress)
+        timed("warm compress", compress)
+        timed("first convert", convert)
+        timed("warm convert", convert)
+
+        # Start every worker of every pool, as under load, before measuring memory
+        from app.workers.executor import POOL_SIZES, get_pool
+
+        for name, size in POOL_SIZES.items():
+            for future in [get_pool(name).submit(os.getpid) for _ in range(size)]:
+                future.result()
+        timings["pss_mb"] = _pss_mb()
+    print(json.dumps(timings))
+
+
+def measure(mode: str, tmp: str, workers: int) -> dict:
+    env = {
+        **os.environ,
+        **MODES[mode],
+        "WORKER_PREWARM": "false",
+        "DOCUMENT_WORKERS": str(workers),
+        "CONVERT_WORKERS": str(workers),
+        "TEMP_DIR": os.path.join(tmp, mode, "temp"),
+        "BLOB_DIR": os.path.join(tmp, mode, "blobs"),
+        "UPLOAD_DIR": os.path.join(tmp, mode, "uploads"),
+        "JOBS_DIR": os.path.join(tmp, mode, "jobs"),
+        "ANALYTICS_DB_PATH": os.path.join(tmp, mode, "analytics.db"),
+    }
+    os.makedirs(os.path.join(tmp, mode), exist_ok=True)
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cold_start", "--child", tmp],
+        capture_output=True, text=True, check=True, env=env,
+    )
+    # Last line only — some PyMuPDF versions print a deprecation notice on import
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=2, help="document / page pool size")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_inputs(tmp)
+        results = {mode: measure(mode, tmp, args.workers) for mode in MODES}
+
+    keys = ["import", "startup", "first compress", "warm compress", "first convert", "warm convert"]
+    print(f"{'':<16}" + "".join(f"{mode:>10}" for mode in MODES))
+    for key in keys:
+        print(f"{key + ' ms':<16}" + "".join(f"{results[mode][key] * 1000:>10.0f}" for mode in MODES))
+    print(f"{'PSS MB':<16}" + "".join(f"{results[mode]['pss_mb']:>10.0f}" for mode in MODES))
+
+
+if __name__ == "__main__":
+    main()
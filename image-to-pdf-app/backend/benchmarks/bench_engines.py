@@ -0,0 +1,216 @@
+"""
+Benchmark — every PDF engine on every operation it supports.
+
+Builds a mixed document (text, a ruled table and a photo on each page) plus
+an encrypted copy, then times each operation per engine in a fresh process,
+from opening the file to the last byte written or extracted:
+
+    merge   — the document merged with itself
+    split   — every page written as its own file
+    unlock  — the encrypted copy opened with its password and saved plain
+    render  — every page rasterised (150 dpi)
+    text    — every page's text
+    tables  — every page's tables
+
+``--write`` saves the rankings (fastest first) where app.engines.policy
+reads them (ENGINE_POLICY_FILE), so a deployment can re-measure on its own
+hardware. Engines whose library is not installed are skipped.
+
+Run from the backend directory:
+    python -m benchmarks.bench_engines [--pages 40] [--repeat 3] [--write [PATH]]
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PASSWORD = "bench"
+RENDER_DPI = 150
+
+
+def make_pdfs(tmp: str, pages: int) -> None:
+    import fitz
+    import pikepdf
+    from PIL import Image
+
+    photo = io.BytesIO()
+    Image.effect_mandelbrot((800, 600), (-2, -1.2, 1, 1.2), 100).convert("RGB").save(photo, "JPEG", quality=85)
+
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Quarterly report — page {n + 1}", fontsize=18)
+        page.insert_textbox(
+            fitz.Rect(72, 90, 540, 250),
+            " ".join(f"Line {i} of the body text on page {n + 1}, long enough to wrap." for i in range(12)),
+            fontsize=10,
+        )
+        # A 6 × 4 ruled table
+        top, row_h, col_w = 270, 22, 110
+        for r in range(7):
+            page.draw_line((72, top + r * row_h), (72 + 4 * col_w, top + r * row_h))
+        for c in range(5):
+            page.draw_line((72 + c * col_w, top), (72 + c * col_w, top + 6 * row_h))
+        for r in range(6):
+            for c in range(4):
+                label = f"Col {c + 1}" if r == 0 else f"{n + 1}.{r}.{c + 1}"
+                page.insert_text((78 + c * col_w, top + r * row_h + 15), label, fontsize=9)
+        page.insert_image(fitz.Rect(72, 430, 372, 655), stream=photo.getvalue())
+    plain = os.path.join(tmp, "plain.pdf")
+    doc.save(plain, garbage=1)
+    doc.close()
+
+    with pikepdf.open(plain) as pdf:
+        pdf.save(os.path.join(tmp, "locked.pdf"), encryption=pikepdf.Encryption(user=PASSWORD, owner=PASSWORD))
+
+
+# ---------------------------------------------------------------------------
+# Operations (child process) — each takes (engine, tmp)
+# ---------------------------------------------------------------------------
+
+def _open(engine, path: str, password: str = ""):
+    from app.utils.pdf_input import PdfInput
+
+    source = PdfInput(path)
+    return source, engine.open(source, password)
+
+
+def merge(engine, tmp: str) -> None:
+    first, a = _open(engine, os.path.join(tmp, "plain.pdf"))
+    second, b = _open(engine, os.path.join(tmp, "plain.pdf"))
+    dest = engine.new()
+    engine.copy_pages(dest, a, range(engine.page_count(a)))
+    engine.copy_pages(dest, b, range(engine.page_count(b)))
+    engine.save(dest, os.path.join(tmp, "out.pdf"))
+    first.close()
+    second.close()
+
+
+def split(engine, tmp: str) -> None:
+    source, doc = _open(engine, os.path.join(tmp, "plain.pdf"))
+    for i in range(engine.page_count(doc)):
+        dest = engine.new()
+        engine.copy_pages(dest, doc, [i])
+        engine.save(dest, os.path.join(tmp, "out.pdf"))
+    source.close()
+
+
+def unlock(engine, tmp: str) -> None:
+    source, doc = _open(engine, os.path.join(tmp, "locked.pdf"), PASSWORD)
+    engine.save(doc, os.path.join(tmp, "out.pdf"))
+    source.close()
+
+
+def render(engine, tmp: str) -> None:
+    source, doc = _open(engine, os.path.join(tmp, "plain.pdf"))
+    for i in range(engine.page_count(doc)):
+        engine.render(doc, i, RENDER_DPI)
+    source.close()
+
+
+def text(engine, tmp: str) -> None:
+    source, doc = _open(engine, os.path.join(tmp, "plain.pdf"))
+    for i in range(engine.page_count(doc)):
+        engine.text(doc, i)
+    source.close()
+
+
+def tables(engine, tmp: str) -> None:
+    source, doc = _open(engine, os.path.join(tmp, "plain.pdf"))
+    found = sum(len(engine.tables(doc, i)) for i in range(engine.page_count(doc)))
+    source.close()
+    if not found:
+        raise SystemExit(f"{engine.name} found no tables")
+
+
+OPERATIONS = {"merge": merge, "split": split, "unlock": unlock, "render": render, "text": text, "tables": tables}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def run_child(op: str, name: str, tmp: str) -> None:
+    """Entry point of the measuring subprocess — prints ms."""
+    from app.engines.policy import get_engine
+
+    engine = get_engine(name)   # imported before the clock starts
+    start = time.perf_counter()
+    OPERATIONS[op](engine, tmp)
+    print((time.perf_counter() - start) * 1000)
+
+
+def measure(op: str, name: str, tmp: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_engines", "--child", op, name, tmp],
+        capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        # e.g. pypdf on AES without the cryptography package — left out of the ranking
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+    # Last line only — some PyMuPDF versions print a deprecation notice on import
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def installed_engines() -> dict:
+    from app.engines.policy import ENGINE_MODULES, get_engine
+
+    engines = {}
+    for name in ENGINE_MODULES:
+        engine = get_engine(name)
+        if engine is None:
+            print(f"{name}: not installed, skipped")
+        else:
+            engines[name] = engine
+    return engines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=40, help="pages in the test document")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine and operation (best is kept)")
+    parser.add_argument("--write", nargs="?", const="", metavar="PATH",
+                        help="save the rankings (default: ENGINE_POLICY_FILE)")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    engines = installed_engines()
+    rankings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        make_pdfs(tmp, args.pages)
+        print(f"{args.pages} pages, {os.path.getsize(os.path.join(tmp, 'plain.pdf')) / 1024:.0f} KB, "
+              f"best of {args.repeat}\n")
+        print(f"{'operation':<10} {'engine':<12} {'ms':>9}")
+        for op in OPERATIONS:
+            times = {}
+            for name, engine in engines.items():
+                if op not in engine.operations:
+                    continue
+                try:
+                    times[name] = min(measure(op, name, tmp) for _ in range(args.repeat))
+                except RuntimeError as exc:
+                    print(f"{op:<10} {name:<12} {'failed':>9}  {exc}")
+            for name in sorted(times, key=times.get):
+                print(f"{op:<10} {name:<12} {times[name]:>9.0f}")
+            rankings[op] = sorted(times, key=times.get)
+
+    if args.write is not None:
+        from app.engines.policy import ENGINE_POLICY_FILE
+
+        path = args.write or ENGINE_POLICY_FILE
+        with open(path, "w") as f:
+            json.dump(rankings, f, indent=2)
+        print(f"\nRankings written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Microbenchmark — app.services.normalize vs the previous normalisation
+path (paste-with-mask for RGBA/LA, ``convert("RGB")`` for
+everything else).
+
+For each input mode it reports the best-of-N wall time and the peak RSS
+growth of a fresh process decoding the image and converting it once.
+
+Run from the backend directory:
+    python -m benchmarks.bench_normalize [--size 4000x3000] [--repeat 5]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.services.normalize import to_gray, to_rgb
+
+MODES = ("RGBA", "LA", "P", "P+tRNS", "CMYK", "I;16")
+
+
+def pillow_to_rgb(img: Image.Image) -> Image.Image:
+    """The pre-normalize.py implementation, kept here for comparison."""
+    if img.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def make_image(mode: str, width: int, height: int) -> Image.Image:
+    rng = np.random.default_rng(0)
+    rgba = Image.fromarray(rng.integers(0, 256, (height, width, 4), dtype=np.uint8), "RGBA")
+    if mode == "RGBA":
+        return rgba
+    if mode == "LA":
+        return rgba.convert("LA")
+    if mode.startswith("P"):
+        img = rgba.convert("RGB").quantize(256)
+        if mode == "P+tRNS":
+            img.info["transparency"] = 0
+        return img
+    if mode == "CMYK":
+        return rgba.convert("RGB").convert("CMYK")
+    if mode == "I;16":
+        return Image.fromarray(rng.integers(0, 65536, (height, width), dtype=np.uint16))
+    raise ValueError(mode)
+
+
+def convert(impl: str, img: Image.Image) -> Image.Image:
+    if impl == "old":
+        return pillow_to_rgb(img)
+    return to_gray(img) if img.mode.startswith("I;16") else to_rgb(img)
+
+
+def best_time(impl: str, img: Image.Image, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert(impl, img)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def save_image(img: Image.Image, directory: str, mode: str) -> str:
+    """Write the test image where the memory subprocess can decode it."""
+    path = os.path.join(directory, mode.replace(";", "").replace("+", "_"))
+    path += ".tif" if img.mode == "CMYK" else ".png"
+    img.save(path)
+    return path
+
+
+def peak_rss_child(impl: str, path: str) -> None:
+    """Entry point of the memory subprocess — prints peak RSS growth in MB."""
+    img = Image.open(path)
+    img.load()
+    before = _peak_rss_kb()
+    convert(impl, img)
+    print((_peak_rss_kb() - before) / 1024)
+
+
+def _peak_rss_kb() -> int:
+    # VmHWM rather than ru_maxrss: on Linux the latter survives fork + exec,
+    # so the child would start at the (much larger) parent's peak.
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss(impl: str, path: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_normalize", "--rss-child", impl, path],
+        capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", default="4000x3000", help="WIDTHxHEIGHT of the test images")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rss-child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.rss_child:
+        peak_rss_child(*args.rss_child)
+        return
+
+    width, height = map(int, args.size.split("x"))
+    print(f"{width}x{height}, best of {args.repeat}\n")
+    print(f"{'mode':<8} {'old ms':>10} {'new ms':>10} {'old MB':>10} {'new MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in MODES:
+            img = make_image(mode, width, height)
+            path = save_image(img, tmp, mode)
+            times = [best_time(impl, img, args.repeat) * 1000 for impl in ("old", "new")]
+            rss = [peak_rss(impl, path) for impl in ("old", "new")]
+            print(f"{mode:<8} {times[0]:>10.1f} {times[1]:>10.1f} {rss[0]:>10.1f} {rss[1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
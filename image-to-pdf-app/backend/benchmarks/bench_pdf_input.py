@@ -0,0 +1,169 @@
+"""
+Benchmark — app.utils.pdf_input.PdfInput vs opening inputs by path.
+
+Builds a large PDF (a few pages of big uncompressed images) and runs each
+service's access pattern in a fresh process, reporting wall time, peak RSS
+growth and anonymous (non-reclaimable) RSS growth at the end of the run.
+
+    old        — the library opened by path, as the services did before
+    new        — through PdfInput
+    pikepdf mmap / fitz stream — the alternatives PdfInput does not use,
+                 kept here so the choice can be re-checked
+
+Run from the backend directory:
+    python -m benchmarks.bench_pdf_input [--size-mb 200]
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pikepdf
+
+from app.utils.pdf_input import PdfInput
+
+PAGE_BYTES = 5_000_000
+
+
+def make_pdf(path: str, size_mb: int) -> None:
+    pdf = pikepdf.new()
+    for _ in range(max(1, size_mb * 1024 * 1024 // PAGE_BYTES)):
+        image = pikepdf.Stream(
+            pdf, os.urandom(PAGE_BYTES),
+            Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Image,
+            Width=1000, Height=PAGE_BYTES // 3000,
+            ColorSpace=pikepdf.Name.DeviceRGB, BitsPerComponent=8,
+        )
+        pdf.add_blank_page()
+        page = pdf.pages[-1]
+        page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=image))
+        page.Contents = pdf.make_stream(b"q 612 0 0 792 0 0 cm /Im0 Do Q")
+    pdf.save(path)
+
+
+# ---------------------------------------------------------------------------
+# Access patterns — each takes (variant, path, source)
+# ---------------------------------------------------------------------------
+
+def _pypdf_reader(variant: str, path: str, source: PdfInput):
+    from pypdf import PdfReader
+
+    return PdfReader(path) if variant == "old" else source.pypdf()
+
+
+def merge(variant: str, path: str, source: PdfInput) -> None:
+    """merge_service: every page copied into a new document."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for page in _pypdf_reader(variant, path, source).pages:
+        writer.add_page(page)
+    with open(os.devnull, "wb") as f:
+        writer.write(f)
+
+
+def split_one(variant: str, path: str, source: PdfInput) -> None:
+    """split_service: one page extracted from a large file."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    writer.add_page(_pypdf_reader(variant, path, source).pages[1])
+    writer.write(io.BytesIO())
+
+
+def compress(variant: str, path: str, source: PdfInput) -> None:
+    """compress / unlock: the whole document rewritten by qpdf."""
+    if variant == "old":
+        pdf = pikepdf.open(path)
+    elif variant == "pikepdf mmap":
+        pdf = pikepdf.open(path, access_mode=pikepdf.AccessMode.mmap)
+    else:
+        pdf = source.pikepdf()
+    pdf.save(os.devnull, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+    pdf.close()
+
+
+def render(variant: str, path: str, source: PdfInput) -> None:
+    """handwriting: pages rasterised by PyMuPDF."""
+    import fitz
+
+    if variant == "old":
+        doc = fitz.open(path)
+    elif variant == "fitz stream":
+        with open(path, "rb") as f:
+            doc = fitz.open(stream=f.read(), filetype="pdf")
+    else:
+        doc = source.fitz()
+    doc[1].get_pixmap(dpi=36)
+
+
+CASES = {
+    "merge": (merge, ("old", "new")),
+    "split 1 page": (split_one, ("old", "new")),
+    "compress": (compress, ("old", "new", "pikepdf mmap")),
+    "render": (render, ("old", "new", "fitz stream")),
+}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _status_kb() -> dict:
+    values = {}
+    with open("/proc/self/status") as status:
+        for line in status:
+            key, _, value = line.partition(":")
+            if key in ("VmHWM", "RssAnon"):
+                values[key] = int(value.split()[0])
+    return values
+
+
+def run_child(case: str, variant: str, path: str) -> None:
+    """Entry point of the measuring subprocess — prints ms, peak MB, anon MB."""
+    func = CASES[case][0]
+    before = _status_kb()
+    start = time.perf_counter()
+    with PdfInput(path) as source:
+        func(variant, path, source)
+        elapsed = time.perf_counter() - start
+        after = _status_kb()
+    print(elapsed * 1000, (after["VmHWM"] - before["VmHWM"]) / 1024, (after["RssAnon"] - before["RssAnon"]) / 1024)
+
+
+def measure(case: str, variant: str, path: str):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pdf_input", "--child", case, variant, path],
+        capture_output=True, text=True, check=True,
+    )
+    # Last line only — some PyMuPDF versions print a deprecation notice on import
+    return [float(v) for v in out.stdout.strip().splitlines()[-1].split()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=int, default=200, help="size of the test PDF")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.pdf")
+        make_pdf(path, args.size_mb)
+        print(f"{os.path.getsize(path) / 1024 / 1024:.0f} MB input\n")
+        print(f"{'case':<14} {'variant':<14} {'ms':>8} {'peak MB':>9} {'anon MB':>9}")
+        for case, (_, variants) in CASES.items():
+            for variant in variants:
+                ms, peak, anon = measure(case, variant, path)
+                print(f"{case:<14} {variant:<14} {ms:>8.0f} {peak:>9.1f} {anon:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
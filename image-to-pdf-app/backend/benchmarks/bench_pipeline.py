@@ -0,0 +1,120 @@
+"""
+Benchmark — merge → compress → split, chained tools vs one pipeline.
+
+    chained   — merge_pdfs, compress_pdf, split_pdf one after the other,
+                each writing its result for the next to parse (what three
+                requests do, minus the uploads and downloads in between)
+    pipeline  — run_pipeline with the same steps: one document, written once
+
+Each runs in a fresh process and reports wall time, peak RSS growth and
+the bytes written to the session directory.
+
+Run from the backend directory:
+    python -m benchmarks.bench_pipeline [--pages 60] [--repeat 3]
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+STEPS = [{"op": "merge"}, {"op": "compress", "quality": "medium"}, {"op": "split", "ranges": "1-10,11-30,31-60"}]
+
+
+def make_inputs(tmp: str, pages: int) -> list:
+    import pikepdf
+    from PIL import Image
+
+    paths = []
+    for n in range(2):
+        pdf = pikepdf.new()
+        for i in range(pages // 2):
+            # A photo-like image (recompressed by "compress") and some text
+            img = Image.radial_gradient("L").resize((1200, 900)).convert("RGB")
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=95)
+            image = pikepdf.Stream(
+                pdf, buf.getvalue(),
+                Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Image, Width=1200, Height=900,
+                ColorSpace=pikepdf.Name.DeviceRGB, BitsPerComponent=8, Filter=pikepdf.Name.DCTDecode,
+            )
+            pdf.add_blank_page()
+            page = pdf.pages[-1]
+            page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=image))
+            page.Contents = pdf.make_stream(b"q 612 0 0 459 0 166 cm /Im0 Do Q" + b" " * 4000)
+        path = os.path.join(tmp, f"input_{n}.pdf")
+        pdf.save(path)
+        paths.append(path)
+    return paths
+
+
+# ---------------------------------------------------------------------------
+# Measurement (child process)
+# ---------------------------------------------------------------------------
+
+def _peak_kb() -> int:
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def run_child(variant: str, session_dir: str, inputs: list) -> None:
+    """Entry point of the measuring subprocess — prints ms, peak MB, MB written."""
+    from app.services.compress_service import compress_pdf
+    from app.services.merge_service import merge_pdfs
+    from app.services.pipeline_service import run_pipeline
+    from app.services.split_service import split_pdf
+
+    before = _peak_kb()
+    start = time.perf_counter()
+    if variant == "chained":
+        merged = merge_pdfs(inputs, session_dir)
+        compressed = compress_pdf(merged, session_dir, STEPS[1]["quality"])
+        split_pdf(compressed, session_dir, STEPS[2]["ranges"])
+    else:
+        run_pipeline(inputs, session_dir, json.dumps(STEPS))
+    elapsed = time.perf_counter() - start
+    print(elapsed * 1000, (_peak_kb() - before) / 1024, _dir_bytes(session_dir) / 1024 / 1024)
+
+
+def measure(variant: str, tmp: str, inputs: list) -> list:
+    session_dir = tempfile.mkdtemp(dir=tmp)
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pipeline", "--child", variant, session_dir, *inputs],
+        capture_output=True, text=True, check=True,
+    )
+    # Last line only — some PyMuPDF versions print a deprecation notice on import
+    return [float(v) for v in out.stdout.strip().splitlines()[-1].split()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=60, help="pages after the merge")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per variant (best is reported)")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.child[2:])
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = make_inputs(tmp, args.pages)
+        size = sum(os.path.getsize(p) for p in inputs) / 1024 / 1024
+        print(f"2 inputs, {args.pages} pages, {size:.1f} MB; steps: {json.dumps(STEPS)}\n")
+        print(f"{'variant':<10} {'ms':>8} {'peak MB':>9} {'written MB':>11}")
+        for variant in ("chained", "pipeline"):
+            runs = [measure(variant, tmp, inputs) for _ in range(args.repeat)]
+            ms, peak, written = min(runs)
+            print(f"{variant:<10} {ms:>8.0f} {peak:>9.1f} {written:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Import-time report — what each entry point costs to import, and why.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh process for
+the server (app.main) and every service module, and prints the total
+import time of each plus the third-party / stdlib packages that dominate it.
+
+Run from the backend directory:
+    python -m benchmarks.import_report [--top 8] [module ...]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from app.workers.executor import TOOL_MODULES
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module: str) -> Tuple[float, Dict[str, float]]:
+    """(total ms, package → ms spent importing it) for importing *module* in a fresh process."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        raise ImportError(out.stderr.strip().splitlines()[-1])
+
+    lines = []
+    for line in out.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            lines.append((len(match.group(3)), match.group(4), int(match.group(2)) / 1000))
+
+    # Children are printed before their parent; the module's subtree is the
+    # run of deeper lines just before it (earlier top-level lines are
+    # interpreter startup)
+    end = max(i for i, (indent, name, _) in enumerate(lines) if indent == 1 and name == module)
+    start = end
+    while start > 0 and lines[start - 1][0] > 1:
+        start -= 1
+
+    packages: Dict[str, float] = defaultdict(float)
+    for i in range(start, end):
+        indent, name, cumulative = lines[i]
+        parent = next(lines[k][1] for k in range(i + 1, end + 1) if lines[k][0] < indent)
+        package = name.split(".")[0]
+        # Count a package where it is entered from outside it — its cumulative time covers the rest
+        if package != "app" and parent.split(".")[0] != package:
+            packages[package] += cumulative
+    return lines[end][2], packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=8, help="packages to list per module")
+    parser.add_argument("modules", nargs="*", help="modules to report (default: app.main and every service)")
+    args = parser.parse_args()
+
+    modules: List[str] = args.modules or ["app.main"] + sorted(set(TOOL_MODULES.values()))
+    for module in modules:
+        try:
+            total, packages = import_times(module)
+        except ImportError as exc:
+            print(f"{module:<36} import failed: {exc}\n")
+            continue
+        print(f"{module:<36} {total:>8.0f} ms")
+        ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        for name, ms in ranked[:args.top]:
+            print(f"    {name:<32} {ms:>8.0f} ms")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ const ACCEPTED_TYPES = {
   "image/bmp": [".bmp"],
   "image/gif": [".gif"],
   "image/webp": [".webp"],
-  "image/tiff": [".tiff"],
+  "image/tiff": [".tiff", ".tif"],
+  "image/jp2": [".jp2"],
 };
 
 const MAX_SIZE = 10 * 1024 * 1024; // 10 MB